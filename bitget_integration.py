@@ -1,19 +1,39 @@
 # bitget_integration.py
 from __future__ import annotations
-import os, time, hmac, hashlib, base64, json, math
+import asyncio, os, time, hmac, hashlib, base64, json, math
 from typing import Any, Dict, List, Optional, Tuple
 import httpx
 
+from nlp.parser_rules import as_parsed_signal
+from market.bitget_transport import DEFAULT_LIMITS, get_transport
+from market.bitget_batch import (BATCH_ORDER_PATH, BatchOrderError, BatchOutcome, batch_body,
+                                 dry_run_payload, new_client_oid, submit_batches, submit_batches_async)
+from market.contract_specs import contract_specs
+from market.rate_limit import bitget_limiter
+from trader.submitter import LegSubmitter, order_legs
+
 # === Конфиг из окружения ===
 BITGET_BASE = os.getenv("BITGET_BASE", "https://api.bitget.com").rstrip("/")
 BITGET_API_KEY = os.getenv("BITGET_API_KEY", "")
 BITGET_API_SECRET = os.getenv("BITGET_API_SECRET", "")
 BITGET_PASSPHRASE = os.getenv("BITGET_PASSPHRASE", "")
 DRY_RUN = os.getenv("DRY_RUN","true").lower()=="true"
+# Стоп и тейки уходят параллельно: не больше N запросов сразу и R стартов в секунду
+ORDER_CONCURRENCY = int(os.getenv("BITGET_ORDER_CONCURRENCY") or 5)
+ORDER_RATE_PER_SEC = float(os.getenv("BITGET_ORDER_RATE_PER_SEC") or 10)
+# Лестница TP одним batch-orders вместо placeOrder на каждый уровень
+BATCH_TAKE_PROFITS = (os.getenv("BITGET_BATCH_TP") or "true").lower() == "true"
 
-# Только BTCUSDT (по ТЗ), рынок — UMCBL (USDT-M perpetual)
+# Рынок — UMCBL (USDT-M perpetual); символ по умолчанию BTCUSDT, остальные — через for_symbol()
 MARGIN_COIN = "USDT"
 PRODUCT_SYMBOL = "BTCUSDT_UMCBL"  # [Неподтверждено] Уточнить формат символа в доке, обычно так
+PRODUCT_TYPE = "umcbl"
+
+
+def product_symbol(symbol: str) -> str:
+    """BTCUSDT -> BTCUSDT_UMCBL (уже с суффиксом — как есть)"""
+    symbol = symbol.upper()
+    return symbol if "_" in symbol else f"{symbol}_{PRODUCT_TYPE.upper()}"
 
 def _ts_ms() -> str:
     return str(int(time.time() * 1000))
@@ -35,21 +55,35 @@ def _headers(ts: str, sign: str) -> Dict[str,str]:
 class BitgetHTTP:
     def __init__(self, base: str = BITGET_BASE, timeout: float = 15.0):
         self.base = base
-        self.http = httpx.Client(timeout=timeout)
+        # синхронный клиент — для скриптов и проверок; тот же пул keep-alive
+        self.http = httpx.Client(timeout=timeout, limits=DEFAULT_LIMITS)
+        # асинхронный — общий на процесс (см. market/bitget_transport.py)
+        self.transport = get_transport(base)
+        self.limiter = bitget_limiter
 
-    def _request(self, method: str, path: str, body: Optional[dict]=None, auth: bool=False):
-        url = self.base + path
+    def _prepare(self, method: str, path: str, body: Optional[dict], auth: bool) -> Dict[str, Any]:
         data = json.dumps(body or {}, separators=(",",":"))
-        if not auth:
-            r = self.http.request(method, url, content=data if method!="GET" else None, params=(body if method=="GET" else None))
-            return r
-        ts = _ts_ms()
-        sign = _sign(ts, method, path, (data if method!="GET" else ""))
-        r = self.http.request(method, url,
-                              headers=_headers(ts, sign),
-                              content=(data if method!="GET" else None),
-                              params=(body if method=="GET" else None))
-        return r
+        kwargs: Dict[str, Any] = {
+            "content": data if method!="GET" else None,
+            "params": body if method=="GET" else None,
+        }
+        if auth:
+            ts = _ts_ms()
+            sign = _sign(ts, method, path, (data if method!="GET" else ""))
+            kwargs["headers"] = _headers(ts, sign)
+        return kwargs
+
+    def _request(self, method: str, path: str, body: Optional[dict]=None, auth: bool=False):
+        # лимитер: бакет класса эндпоинта, повторы на 429/5xx, предохранитель (market/rate_limit.py);
+        # подпись пересчитывается на каждой попытке — у неё метка времени
+        return self.limiter.call(method, path, lambda: self.http.request(
+            method, self.base + path, **self._prepare(method, path, body, auth)))
+
+    async def _request_async(self, method: str, path: str, body: Optional[dict]=None, auth: bool=False,
+                             timeout: Optional[float]=None) -> httpx.Response:
+        """Как _request, но без блокировки цикла событий"""
+        return await self.limiter.call_async(method, path, lambda: self.transport.request(
+            method, path, timeout=timeout, **self._prepare(method, path, body, auth)))
 
 # Утилиты округления под спецификацию инструмента
 class Spec:
@@ -69,9 +103,17 @@ class Spec:
     def clamp_min(self, qty: float) -> float:
         return max(qty, self.min_size or 0.0)
 
+class _DryRunResponse:
+    """Ответ-заглушка DRY_RUN с интерфейсом httpx.Response"""
+    status_code = 200
+    text = "{}"
+
+    def json(self):
+        return {"data": {"dry_run": True}}
+
 class BitgetTrader:
     """
-    Исполнитель ордеров для BTCUSDT_UMCBL:
+    Исполнитель ордеров по одному контракту (по умолчанию BTCUSDT_UMCBL):
     - set_leverage
     - entry (limit/market)
     - stop (trigger/plan)
@@ -79,25 +121,65 @@ class BitgetTrader:
     - modify stop (to BE)
     - отмена
     Поддержка DRY_RUN: логируем, не вызываем API.
+    У каждого ордерного метода есть awaitable-версия с суффиксом _async
+    (общий httpx.AsyncClient) — её и вызываем из хендлеров asyncio.
+    Другие символы — for_symbol(): трейдер на тот же клиент со своей spec.
     """
-    def __init__(self, config: Optional[dict]=None):
+    def __init__(self, config: Optional[dict]=None, symbol: str = PRODUCT_SYMBOL):
         self.cfg = config or {}
+        self.symbol = product_symbol(symbol)
         self.http = BitgetHTTP()
         self.spec = None  # подтянем со спецификаций
+        self.submitter = LegSubmitter(ORDER_CONCURRENCY, ORDER_RATE_PER_SEC)
+        self._by_symbol: Dict[str, "BitgetTrader"] = {self.symbol: self}
+
+    def for_symbol(self, symbol: Optional[str]) -> "BitgetTrader":
+        """Трейдер для symbol (BTCUSDT или BTCUSDT_UMCBL): общие cfg/http/submitter, своя spec"""
+        if not symbol:
+            return self
+        key = product_symbol(symbol)
+        trader = self._by_symbol.get(key)
+        if trader is None:
+            trader = BitgetTrader.__new__(BitgetTrader)
+            trader.__dict__.update(self.__dict__)  # _by_symbol тоже общий
+            trader.symbol, trader.spec = key, None
+            self._by_symbol[key] = trader
+        return trader
 
     # ===== Публичка / спецификация =====
-    def fetch_contract_specs(self) -> Spec:
+    def fetch_contracts(self, product_type: str = PRODUCT_TYPE) -> List[dict]:
         """
+        Полный список контрактов productType (сотни КБ) — напрямую с биржи.
+        Обычно его берут через кэш market/contract_specs.py, а не отсюда.
         [Неподтверждено] Проверь актуальный эндпоинт спецификаций:
         /api/mix/v1/market/contracts?productType=umcbl
-        Ожидаем найти priceStep/quantityStep/minSize для BTCUSDT_UMCBL.
         """
         path = "/api/mix/v1/market/contracts"
-        r = self.http._request("GET", path, {"productType":"umcbl"}, auth=False)
+        return self._contracts_from_response(self.http._request("GET", path, {"productType": product_type}, auth=False))
+
+    async def fetch_contracts_async(self, product_type: str = PRODUCT_TYPE) -> List[dict]:
+        path = "/api/mix/v1/market/contracts"
+        r = await self.http._request_async("GET", path, {"productType": product_type}, auth=False)
+        return self._contracts_from_response(r)
+
+    @staticmethod
+    def _contracts_from_response(r) -> List[dict]:
         if r.status_code != 200:
             raise RuntimeError(f"Spec fetch error: {r.status_code} {r.text}")
-        data = r.json().get("data", [])
-        row = next((x for x in data if x.get("symbol")==PRODUCT_SYMBOL), None)
+        return r.json().get("data", [])
+
+    def fetch_contract_specs(self) -> Spec:
+        """
+        Spec для BTCUSDT_UMCBL из общего кэша (TTL, фоновое обновление, копия на диске).
+        Ожидаем найти priceStep/quantityStep/minSize для BTCUSDT_UMCBL.
+        """
+        return self._spec_from_row(contract_specs.get(self.symbol, PRODUCT_TYPE, self.fetch_contracts))
+
+    async def fetch_contract_specs_async(self) -> Spec:
+        row = await contract_specs.get_async(self.symbol, PRODUCT_TYPE, self.fetch_contracts_async)
+        return self._spec_from_row(row)
+
+    def _spec_from_row(self, row: Optional[dict]) -> Spec:
         if not row:
             # fallback шаги по умолчанию (безопасно для DRY_RUN)
             self.spec = Spec(price_step=0.5, size_step=0.001, min_size=0.001)
@@ -115,48 +197,70 @@ class BitgetTrader:
         self.spec = Spec(price_step=step, size_step=size_step, min_size=min_size)
         return self.spec
 
+    async def _ensure_spec_async(self) -> Spec:
+        if not self.spec:
+            await self.fetch_contract_specs_async()
+        return self.spec
+
     # ===== Приватка: общие вызовы =====
     def _post(self, path: str, body: dict) -> httpx.Response:
         if DRY_RUN:
             print(json.dumps({"DRY_RUN_POST": {"path": path, "body": body}}, ensure_ascii=False, indent=2))
-            class Dummy: status_code=200
-            Dummy.text="{}"
-            def json_(self): return {"data": {"dry_run": True}}
-            Dummy.json=json_
-            return Dummy
+            return _DryRunResponse()
         return self.http._request("POST", path, body, auth=True)
 
+    async def _post_async(self, path: str, body: dict) -> httpx.Response:
+        if DRY_RUN:
+            print(json.dumps({"DRY_RUN_POST": {"path": path, "body": body}}, ensure_ascii=False, indent=2))
+            return _DryRunResponse()
+        return await self.http._request_async("POST", path, body, auth=True)
+
+    @staticmethod
+    def _checked(r):
+        """Ответ не 200 — ошибка ноги (зависящие ноги не отправляются)"""
+        if r.status_code != 200:
+            raise RuntimeError(f"HTTP {r.status_code} {r.text}")
+        return r
+
     def _get(self, path: str, params: dict) -> httpx.Response:
         return self.http._request("GET", path, params, auth=True)
 
+    async def _get_async(self, path: str, params: dict) -> httpx.Response:
+        return await self.http._request_async("GET", path, params, auth=True)
+
     # ===== Управление плечом / режимом =====
-    def set_leverage(self, leverage: int):
+    def _leverage_request(self, leverage: int) -> Tuple[str, dict]:
         """
         [Неподтверждено] Проверь точный эндпоинт установки плеча для umcbl:
         /api/mix/v1/account/setLeverage
         """
         path = "/api/mix/v1/account/setLeverage"
         body = {
-            "symbol": PRODUCT_SYMBOL,
+            "symbol": self.symbol,
             "marginCoin": MARGIN_COIN,
             "leverage": str(leverage),
             "holdSide": "long_short"  # [Неподтверждено] обе стороны
         }
-        return self._post(path, body)
+        return path, body
+
+    def set_leverage(self, leverage: int):
+        return self._post(*self._leverage_request(leverage))
+
+    async def set_leverage_async(self, leverage: int):
+        return await self._post_async(*self._leverage_request(leverage))
 
     # ===== Ордеры входа =====
-    def place_entry_limit(self, side: str, price: float, qty: float):
+    def _entry_limit_request(self, side: str, price: float, qty: float) -> Tuple[str, dict]:
         """
         side: LONG|SHORT -> open_long/open_short
         [Неподтверждено] эндпоинт:
         /api/mix/v1/order/placeOrder
         """
-        if not self.spec: self.fetch_contract_specs()
         px = self.spec.round_price(price)
         sz = self.spec.clamp_min(self.spec.round_size(qty))
         path = "/api/mix/v1/order/placeOrder"
         body = {
-            "symbol": PRODUCT_SYMBOL,
+            "symbol": self.symbol,
             "marginCoin": MARGIN_COIN,
             "side": "open_long" if side=="LONG" else "open_short",
             "orderType": "limit",
@@ -164,23 +268,38 @@ class BitgetTrader:
             "size": str(sz),
             "timeInForceValue": "normal"  # [Неподтверждено]
         }
-        return self._post(path, body)
+        return path, body
 
-    def place_entry_market(self, side: str, qty: float):
+    def place_entry_limit(self, side: str, price: float, qty: float):
         if not self.spec: self.fetch_contract_specs()
+        return self._post(*self._entry_limit_request(side, price, qty))
+
+    async def place_entry_limit_async(self, side: str, price: float, qty: float):
+        await self._ensure_spec_async()
+        return await self._post_async(*self._entry_limit_request(side, price, qty))
+
+    def _entry_market_request(self, side: str, qty: float) -> Tuple[str, dict]:
         sz = self.spec.clamp_min(self.spec.round_size(qty))
         path = "/api/mix/v1/order/placeOrder"
         body = {
-            "symbol": PRODUCT_SYMBOL,
+            "symbol": self.symbol,
             "marginCoin": MARGIN_COIN,
             "side": "open_long" if side=="LONG" else "open_short",
             "orderType": "market",
             "size": str(sz)
         }
-        return self._post(path, body)
+        return path, body
+
+    def place_entry_market(self, side: str, qty: float):
+        if not self.spec: self.fetch_contract_specs()
+        return self._post(*self._entry_market_request(side, qty))
+
+    async def place_entry_market_async(self, side: str, qty: float):
+        await self._ensure_spec_async()
+        return await self._post_async(*self._entry_market_request(side, qty))
 
     # ===== Стоп / Триггер-ордера =====
-    def place_stop(self, side: str, stop_price: float, qty: float):
+    def _stop_request(self, side: str, stop_price: float, qty: float) -> Tuple[str, dict]:
         """
         План-ордер (trigger) на стоп:
         [Неподтверждено] /api/mix/v1/plan/placePlan
@@ -190,12 +309,11 @@ class BitgetTrader:
         Для стопа по открытой позиции сторона должна быть противонаправленной закрывающей:
         LONG -> close_long, SHORT -> close_short (Bitget формулировка может отличаться).
         """
-        if not self.spec: self.fetch_contract_specs()
         px = self.spec.round_price(stop_price)
         sz = self.spec.clamp_min(self.spec.round_size(qty))
         path = "/api/mix/v1/plan/placePlan"
         body = {
-            "symbol": PRODUCT_SYMBOL,
+            "symbol": self.symbol,
             "marginCoin": MARGIN_COIN,
             "triggerType": "market_price",
             "triggerPrice": str(px),
@@ -204,7 +322,15 @@ class BitgetTrader:
             "side": "close_long" if side=="LONG" else "close_short",  # закрывающая сторона
             "reduceOnly": "true"
         }
-        return self._post(path, body)
+        return path, body
+
+    def place_stop(self, side: str, stop_price: float, qty: float):
+        if not self.spec: self.fetch_contract_specs()
+        return self._post(*self._stop_request(side, stop_price, qty))
+
+    async def place_stop_async(self, side: str, stop_price: float, qty: float):
+        await self._ensure_spec_async()
+        return await self._post_async(*self._stop_request(side, stop_price, qty))
 
     def modify_stop(self, side: str, new_stop_price: float):
         """
@@ -219,20 +345,83 @@ class BitgetTrader:
         # (в бою — найди текущий stop planId и модифицируй или удали его)
         return self.place_stop(side, new_stop_price, qty=0)  # [Неподтверждено] qty здесь не нужен при modify; упростим
 
-    # ===== Тейк-профит (reduceOnly) =====
-    def place_take_profit(self, side: str, price: float, qty: float):
+    async def modify_stop_async(self, side: str, new_stop_price: float):
+        return await self.place_stop_async(side, new_stop_price, qty=0)
+
+    # ===== Закрытие позиции (стоп-лосс / тайм-стоп Watcher) =====
+    def _cancel_symbol_requests(self) -> List[Tuple[str, dict]]:
         """
-        Limit reduceOnly TP.
-        [Неподтверждено] либо обычный limit-ордер с reduceOnly,
-        либо план-ордер take-profit. Здесь используем обычный limit reduceOnly.
+        [Неподтверждено] отмена лимиток и план-ордеров только по своему контракту:
+        /api/mix/v1/order/cancel-symbol-orders, /api/mix/v1/plan/cancelSymbolPlan.
+        cancel-all-orders сняли бы стопы и TP всех остальных планов и символов
         """
-        if not self.spec: self.fetch_contract_specs()
-        px = self.spec.round_price(price)
+        body = {"symbol": self.symbol, "marginCoin": MARGIN_COIN}
+        return [("/api/mix/v1/order/cancel-symbol-orders", dict(body)),
+                ("/api/mix/v1/plan/cancelSymbolPlan", dict(body, planType="normal_plan"))]
+
+    def _position_request(self) -> Tuple[str, dict]:
+        """[Неподтверждено] открытая позиция по контракту: /api/mix/v1/position/singlePosition-v2"""
+        return "/api/mix/v1/position/singlePosition-v2", {"symbol": self.symbol, "marginCoin": MARGIN_COIN}
+
+    @staticmethod
+    def _position_size(r, side: str) -> float:
+        """Размер открытой позиции нужной стороны из ответа singlePosition-v2"""
+        if r.status_code != 200:
+            raise RuntimeError(f"Не удалось получить позицию: HTTP {r.status_code} {r.text}")
+        hold = "long" if side == "LONG" else "short"
+        for pos in r.json().get("data") or []:
+            if pos.get("holdSide") == hold:
+                return float(pos.get("total") or 0)
+        return 0.0
+
+    @staticmethod
+    def _require_close_qty(qty: float) -> float:
+        # без объёма не отменяем защиту: минимальный лот оставил бы позицию почти целиком открытой
+        if not qty or qty <= 0:
+            raise RuntimeError("Нет открытой позиции для закрытия — ордера не отменены")
+        return qty
+
+    def _close_market_request(self, side: str, qty: float) -> Tuple[str, dict]:
         sz = self.spec.clamp_min(self.spec.round_size(qty))
         path = "/api/mix/v1/order/placeOrder"
         body = {
-            "symbol": PRODUCT_SYMBOL,
+            "symbol": self.symbol,
             "marginCoin": MARGIN_COIN,
+            "side": "close_long" if side=="LONG" else "close_short",  # как у стопа
+            "orderType": "market",
+            "size": str(sz),
+            "reduceOnly": "true"
+        }
+        return path, body
+
+    def close_position(self, side: str, qty: Optional[float] = None) -> List[httpx.Response]:
+        """Отменить висящие TP/стопы контракта и закрыть остаток позиции по рынку.
+        qty не задан — берём живой размер позиции с биржи"""
+        if not self.spec: self.fetch_contract_specs()
+        if not qty:
+            qty = self._position_size(self._get(*self._position_request()), side)
+        qty = self._require_close_qty(qty)
+        responses = [self._post(path, body) for path, body in self._cancel_symbol_requests()]
+        responses.append(self._post(*self._close_market_request(side, qty)))
+        return responses
+
+    async def close_position_async(self, side: str, qty: Optional[float] = None) -> List[httpx.Response]:
+        await self._ensure_spec_async()
+        if not qty:
+            qty = self._position_size(await self._get_async(*self._position_request()), side)
+        qty = self._require_close_qty(qty)
+        # отмены независимы — параллельно; закрытие после них, чтобы TP не встретил пустую позицию
+        responses = list(await asyncio.gather(*(self._post_async(path, body)
+                                                for path, body in self._cancel_symbol_requests())))
+        responses.append(await self._post_async(*self._close_market_request(side, qty)))
+        return responses
+
+    # ===== Тейк-профит (reduceOnly) =====
+    def _take_profit_order(self, side: str, price: float, qty: float) -> dict:
+        """Заявка TP без symbol/marginCoin (общая для placeOrder и batch-orders)"""
+        px = self.spec.round_price(price)
+        sz = self.spec.clamp_min(self.spec.round_size(qty))
+        return {
             "side": "close_short" if side=="LONG" else "close_long",  # закрывающий
             "orderType": "limit",
             "price": str(px),
@@ -240,58 +429,180 @@ class BitgetTrader:
             "reduceOnly": "true",
             "timeInForceValue": "normal"
         }
-        return self._post(path, body)
+
+    def _take_profit_request(self, side: str, price: float, qty: float) -> Tuple[str, dict]:
+        """
+        Limit reduceOnly TP.
+        [Неподтверждено] либо обычный limit-ордер с reduceOnly,
+        либо план-ордер take-profit. Здесь используем обычный limit reduceOnly.
+        """
+        path = "/api/mix/v1/order/placeOrder"
+        body = {"symbol": self.symbol, "marginCoin": MARGIN_COIN, **self._take_profit_order(side, price, qty)}
+        return path, body
+
+    def place_take_profit(self, side: str, price: float, qty: float):
+        if not self.spec: self.fetch_contract_specs()
+        return self._post(*self._take_profit_request(side, price, qty))
+
+    async def place_take_profit_async(self, side: str, price: float, qty: float):
+        await self._ensure_spec_async()
+        return await self._post_async(*self._take_profit_request(side, price, qty))
+
+    # ===== Лестница TP одним batch-orders =====
+    def _take_profit_batch(self, side: str, levels: List[Tuple[float, float]]) -> List[dict]:
+        return [{**self._take_profit_order(side, price, qty), "clientOid": new_client_oid("tp")}
+                for price, qty in levels]
+
+    def _batch_payload(self, r, chunk: List[dict]) -> dict:
+        if DRY_RUN:
+            return dry_run_payload(chunk)
+        return self._checked(r).json()
+
+    def place_take_profits(self, side: str, levels: List[Tuple[float, float]], retries: int = 2) -> BatchOutcome:
+        """
+        Все TP [(цена, объём)] пачками batch-orders; повтор — только отклонённых.
+        Если что-то так и не принято — BatchOrderError (result = принятые clientOid -> orderId).
+        """
+        if not self.spec: self.fetch_contract_specs()
+        send = lambda chunk: self._batch_payload(
+            self._post(BATCH_ORDER_PATH, batch_body(self.symbol, MARGIN_COIN, chunk)), chunk)
+        outcome = submit_batches(send, self._take_profit_batch(side, levels), retries)
+        if not outcome.ok:
+            raise BatchOrderError(outcome, result=outcome.placed)
+        return outcome
+
+    async def place_take_profits_async(self, side: str, levels: List[Tuple[float, float]],
+                                       retries: int = 2) -> BatchOutcome:
+        await self._ensure_spec_async()
+
+        async def send(chunk):
+            r = await self._post_async(BATCH_ORDER_PATH, batch_body(self.symbol, MARGIN_COIN, chunk))
+            return self._batch_payload(r, chunk)
+
+        outcome = await submit_batches_async(send, self._take_profit_batch(side, levels), retries)
+        if not outcome.ok:
+            raise BatchOrderError(outcome, result=outcome.placed)
+        return outcome
 
     # ===== Высокоуровневый сценарий (используется из main.py) =====
+    def _trade_params(self, signal, context: Dict[str, Any]) -> Dict[str, Any]:
+        """Сторона, вход, стоп, тейки и объёмы из сигнала + контекста риска"""
+        parsed = as_parsed_signal(signal)
+        if parsed is not None:
+            # каноническая структура: числа уже нормализованы парсером
+            side = parsed.position_type
+            zone = parsed.entry_zone
+            stop = float(parsed.stop_loss)
+            tps: List[float] = list(parsed.take_profits)
+        else:
+            side = signal.position_type  # "LONG" | "SHORT"
+            zone = getattr(signal, "entry_zone", None) or [signal.entry_price, signal.entry_price]
+            stop = float(signal.stop_loss or 0.0)
+            tps = list(getattr(signal, "take_profits", []) or [])
+        # нормализация заполняет пропуски нулями — по цене 0 ордера не ставим (как Executor.plan_from_signal)
+        if not all(zone) or stop <= 0:
+            raise ValueError("Невалидные цены входа или стоп-лосса")
+        symbol = getattr(parsed if parsed is not None else signal, "symbol", None) or self.symbol
+        entry = round((float(zone[0]) + float(zone[1]))/2, 2)
+        if not tps:
+            tps = [entry + 100.0] if side=="LONG" else [entry - 100.0]
+
+        # qty_total должен быть рассчитан ранее (risk sizing).
+        # В этой функции используем упрощённо: прочитаем из context (подсунь из Executor).
+        qty_total = float(context.get("qty_total", 0.0))
+        tp_shares: List[float] = list(context.get("tp_shares", []))
+        leverage = int(context.get("leverage_min", 10))
+
+        if qty_total <= 0:
+            # если нет qty_total в контексте — минималка для безопасной проверки API
+            qty_total = 0.001
+        return {"symbol": product_symbol(symbol), "side": side, "entry": entry, "stop": stop, "tps": tps,
+                "qty_total": qty_total, "tp_shares": tp_shares, "leverage": leverage}
+
+    @staticmethod
+    def _trade_result(p: Dict[str, Any], report) -> Optional[Dict[str, Any]]:
+        """ok=False — вход стоит, но часть стопа/тейков не выставилась (см. legs)"""
+        if not report.get("entry").ok:
+            return None  # позиции нет — нечего защищать
+        summary = report.as_dict()
+        return {"ok": summary["ok"], "entry": p["entry"], "stop": p["stop"], "tps": p["tps"],
+                "qty_total": p["qty_total"], "leverage": p["leverage"],
+                "legs": summary["legs"], "elapsed_ms": summary["elapsed_ms"]}
+
+    @staticmethod
+    def _tp_sizes(p: Dict[str, Any]) -> List[Tuple[float, float]]:
+        return [(tp, p["qty_total"]*share) for tp, share in zip(p["tps"], p["tp_shares"] or [1.0]) if share > 0]
+
     def execute_trade(self, signal, context: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """
-        Принимает распарсенный сигнал + контекст риска.
-        Сценарий:
+        Принимает распарсенный сигнал (TradingSignal с .parsed, ParsedSignal
+        или объект с position_type/entry_zone/stop_loss) + контекст риска.
+        Сценарий (trader/submitter.py):
         - set_leverage
         - entry limit (в середину зоны) на суммарный qty
-        - поставить TP (reduceOnly) по долям
-        - поставить Stop (trigger)
-        Возвращает dict с кратким планом.
+        - Stop (trigger) и TP (reduceOnly) по долям — параллельно;
+          TP одним batch-orders (BITGET_BATCH_TP=false — по одному placeOrder)
+        Возвращает dict с кратким планом и ногами (legs: статус и тайминги)
+        или None, если вход не размещён.
         """
         try:
-            side = signal.position_type  # "LONG" | "SHORT"
-            zone = getattr(signal, "entry_zone", None) or [signal.entry_price, signal.entry_price]
-            entry = round((float(zone[0]) + float(zone[1]))/2, 2)
-            stop = float(signal.stop_loss)
-            tps: List[float] = list(getattr(signal, "take_profits", []) or [])
-            if not tps:
-                tps = [entry + 100.0] if side=="LONG" else [entry - 100.0]
-
-            # qty_total должен быть рассчитан ранее (risk sizing).
-            # В этой функции используем упрощённо: прочитаем из context (подсунь из Executor).
-            qty_total = float(context.get("qty_total", 0.0))
-            tp_shares: List[float] = list(context.get("tp_shares", []))
-            leverage = int(context.get("leverage_min", 10))
-
-            if qty_total <= 0:
-                # если нет qty_total в контексте — минималка для безопасной проверки API
-                qty_total = 0.001
-
-            # Плечо
-            self.set_leverage(leverage)
-
-            # Вход (лимит)
-            self.place_entry_limit(side, entry, qty_total)
-
-            # Стоп
-            self.place_stop(side, stop, qty_total)
-
-            # Тейки
-            for tp, share in zip(tps, tp_shares or [1.0]):
-                if share <= 0: 
-                    continue
-                self.place_take_profit(side, tp, qty_total*share)
-
-            return {"ok": True, "entry": entry, "stop": stop, "tps": tps, "qty_total": qty_total, "leverage": leverage}
+            p = self._trade_params(signal, context)
+            if p["symbol"] != self.symbol:
+                return self.for_symbol(p["symbol"]).execute_trade(signal, context)
+            side, qty_total = p["side"], p["qty_total"]
+            if not self.spec: self.fetch_contract_specs()  # до веера: потоки не должны гоняться за spec
+            levels = self._tp_sizes(p)
+            if BATCH_TAKE_PROFITS and levels:
+                tps, tp_batch = [], lambda: self.place_take_profits(side, levels)
+            else:
+                tps = [lambda tp=tp, qty=qty: self._checked(self.place_take_profit(side, tp, qty))
+                       for tp, qty in levels]
+                tp_batch = None
+            legs = order_legs(
+                leverage=lambda: self._checked(self.set_leverage(p["leverage"])),
+                leverage_optional=True,  # как в Executor: отказ плеча не отменяет сделку
+                entry=lambda: self._checked(self.place_entry_limit(side, p["entry"], qty_total)),
+                stop=lambda: self._checked(self.place_stop(side, p["stop"], qty_total)),
+                take_profits=tps,
+                take_profit_batch=tp_batch,
+            )
+            return self._trade_result(p, self.submitter.run_sync(legs))
         except Exception as e:
             print(f"[BitgetTrader.execute_trade] error: {e}")
             return None
 
+    async def execute_trade_async(self, signal, context: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """execute_trade без блокировки цикла событий (тот же сценарий и результат)"""
+        try:
+            p = self._trade_params(signal, context)
+            if p["symbol"] != self.symbol:
+                return await self.for_symbol(p["symbol"]).execute_trade_async(signal, context)
+            side, qty_total = p["side"], p["qty_total"]
+            await self._ensure_spec_async()
+
+            async def post(coro):
+                return self._checked(await coro)
+
+            levels = self._tp_sizes(p)
+            if BATCH_TAKE_PROFITS and levels:
+                tps, tp_batch = [], lambda: self.place_take_profits_async(side, levels)
+            else:
+                tps = [lambda tp=tp, qty=qty: post(self.place_take_profit_async(side, tp, qty))
+                       for tp, qty in levels]
+                tp_batch = None
+            legs = order_legs(
+                leverage=lambda: post(self.set_leverage_async(p["leverage"])),
+                leverage_optional=True,  # как в Executor: отказ плеча не отменяет сделку
+                entry=lambda: post(self.place_entry_limit_async(side, p["entry"], qty_total)),
+                stop=lambda: post(self.place_stop_async(side, p["stop"], qty_total)),
+                take_profits=tps,
+                take_profit_batch=tp_batch,
+            )
+            return self._trade_result(p, await self.submitter.run(legs))
+        except Exception as e:
+            print(f"[BitgetTrader.execute_trade_async] error: {e}")
+            return None
+
 def load_bitget_config() -> Optional[Dict[str, str]]:
     """Загрузка конфигурации Bitget из переменных окружения"""
     if not all([BITGET_API_KEY, BITGET_API_SECRET, BITGET_PASSPHRASE]):
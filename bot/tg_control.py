@@ -187,10 +187,17 @@ async def start_control_bot(settings=None):
             return
         # Мини-версия: читаем размер demo_trades.json
         trades = _load_demo_trades()
+        from market.rate_limit import bitget_limiter
+        rest = "\n".join(
+            f"  {cls}: {m['requests']} запр., очередь {m['avg_queued_ms']:.0f}/{m['max_queued_ms']:.0f} мс, "
+            f"провод {m['avg_wire_ms']:.0f}/{m['max_wire_ms']:.0f} мс, 429: {m['throttled']}, {m['breaker']}"
+            for cls, m in bitget_limiter.metrics().items() if m['requests'] or m['breaker'] != 'closed'
+        )
         await message.answer(
             "📊 Статистика (демо):\n"
             f"Всего записей в истории: <b>{len(trades)}</b>\n"
             f"DRY_RUN: <b>{'ON' if _state['DRY_RUN'] else 'OFF'}</b>"
+            + (f"\nBitget REST (сред./макс.):\n{rest}" if rest else "")
         )
 
     @dp.message(Command("dryrun_on"))
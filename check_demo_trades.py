@@ -8,6 +8,8 @@
 import json
 import os
 
+from storage.journal import read_history
+
 def check_demo_trades():
     """Проверяет демо-сделки"""
     print("🔍 ПРОВЕРКА ДЕМО-СДЕЛОК")
@@ -15,8 +17,7 @@ def check_demo_trades():
     
     # Проверяем файл с сигналами
     if os.path.exists('signals_history.json'):
-        with open('signals_history.json', 'r', encoding='utf-8') as file:
-            signals = json.load(file)
+        signals = list(read_history('signals_history.json'))
         print(f"📊 Найдено сигналов: {len(signals)}")
         
         if signals:
@@ -1,6 +1,6 @@
 import os
-from typing import Optional
-from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+from dataclasses import dataclass, field
 from dotenv import load_dotenv
 
 # Загружаем .env файл
@@ -23,7 +23,8 @@ class BitgetConfig:
     passphrase: str
     base_url: str
     market: str
-    symbol: str
+    symbol: str                                   # символ по умолчанию
+    symbols: Tuple[str, ...] = ()                 # разрешённые к торговле (SYMBOLS), symbol — всегда среди них
 
 @dataclass
 class RiskConfig:
@@ -36,6 +37,11 @@ class RiskConfig:
     leverage_max: int
     breakeven_after_tp: int
     time_stop_min: int
+    # доля поддепозита (%) под символ; нет в словаре — 100
+    symbol_budget_pct: Dict[str, float] = field(default_factory=dict)
+
+    def budget_pct(self, symbol: str) -> float:
+        return self.symbol_budget_pct.get(symbol.upper(), 100.0)
 
 @dataclass
 class BehaviorConfig:
@@ -63,15 +69,28 @@ class Settings:
         )
 
     def _load_bitget_config(self) -> BitgetConfig:
+        symbol = (os.getenv('SYMBOL') or 'BTCUSDT').upper()
+        symbols = [s.strip().upper() for s in (os.getenv('SYMBOLS') or '').split(',') if s.strip()]
         return BitgetConfig(
             api_key=os.getenv('BITGET_API_KEY', ''),
             api_secret=os.getenv('BITGET_API_SECRET', ''),
             passphrase=os.getenv('BITGET_PASSPHRASE', ''),
             base_url=os.getenv('BITGET_BASE', 'https://api.bitget.com'),
             market=os.getenv('MARKET', 'umcbl'),
-            symbol=os.getenv('SYMBOL', 'BTCUSDT')
+            symbol=symbol,
+            symbols=tuple(dict.fromkeys([symbol] + symbols))
         )
 
+    @staticmethod
+    def _parse_budgets(raw: str) -> Dict[str, float]:
+        """"ETHUSDT:50,SOLUSDT:25" -> {'ETHUSDT': 50.0, 'SOLUSDT': 25.0}"""
+        budgets = {}
+        for item in raw.split(','):
+            if ':' in item:
+                symbol, pct = item.split(':', 1)
+                budgets[symbol.strip().upper()] = float(pct)
+        return budgets
+
     def _load_risk_config(self) -> RiskConfig:
         return RiskConfig(
             equity_usdt=float(os.getenv('EQUITY_USDT', '1000')),
@@ -82,7 +101,8 @@ class Settings:
             leverage_min=int(os.getenv('LEVERAGE_MIN', '10')),
             leverage_max=int(os.getenv('LEVERAGE_MAX', '25')),
             breakeven_after_tp=int(os.getenv('BREAKEVEN_AFTER_TP', '2')),
-            time_stop_min=int(os.getenv('TIME_STOP_MIN', '240'))
+            time_stop_min=int(os.getenv('TIME_STOP_MIN', '240')),
+            symbol_budget_pct=self._parse_budgets(os.getenv('SYMBOL_BUDGET_PCT') or '')
         )
 
     def _load_behavior_config(self) -> BehaviorConfig:
@@ -126,9 +146,26 @@ class Settings:
             errors.append("Риски должны быть положительными")
         if self.risk.leverage_min > self.risk.leverage_max:
             errors.append("LEVERAGE_MIN не может быть больше LEVERAGE_MAX")
+        if any(not 0 <= pct <= 100 for pct in self.risk.symbol_budget_pct.values()):
+            errors.append("SYMBOL_BUDGET_PCT: доли должны быть от 0 до 100")
 
         if errors:
             raise ValueError(f"Ошибки конфигурации: {'; '.join(errors)}")
 
-# Глобальный экземпляр настроек
-settings = Settings()
+# Глобальный экземпляр настроек: строится (и валидируется) при первом обращении,
+# а не при импорте — офлайн-скрипты и тесты не падают на пустом .env
+_settings: Optional[Settings] = None
+
+
+def get_settings() -> Settings:
+    global _settings
+    if _settings is None:
+        _settings = Settings()
+    return _settings
+
+
+def __getattr__(name: str):
+    # from config.settings import settings — по-прежнему работает
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""Core: catch-up of messages missed while the user-bot was offline.
+
+Only events.NewMessage is consumed live, so whatever a channel posts while
+the client is disconnected or restarting would be lost. CatchUp remembers
+the last message id seen per channel (LastSeen, a small JSON file written
+off the event loop at most every CATCHUP_FLUSH_SEC and at shutdown) and, on
+start and after every reconnect, pulls the gap with
+`iter_messages(min_id=last, reverse=True)` — Telethon fetches it in batches
+of 100 — and feeds the messages, oldest first, into the same pipeline as
+live events.
+
+- First run for a channel (no id stored): only the current last id is
+  recorded, history is not replayed.
+- Live handlers wait on `ready` while a catch-up runs, so a channel's gap
+  is enqueued before its newer live messages.
+- Replayed messages may be hours old: is_stale() flags a signal older than
+  SIGNAL_MAX_AGE_MIN, and the execute stage skips it (it is still parsed
+  and stored in the history). Duplicates are dropped by the history dedupe.
+"""
+import asyncio
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+log = logging.getLogger("core.catch_up")
+
+CATCHUP_STATE_PATH = os.getenv('CATCHUP_STATE_PATH') or 'data/last_seen.json'
+CATCHUP_LIMIT = int(os.getenv('CATCHUP_LIMIT') or 500)                 # max messages per channel per gap
+SIGNAL_MAX_AGE_MIN = float(os.getenv('SIGNAL_MAX_AGE_MIN') or 30)     # older signals are not executed
+CATCHUP_FLUSH_SEC = float(os.getenv('CATCHUP_FLUSH_SEC') or 2)          # debounce of the state file writes
+
+
+def is_stale(date: Optional[datetime], max_age_min: float = SIGNAL_MAX_AGE_MIN,
+             now: Optional[datetime] = None) -> bool:
+    if date is None or max_age_min <= 0:
+        return False
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    now = now or datetime.now(timezone.utc)
+    return (now - date).total_seconds() > max_age_min * 60
+
+
+class LastSeen:
+    """Last processed message id per channel (peer id).
+
+    mark() only updates memory; inside an event loop the file is rewritten
+    in a worker thread CATCHUP_FLUSH_SEC after the first unsaved mark, and
+    flush() writes whatever is left at shutdown. Outside a loop (scripts,
+    tests) a mark is written at once.
+    """
+
+    def __init__(self, path: Optional[str] = CATCHUP_STATE_PATH, flush_sec: float = CATCHUP_FLUSH_SEC):
+        self.path = path
+        self.flush_sec = flush_sec
+        self._ids: Dict[int, int] = {}
+        self._dirty = False
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._write_lock = threading.Lock()
+        if path and os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self._ids = {int(k): int(v) for k, v in json.load(f).get('last_seen', {}).items()}
+            except (OSError, ValueError) as e:
+                log.warning('Cannot read catch-up state %s: %s', path, e)
+
+    def get(self, peer_id: int) -> Optional[int]:
+        return self._ids.get(peer_id)
+
+    def mark(self, peer_id: int, message_id: int) -> None:
+        if message_id <= self._ids.get(peer_id, 0):
+            return
+        self._ids[peer_id] = message_id
+        self._dirty = True
+        self._schedule()
+
+    def _schedule(self) -> None:
+        if self._timer is not None or not self.path:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+        self._timer = loop.call_later(self.flush_sec, lambda: loop.create_task(self._flush_async()))
+
+    async def _flush_async(self) -> None:
+        self._timer = None
+        if self._dirty:
+            self._dirty = False
+            await asyncio.to_thread(self._write, dict(self._ids))
+
+    def flush(self) -> None:
+        """Write pending marks now (shutdown)"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._dirty:
+            self._dirty = False
+            self._write(dict(self._ids))
+
+    def _write(self, ids: Dict[int, int]) -> None:
+        """Atomic write: tmp + os.replace"""
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with self._write_lock:
+            try:
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    json.dump({'version': 1, 'last_seen': {str(k): v for k, v in ids.items()}}, f)
+                os.replace(tmp, self.path)
+            except OSError as e:
+                log.warning('Cannot save catch-up state %s: %s', self.path, e)
+
+
+@dataclass
+class HistoryEvent:
+    """A fetched message shaped like the NewMessage events the pipeline reads"""
+    message: Any
+    chat_id: int
+    entity: Any = None
+    catch_up: bool = True
+
+    async def get_chat(self):
+        return self.entity
+
+
+class CatchUp:
+    def __init__(self, client, channels, put: Callable[..., Awaitable[None]],
+                 state: Optional[LastSeen] = None, limit: int = CATCHUP_LIMIT):
+        self.client = client
+        self.channels = channels           # core.channel_cache.ChannelCache
+        self.put = put                     # Pipeline.put(event, key=...)
+        self.state = state if state is not None else LastSeen()
+        self.limit = limit
+        self.ready = asyncio.Event()
+        self.replayed = 0
+
+    def mark(self, chat_id: int, message_id: int) -> None:
+        self.state.mark(chat_id, message_id)
+
+    def flush(self) -> None:
+        self.state.flush()
+
+    async def run_once(self) -> int:
+        """Enqueue every channel's gap, oldest first; returns how many messages"""
+        self.ready.clear()
+        fed = 0
+        try:
+            for info in self.channels:
+                peer = info.entity if info.entity is not None else info.peer_id
+                last = self.state.get(info.peer_id)
+                try:
+                    if last is None:
+                        latest = await self.client.get_messages(peer, limit=1)
+                        if latest:
+                            self.mark(info.peer_id, latest[0].id)
+                        continue
+                    async for message in self.client.iter_messages(peer, min_id=last, reverse=True, limit=self.limit):
+                        await self.put(HistoryEvent(message, info.peer_id, info.entity), key=info.peer_id)
+                        fed += 1
+                except Exception as e:
+                    log.warning('Catch-up failed for %s: %s', info.title, e)
+            if fed:
+                log.info('Catch-up: %d missed messages queued', fed)
+            self.replayed += fed
+            return fed
+        finally:
+            self.ready.set()
+
+    async def watch(self, interval: float = 5.0) -> None:
+        """Catch up now and again after each reconnect of the client"""
+        await self.run_once()
+        was_connected = True
+        while True:
+            await asyncio.sleep(interval)
+            connected = self.client.is_connected()
+            if connected and not was_connected:
+                log.info('Client reconnected — catching up')
+                await self.run_once()
+            was_connected = connected
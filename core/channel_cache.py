@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Core: watched-channel cache keyed by peer id.
+
+Filled once when the source channels are resolved. A message is then
+classified from `event.chat_id` (the marked peer id, e.g. -100123...) with a
+dict lookup instead of an `event.get_chat()` round trip per message.
+
+Entries change only on service events (see on_chat_action):
+- title edit -> the cached title is replaced;
+- group -> supergroup migration -> the entry moves to the new peer id,
+  keeping its source.
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, Optional
+
+from telethon import utils
+from telethon.tl.types import MessageActionChannelMigrateFrom, MessageActionChatMigrateTo, PeerChannel, PeerChat
+
+
+@dataclass
+class ChannelInfo:
+    peer_id: int     # marked id, same as event.chat_id
+    title: str
+    source: str      # SCALPING | INTRADAY
+    entity: Any = None
+
+    @property
+    def id(self) -> int:
+        """Bare channel id (channel.id), as stored in the signal history"""
+        return utils.resolve_id(self.peer_id)[0]
+
+
+class ChannelCache:
+    def __init__(self):
+        self._by_peer: Dict[int, ChannelInfo] = {}
+
+    def __contains__(self, peer_id) -> bool:
+        return peer_id in self._by_peer
+
+    def __len__(self) -> int:
+        return len(self._by_peer)
+
+    def __iter__(self) -> Iterator[ChannelInfo]:
+        return iter(list(self._by_peer.values()))
+
+    def add(self, entity, source: str) -> ChannelInfo:
+        info = ChannelInfo(utils.get_peer_id(entity), getattr(entity, 'title', None) or str(entity.id), source, entity)
+        self._by_peer[info.peer_id] = info
+        return info
+
+    def get(self, peer_id) -> Optional[ChannelInfo]:
+        return self._by_peer.get(peer_id)
+
+    def watches(self, event) -> bool:
+        """events.NewMessage(func=...) filter: follows renames and migrations"""
+        return event.chat_id in self._by_peer
+
+    def rename(self, peer_id, title: str) -> bool:
+        info = self._by_peer.get(peer_id)
+        if info is None or not title:
+            return False
+        info.title = title
+        return True
+
+    def migrate(self, old_peer_id, new_peer_id, entity=None) -> Optional[ChannelInfo]:
+        info = self._by_peer.pop(old_peer_id, None)
+        if info is None:
+            return None
+        info.peer_id = new_peer_id
+        if entity is not None:
+            info.entity = entity
+        self._by_peer[new_peer_id] = info
+        return info
+
+    def on_chat_action(self, event) -> None:
+        """events.ChatAction handler: the only place cached entries are refreshed"""
+        if getattr(event, 'new_title', None):
+            self.rename(event.chat_id, event.new_title)
+        action = getattr(getattr(event, 'action_message', None), 'action', None)
+        if isinstance(action, MessageActionChatMigrateTo):
+            self.migrate(event.chat_id, utils.get_peer_id(PeerChannel(action.channel_id)))
+        elif isinstance(action, MessageActionChannelMigrateFrom):
+            self.migrate(utils.get_peer_id(PeerChat(action.chat_id)), event.chat_id)
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""Core: source-channel resolution with a persisted cache.
+
+Resolving a channel by title means walking `client.iter_dialogs()`, which
+takes tens of seconds on accounts with thousands of dialogs. The resolver
+stores what it found as (id, access_hash, title) in a JSON file and on the
+next start:
+
+1. validates every cached entry with ONE channels.GetChannels call (a
+   channel we were kicked from comes back as ChannelForbidden -> miss);
+2. tries invite links / usernames with get_entity for the misses;
+3. matches all names still missing in a single iter_dialogs pass, stopping
+   as soon as every name has a match. Names already scanned in this process
+   (found or not) are not scanned again, so the dialog list is walked at
+   most once per boot even with several resolvers (bot, check_systems).
+
+Entries are keyed by the (link, name) pair from the config, so changing
+TG_SOURCE_*_LINK / *_NAME naturally invalidates the old entry.
+"""
+import json
+import logging
+import os
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from telethon.tl.functions.channels import GetChannelsRequest
+from telethon.tl.types import Channel, InputChannel
+
+log = logging.getLogger("core.channel_resolver")
+
+CHANNEL_CACHE_PATH = os.getenv('CHANNEL_CACHE_PATH') or 'data/channels.json'
+
+# lowercased name -> Channel (or None) from this process's dialog scan
+_SCANNED: Dict[str, Optional[Channel]] = {}
+
+
+def cache_key(link: Optional[str], name: Optional[str]) -> str:
+    return f"{link or ''}|{(name or '').strip().lower()}"
+
+
+class ChannelResolver:
+    def __init__(self, client, path: Optional[str] = CHANNEL_CACHE_PATH):
+        self.client = client
+        self.path = path
+        self.dialog_scans = 0
+        self._entries: Dict[str, Dict[str, Any]] = self._load()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if not self.path or not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return dict(json.load(f).get('channels', {}))
+        except (OSError, ValueError) as e:
+            log.warning('Cannot read channel cache %s: %s', self.path, e)
+            return {}
+
+    def save(self) -> None:
+        """Atomic write: tmp + os.replace"""
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({'version': 1, 'channels': self._entries}, f, ensure_ascii=False, indent=2)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            log.warning('Cannot save channel cache %s: %s', self.path, e)
+
+    def _remember(self, key: str, channel: Channel) -> bool:
+        entry = {'id': channel.id, 'access_hash': channel.access_hash, 'title': getattr(channel, 'title', '')}
+        if self._entries.get(key) == entry:
+            return False
+        self._entries[key] = entry
+        return True
+
+    async def _validate(self, keys: Iterable[str]) -> Dict[str, Channel]:
+        """All cached entries in one GetChannels call; invalid ones are dropped"""
+        cached = {key: self._entries[key] for key in set(keys) if key in self._entries}
+        if not cached:
+            return {}
+        try:
+            result = await self.client(GetChannelsRequest(
+                [InputChannel(entry['id'], entry['access_hash']) for entry in cached.values()]))
+        except Exception as e:
+            log.warning('Cached channels failed validation: %s', e)
+            return {}
+        by_id = {chat.id: chat for chat in result.chats if isinstance(chat, Channel)}
+        found = {}
+        for key, entry in cached.items():
+            channel = by_id.get(entry['id'])
+            if channel is None:
+                self._entries.pop(key, None)
+            else:
+                found[key] = channel
+        return found
+
+    async def _by_link(self, link: str) -> Optional[Channel]:
+        try:
+            entity = await self.client.get_entity(link)
+            if isinstance(entity, Channel):
+                return entity
+        except Exception as e:
+            log.warning('Cannot resolve by link %s: %s', link, e)
+        return None
+
+    async def _scan_dialogs(self, names: Iterable[str]) -> Dict[str, Optional[Channel]]:
+        """One iter_dialogs pass for every name not scanned yet in this process"""
+        names = {name.strip().lower() for name in names}
+        pending = names - set(_SCANNED)
+        if pending:
+            self.dialog_scans += 1
+            async for dialog in self.client.iter_dialogs():
+                if not isinstance(dialog.entity, Channel):
+                    continue
+                title = (dialog.name or '').lower()
+                for name in [n for n in pending if n in title]:
+                    _SCANNED[name] = dialog.entity
+                    pending.discard(name)
+                if not pending:
+                    break
+            for name in pending:
+                _SCANNED[name] = None
+        return {name: _SCANNED.get(name) for name in names}
+
+    async def resolve_many(self, wanted: Dict[str, Tuple[Optional[str], Optional[str]]]) -> Dict[str, Optional[Channel]]:
+        """{label: (link, name)} -> {label: Channel or None}"""
+        keys = {label: cache_key(link, name) for label, (link, name) in wanted.items()}
+        found = await self._validate(keys.values())
+        result: Dict[str, Optional[Channel]] = {}
+        by_name: Dict[str, str] = {}
+        for label, (link, name) in wanted.items():
+            channel = found.get(keys[label])
+            if channel is None and link:
+                channel = await self._by_link(link)
+            if channel is None and name:
+                by_name[label] = name
+            result[label] = channel
+        if by_name:
+            matches = await self._scan_dialogs(by_name.values())
+            for label, name in by_name.items():
+                result[label] = matches.get(name.strip().lower())
+        changed = False
+        for label, channel in result.items():
+            if channel is not None:
+                changed |= self._remember(keys[label], channel)
+        if changed:
+            self.save()
+        return result
+
+    async def resolve(self, link: Optional[str], name: Optional[str]) -> Optional[Channel]:
+        return (await self.resolve_many({'channel': (link, name)}))['channel']
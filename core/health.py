@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""Core: startup health checks run concurrently, each under its own timeout.
+
+run_checks({'bitget': check_bitget, ...}) starts every check at once, so a
+cold start waits for the slowest check instead of the sum of all of them.
+A check is an async callable returning a truthy value on success; an
+exception or a timeout marks only that check as failed.
+"""
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+log = logging.getLogger("core.health")
+
+CHECK_TIMEOUT_SEC = float(os.getenv('CHECK_TIMEOUT_SEC') or 15)
+
+
+@dataclass
+class CheckResult:
+    name: str
+    ok: bool
+    elapsed: float
+    error: Optional[str] = None
+
+
+async def _run(name: str, check: Callable[[], Awaitable[Any]], timeout: float) -> CheckResult:
+    started = time.monotonic()
+    try:
+        ok = bool(await asyncio.wait_for(check(), timeout))
+        return CheckResult(name, ok, time.monotonic() - started)
+    except asyncio.TimeoutError:
+        error = f'timeout after {timeout:g}s'
+    except Exception as e:
+        error = repr(e)
+    log.warning('Health check %s failed: %s', name, error)
+    return CheckResult(name, False, time.monotonic() - started, error)
+
+
+async def run_checks(checks: Dict[str, Callable[[], Awaitable[Any]]], timeout: float = CHECK_TIMEOUT_SEC,
+                     timeouts: Optional[Dict[str, float]] = None) -> Dict[str, CheckResult]:
+    """All checks concurrently; timeouts overrides the timeout per check name"""
+    timeouts = timeouts or {}
+    results = await asyncio.gather(*(_run(name, check, timeouts.get(name, timeout))
+                                     for name, check in checks.items()))
+    return {result.name: result for result in results}
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""Core: bounded asyncio pipeline between the Telethon handler and execution.
+
+The NewMessage handler only enqueues the event; the work runs in stages
+(ingest -> parse -> persist -> execute), each with its own worker count and
+bounded per-worker queues:
+
+- backpressure: a full stage blocks the previous one and, in the end,
+  Pipeline.put() in the handler — memory stays bounded under a burst;
+- per-key ordering: items with the same key (channel id) always go to the
+  same worker of every stage, so a channel's messages are handled in
+  arrival order; keys are pinned to workers round-robin on first sight, so
+  up to `workers` channels never share a worker;
+- a stage returns the payload for the next stage, or None to drop the
+  item; an exception is logged and drops only that item;
+- on_settled(key, origin) fires once per item with the payload originally
+  given to put(), when a stage drops the item or the `settle_after` stage
+  has handled it (not on an exception). This is the point where nothing is
+  lost if the process dies, e.g. for catch-up bookkeeping. A dropped item
+  travels on as a marker up to that stage, so items of one key settle in
+  arrival order.
+
+A slow order submission therefore holds only its own channel's execute
+worker: reading and parsing the next messages keeps going.
+"""
+import asyncio
+import inspect
+import itertools
+import logging
+import os
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence
+
+log = logging.getLogger("core.pipeline")
+
+# "ingest=1,parse=1,persist=1,execute=2"; missing stages keep their defaults
+PIPELINE_WORKERS = os.getenv('PIPELINE_WORKERS') or ''
+PIPELINE_QUEUE_SIZE = int(os.getenv('PIPELINE_QUEUE_SIZE') or 64)
+
+DEFAULT_WORKERS = {'ingest': 1, 'parse': 1, 'persist': 1, 'execute': 2}
+
+_DROPPED = object()  # a dropped item on its way to the settle stage
+
+
+def parse_workers(raw: str, defaults: Optional[Dict[str, int]] = None) -> Dict[str, int]:
+    """'parse=2,execute=4' -> {'ingest': 1, 'parse': 2, 'persist': 1, 'execute': 4}"""
+    workers = dict(DEFAULT_WORKERS if defaults is None else defaults)
+    for part in raw.split(','):
+        name, _, value = part.partition('=')
+        if name.strip() and value.strip():
+            workers[name.strip().lower()] = max(1, int(value))
+    return workers
+
+
+@dataclass
+class Stage:
+    name: str
+    handler: Callable[[Any], Any]   # payload -> next payload or None; sync or async
+    workers: int = 1
+    maxsize: int = PIPELINE_QUEUE_SIZE  # per worker queue
+    processed: int = 0
+    dropped: int = 0
+    failed: int = 0
+
+
+class Pipeline:
+    """Stages connected by bounded queues, ordered per key"""
+
+    def __init__(self, stages: Sequence[Stage], on_settled: Optional[Callable[[Any, Any], None]] = None,
+                 settle_after: Optional[str] = None):
+        if not stages:
+            raise ValueError('Pipeline needs at least one stage')
+        self.stages = list(stages)
+        self.on_settled = on_settled
+        names = [stage.name for stage in self.stages]
+        self._settle_index = names.index(settle_after) if settle_after else len(names) - 1
+        self._queues: List[List[asyncio.Queue]] = []
+        self._affinity: List[Dict[Hashable, int]] = [{} for _ in self.stages]
+        self._round_robin = itertools.count()
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def start(self) -> None:
+        """Spawn the workers (needs a running event loop)"""
+        if self._tasks:
+            return
+        self._queues = [[asyncio.Queue(stage.maxsize) for _ in range(max(1, stage.workers))]
+                        for stage in self.stages]
+        for index, stage in enumerate(self.stages):
+            for n, queue in enumerate(self._queues[index]):
+                self._tasks.append(asyncio.create_task(self._worker(index, queue), name=f'pipeline-{stage.name}-{n}'))
+
+    def _queue_for(self, index: int, key: Optional[Hashable]) -> asyncio.Queue:
+        queues = self._queues[index]
+        if key is None:
+            return queues[next(self._round_robin) % len(queues)]  # no ordering asked for
+        affinity = self._affinity[index]
+        if key not in affinity:
+            affinity[key] = len(affinity) % len(queues)
+        return queues[affinity[key]]
+
+    async def put(self, payload: Any, key: Optional[Hashable] = None) -> None:
+        """Enqueue into the first stage; waits while it is full (backpressure)"""
+        if not self._tasks:
+            self.start()
+        await self._queue_for(0, key).put((key, payload, payload))
+
+    async def _worker(self, index: int, queue: asyncio.Queue) -> None:
+        stage = self.stages[index]
+        last = index == len(self.stages) - 1
+        while True:
+            key, origin, payload = await queue.get()
+            try:
+                if payload is _DROPPED:
+                    result = None
+                else:
+                    result = stage.handler(payload)
+                    if inspect.isawaitable(result):
+                        result = await result
+                    stage.processed += 1
+                    if result is None:
+                        stage.dropped += not last
+                settling = self.on_settled is not None and index <= self._settle_index
+                if settling and index == self._settle_index:
+                    self.on_settled(key, origin)
+                elif settling and result is None:
+                    result = _DROPPED  # keeps its place in the key's order until it settles
+                if result is not None and not last:
+                    await self._queue_for(index + 1, key).put((key, origin, result))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                stage.failed += 1
+                log.exception('Pipeline stage %s failed: %s', stage.name, e)
+            finally:
+                queue.task_done()
+
+    async def join(self) -> None:
+        """Wait until everything enqueued so far has left the last stage"""
+        for queues in self._queues:
+            for queue in queues:
+                await queue.join()
+
+    async def stop(self, timeout: float = 5.0) -> None:
+        """Drain for up to timeout seconds, then cancel the workers"""
+        if not self._tasks:
+            return
+        try:
+            await asyncio.wait_for(self.join(), timeout)
+        except asyncio.TimeoutError:
+            log.warning('Pipeline stopped with %d queued items', sum(self.depths().values()))
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def depths(self) -> Dict[str, int]:
+        return {stage.name: sum(q.qsize() for q in queues) for stage, queues in zip(self.stages, self._queues)}
+
+    def metrics(self) -> Dict[str, Dict[str, int]]:
+        depths = self.depths()
+        return {stage.name: {'queued': depths.get(stage.name, 0), 'processed': stage.processed,
+                             'dropped': stage.dropped, 'failed': stage.failed}
+                for stage in self.stages}
+
+
+def signal_pipeline(ingest: Callable[[Any], Any], parse: Callable[[Any], Any],
+                    persist: Callable[[Any], Any], execute: Callable[[Any], Any],
+                    workers: str = PIPELINE_WORKERS, maxsize: int = PIPELINE_QUEUE_SIZE,
+                    on_settled: Optional[Callable[[Any, Any], None]] = None) -> Pipeline:
+    """The standard four stages; worker counts from PIPELINE_WORKERS.
+    An item is settled once it is persisted (or filtered out before that)"""
+    counts = parse_workers(workers)
+    handlers = (('ingest', ingest), ('parse', parse), ('persist', persist), ('execute', execute))
+    return Pipeline([Stage(name, handler, counts[name], maxsize) for name, handler in handlers],
+                    on_settled=on_settled, settle_after='persist')
@@ -7,16 +7,21 @@ triggering new logins that could disturb the owner's account.
 """
 import os
 import json
+import asyncio
 import logging
-from typing import List
 
 from dotenv import load_dotenv
 from telethon import events
 from adapters.user_client import get_user_client
 from telethon.tl.types import Channel
 
+from core.catch_up import CatchUp, SIGNAL_MAX_AGE_MIN, is_stale
+from core.channel_cache import ChannelCache
+from core.pipeline import signal_pipeline
 from improved_signal_parser import ImprovedSignalParser, TradingSignal
 from trader.executor import Executor
+from storage.journal import SignalJournal, signal_record
+from storage.dedupe import SignalIndex, signal_key
 from bitget_integration import BitgetTrader, load_bitget_config
 
 log = logging.getLogger("core.signal_reader")
@@ -36,47 +41,48 @@ LOG_MSG_SESSION_ONLY = "Session-only mode: interactive login is disabled. If ses
 SCALPING_LINK = os.getenv('TG_SOURCE_SCALPING_LINK') or ''
 INTRADAY_LINK = os.getenv('TG_SOURCE_INTRADAY_LINK') or ''
 DRY_RUN = (os.getenv('DRY_RUN', 'true').lower() == 'true')
+SIGNAL_DEDUPE_BLOOM = (os.getenv('SIGNAL_DEDUPE_BLOOM', 'false').lower() == 'true')
 
 
 class SignalManager:
-    def __init__(self, filename: str = 'signals_history.json'):
+    def __init__(self, filename: str = 'signals_history.json', bloom: bool = SIGNAL_DEDUPE_BLOOM):
         self.filename = filename
-        self.signals = []
+        # append-only journal; the snapshot is rebuilt only on load/close
+        self.journal = SignalJournal(filename)
+        # O(1) dedupe by (channel_id, message_id); the optional Bloom filter
+        # lets a cold start skip reading the whole history
+        bloom_path = os.path.splitext(filename)[0] + '.bloom' if bloom else None
+        self.index = SignalIndex(self.journal, bloom_path=bloom_path)
+        self.count = 0
 
     def load_signals(self):
         try:
-            if os.path.exists(self.filename):
-                with open(self.filename, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                self.signals = data
-                log.info('Loaded %d signals from %s', len(self.signals), self.filename)
+            self.count = self.index.load()
+            self.journal.compact()
+            self.index.save()
+            log.info('Loaded %d signals from %s', self.count, self.filename)
         except Exception as e:
             log.warning('Failed to load signals history: %s', e)
 
     def add_signal(self, signal: TradingSignal):
-        # naive dedupe by message_id + channel_name
-        for s in self.signals:
-            if s.get('message_id') == signal.message_id and s.get('channel_name') == signal.channel_name:
-                return False
-        self.signals.append({
-            'message_id': signal.message_id,
-            'channel_name': signal.channel_name,
-            'position_type': signal.position_type,
-            'entry_price': signal.entry_price,
-            'stop_loss': signal.stop_loss,
-            'take_profits': getattr(signal, 'take_profits', []),
-            'risk_percent': getattr(signal, 'risk_percent', None),
-            'leverage': getattr(signal, 'leverage', None),
-            'timestamp': getattr(signal, 'timestamp', None),
-            'raw_text': getattr(signal, 'raw_text', '')
-        })
+        key = signal_key(getattr(signal, 'channel_id', None), signal.channel_name, signal.message_id)
+        if key in self.index:
+            return False
+        self.index.add(key)
+        self.count += 1
         try:
-            with open(self.filename, 'w', encoding='utf-8') as f:
-                json.dump(self.signals, f, ensure_ascii=False, indent=2)
+            self.journal.append(signal_record(signal))
         except Exception as e:
             log.warning('Failed to save signals history: %s', e)
         return True
 
+    def close(self):
+        try:
+            self.journal.close()
+            self.index.save()
+        except Exception as e:
+            log.warning('Failed to compact signals history: %s', e)
+
 
 async def start_signal_reader():
     """Start Telethon client in read-only, non-interactive mode.
@@ -100,20 +106,20 @@ async def start_signal_reader():
 
     log.info('Telethon session authorized — reader started (session=%s)', TG_SESSION)
 
-    # Resolve channels
-    watch_chats: List[Channel] = []
-    for link in (SCALPING_LINK, INTRADAY_LINK):
+    # Resolve channels once; messages are classified from event.chat_id via the cache
+    channels = ChannelCache()
+    for link, source in ((SCALPING_LINK, 'SCALPING'), (INTRADAY_LINK, 'INTRADAY')):
         if not link:
             continue
         try:
             ent = await client.get_entity(link)
             if isinstance(ent, Channel):
-                watch_chats.append(ent)
+                channels.add(ent, source)
                 log.info('Watching channel %s (id=%s)', getattr(ent, 'title', str(ent)), getattr(ent, 'id', ''))
         except Exception as e:
             log.warning('Cannot resolve channel %s: %s', link, e)
 
-    if not watch_chats:
+    if not channels:
         log.warning('No channels configured for signal reader (TG_SOURCE_SCALPING_LINK / TG_SOURCE_INTRADAY_LINK)')
         await client.disconnect()
         return
@@ -133,98 +139,129 @@ async def start_signal_reader():
         except Exception as e:
             log.warning('Failed to init BitgetTrader: %s', e)
 
-    @client.on(events.NewMessage(chats=watch_chats))
-    async def _handler(event):
+    # Pipeline stages (core/pipeline.py): the handler only enqueues, so a slow
+    # order submission never delays reading the next message; each channel
+    # keeps its own order through every stage.
+    async def ingest(event):
+        msg = event.message
+        text = msg.text or ''
+        if not text.strip():
+            return None
+        chat = channels.get(event.chat_id)  # ChannelInfo: .id, .title, .source
+        if chat is None:
+            chat = channels.add(await event.get_chat(), 'INTRADAY')
+        source = chat.source
+        # Diagnostics: log message length and source
+        log.info('[MSG] channel=%s message_id=%s len=%d source=%s', getattr(chat,'title',str(chat.id)), msg.id, len(text), source)
+        return msg, chat, text, source
+
+    def parse(item):
+        msg, chat, text, source = item
+        is_sig, reason = parser.is_trading_signal(text)
+        if not is_sig:
+            log.info('Filtered out: not a trading signal (%s)', reason or 'unknown')
+            return None
+
+        signal = parser.parse_signal(
+            message_id=str(msg.id),
+            channel_name=getattr(chat, 'title', str(chat.id)),
+            text=text,
+            timestamp=getattr(msg, 'date', None).isoformat() if getattr(msg, 'date', None) else None,
+            channel_id=getattr(chat, 'id', None)
+        )
+        if not signal:
+            log.info('Parser returned no signal for message %s', msg.id)
+            return None
+
+        # Log parsed fields
         try:
-            msg = event.message
-            chat = await event.get_chat()
-            text = msg.text or ''
-            if not text.strip():
-                return
-            # Diagnostics: log message length and source
-            source = 'INTRADAY'
-            for ch in watch_chats:
-                if getattr(ch, 'id', None) == getattr(chat, 'id', None):
-                    source = 'SCALPING' if ch == watch_chats[0] else 'INTRADAY'
-                    break
-            log.info('[MSG] channel=%s message_id=%s len=%d source=%s', getattr(chat,'title',str(chat.id)), msg.id, len(text), source)
-
-            is_sig, reason = parser.is_trading_signal(text)
-            if not is_sig:
-                log.info('Filtered out: not a trading signal (%s)', reason or 'unknown')
-                return
-
-            signal = parser.parse_signal(
-                message_id=str(msg.id),
-                channel_name=getattr(chat, 'title', str(chat.id)),
-                text=text,
-                timestamp=getattr(msg, 'date', None).isoformat() if getattr(msg, 'date', None) else None
-            )
-            if not signal:
-                log.info('Parser returned no signal for message %s', msg.id)
-                return
-
-            # Log parsed fields
+            tps = (signal.take_profits or [])[:3]
+        except Exception:
+            tps = []
+        log.info('Parsed signal: side=%s entry=%s stop=%s tps=%s risk=%s leverage=%s source=%s',
+                 getattr(signal,'position_type',None),
+                 getattr(signal,'entry_price',None),
+                 getattr(signal,'stop_loss',None),
+                 tps,
+                 getattr(signal,'risk_percent',None),
+                 getattr(signal,'leverage',None),
+                 source)
+
+        # Warn on missing key fields
+        if not getattr(signal,'stop_loss', None):
+            log.warning('Parsed signal missing stop_loss for message %s', msg.id)
+        return signal, is_stale(getattr(msg, 'date', None))
+
+    def persist(item):
+        # Save to history; a duplicate (catch-up + live event) is not executed twice
+        return item if signal_manager.add_signal(item[0]) else None
+
+    async def execute(item):
+        signal, stale = item
+        if stale:
+            log.info('Signal %s is older than %g min — stored, not executed', signal.message_id, SIGNAL_MAX_AGE_MIN)
+            return
+        # DRY_RUN -> plan and write demo trade
+        if DRY_RUN:
+            execu = Executor(bitget_trader, dry_run=True)
+            plan = execu.plan_from_signal(signal, context={})
+            orders, plan_dict = await execu.place_all_async(plan)
+            log.info('DRY_RUN plan created for signal %s', signal.message_id)
+            # save minimal demo trade
             try:
-                tps = (signal.take_profits or [])[:3]
-            except Exception:
-                tps = []
-            log.info('Parsed signal: side=%s entry=%s stop=%s tps=%s risk=%s leverage=%s source=%s',
-                     getattr(signal,'position_type',None),
-                     getattr(signal,'entry_price',None),
-                     getattr(signal,'stop_loss',None),
-                     tps,
-                     getattr(signal,'risk_percent',None),
-                     getattr(signal,'leverage',None),
-                     source)
-
-            # Warn on missing key fields
-            if not getattr(signal,'stop_loss', None):
-                log.warning('Parsed signal missing stop_loss for message %s', msg.id)
-
-            # Save to history
-            signal_manager.add_signal(signal)
-
-            # DRY_RUN -> plan and write demo trade
-            if DRY_RUN:
-                execu = Executor(bitget_trader, dry_run=True)
+                demo_path = 'demo_trades.json'
+                demo_trades = []
+                if os.path.exists(demo_path):
+                    with open(demo_path, 'r', encoding='utf-8') as f:
+                        demo_trades = json.load(f)
+                demo_trades.append({
+                    'trade_id': f"demo_{signal.message_id}",
+                    'signal_id': signal.message_id,
+                    'channel': signal.channel_name,
+                    'symbol': getattr(plan, 'symbol', 'unknown'),
+                    'side': getattr(plan, 'side', ''),
+                    'entry_price': getattr(plan, 'entry_price', None),
+                    'status': 'OPEN'
+                })
+                with open(demo_path, 'w', encoding='utf-8') as f:
+                    json.dump(demo_trades, f, ensure_ascii=False, indent=2)
+            except Exception as e:
+                log.warning('Failed to save demo trade: %s', e)
+        else:
+            # Real trading path (delegated to Executor / BitgetTrader)
+            try:
+                execu = Executor(bitget_trader, dry_run=False)
                 plan = execu.plan_from_signal(signal, context={})
-                orders, plan_dict = execu.place_all(plan)
-                log.info('DRY_RUN plan created for signal %s', signal.message_id)
-                # save minimal demo trade
-                try:
-                    demo_path = 'demo_trades.json'
-                    demo_trades = []
-                    if os.path.exists(demo_path):
-                        with open(demo_path, 'r', encoding='utf-8') as f:
-                            demo_trades = json.load(f)
-                    demo_trades.append({
-                        'trade_id': f"demo_{signal.message_id}",
-                        'signal_id': signal.message_id,
-                        'channel': signal.channel_name,
-                        'symbol': getattr(plan, 'symbol', 'unknown'),
-                        'side': getattr(plan, 'side', ''),
-                        'entry_price': getattr(plan, 'entry_price', None),
-                        'status': 'OPEN'
-                    })
-                    with open(demo_path, 'w', encoding='utf-8') as f:
-                        json.dump(demo_trades, f, ensure_ascii=False, indent=2)
-                except Exception as e:
-                    log.warning('Failed to save demo trade: %s', e)
-            else:
-                # Real trading path (delegated to Executor / BitgetTrader)
-                try:
-                    execu = Executor(bitget_trader, dry_run=False)
-                    plan = execu.plan_from_signal(signal, context={})
-                    result = bitget_trader.execute_trade(signal, context={'plan': plan}) if bitget_trader else None
-                    log.info('Executed trade for signal %s: %s', signal.message_id, bool(result))
-                except Exception as e:
-                    log.exception('Error executing real trade: %s', e)
+                result = await bitget_trader.execute_trade_async(signal, context={'plan': plan}) if bitget_trader else None
+                log.info('Executed trade for signal %s: %s', signal.message_id, bool(result))
+            except Exception as e:
+                log.exception('Error executing real trade: %s', e)
 
-        except Exception as e:
-            log.exception('Error handling message event: %s', e)
+    # the last-seen id moves only once a message is stored or filtered out,
+    # so whatever is still queued on a crash is replayed by the catch-up
+    pipeline = signal_pipeline(ingest, parse, persist, execute,
+                               on_settled=lambda chat_id, event: catch_up.mark(chat_id, event.message.id))
+    pipeline.start()
+    # messages missed while offline go through the same pipeline (core/catch_up.py)
+    catch_up = CatchUp(client, channels, pipeline.put)
+
+    # filter through the cache instead of chats=[...] so a migrated chat keeps being read
+    @client.on(events.NewMessage(func=channels.watches))
+    async def _handler(event):
+        await catch_up.ready.wait()  # a channel's gap is enqueued before its newer messages
+        await pipeline.put(event, key=event.chat_id)
+
+    # title edits and migrations are the only events that refresh the cache
+    @client.on(events.ChatAction())
+    async def _chat_action(event):
+        channels.on_chat_action(event)
 
+    catch_up_task = asyncio.create_task(catch_up.watch())
     try:
         await client.run_until_disconnected()
     finally:
+        catch_up_task.cancel()
+        await pipeline.stop()
+        catch_up.flush()  # marks settled while the pipeline drained
+        signal_manager.close()
         await client.disconnect()
@@ -11,6 +11,7 @@ import os
 from datetime import datetime
 from typing import List, Dict
 from improved_signal_parser import TradingSignal
+from storage.journal import read_history
 
 class DemoTradeMonitor:
     """Монитор демо-сделок"""
@@ -25,22 +26,21 @@ class DemoTradeMonitor:
         """Загружает данные о сигналах и демо-сделках"""
         # Загружаем сигналы
         if os.path.exists(self.signals_file):
-            with open(self.signals_file, 'r', encoding='utf-8') as file:
-                data = json.load(file)
-                for item in data:
-                    signal = TradingSignal(
-                        message_id=item['message_id'],
-                        channel_name=item['channel_name'],
-                        position_type=item['position_type'],
-                        entry_price=item.get('entry_price'),
-                        stop_loss=item.get('stop_loss'),
-                        take_profits=item.get('take_profits', []),
-                        risk_percent=item.get('risk_percent'),
-                        leverage=item.get('leverage'),
-                        timestamp=item.get('timestamp'),
-                        raw_text=item.get('raw_text', '')
-                    )
-                    self.signals.append(signal)
+            # снапшот + ещё не свёрнутый журнал работающего бота
+            for item in read_history(self.signals_file):
+                signal = TradingSignal(
+                    message_id=item['message_id'],
+                    channel_name=item['channel_name'],
+                    position_type=item['position_type'],
+                    entry_price=item.get('entry_price'),
+                    stop_loss=item.get('stop_loss'),
+                    take_profits=item.get('take_profits', []),
+                    risk_percent=item.get('risk_percent'),
+                    leverage=item.get('leverage'),
+                    timestamp=item.get('timestamp'),
+                    raw_text=item.get('raw_text', '')
+                )
+                self.signals.append(signal)
         
         # Загружаем демо-сделки
         if os.path.exists(self.demo_trades_file):
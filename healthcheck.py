@@ -7,6 +7,8 @@ from telethon import TelegramClient
 from telethon.tl.types import Channel
 import httpx
 
+from core.channel_resolver import ChannelResolver
+
 load_dotenv()
 
 API_ID = int(os.getenv("API_ID", "0"))
@@ -32,19 +34,8 @@ BYBIT_API_KEY = os.getenv("BYBIT_API_KEY","")
 BYBIT_API_SECRET = os.getenv("BYBIT_API_SECRET","")
 
 async def resolve_by_link_or_name(client: TelegramClient, link: str, name: str) -> Optional[Channel]:
-    if link:
-        try:
-            ent = await client.get_entity(link)
-            if isinstance(ent, Channel):
-                return ent
-        except Exception as e:
-            print(f"⚠️  Не удалось получить канал по ссылке {link}: {e}")
-    if name:
-        async for dialog in client.iter_dialogs():
-            if isinstance(dialog.entity, Channel):
-                if name.lower() in (dialog.name or "").lower():
-                    return dialog.entity
-    return None
+    # кэш каналов на диске -> ссылка -> один проход по диалогам (core/channel_resolver.py)
+    return await ChannelResolver(client).resolve(link, name)
 
 async def check_telegram():
     print("▶️  TELEGRAM CHECK")
@@ -58,8 +49,11 @@ async def check_telegram():
     me = await client.get_me()
     print(f"✅ Авторизован как: {me.first_name} (id={me.id})")
 
-    scalping = await resolve_by_link_or_name(client, SCALPING_LINK, SCALPING_NAME)
-    intraday = await resolve_by_link_or_name(client, INTRADAY_LINK, INTRADAY_NAME)
+    found = await ChannelResolver(client).resolve_many({
+        "SCALPING": (SCALPING_LINK, SCALPING_NAME),
+        "INTRADAY": (INTRADAY_LINK, INTRADAY_NAME),
+    })
+    scalping, intraday = found["SCALPING"], found["INTRADAY"]
     if not scalping or not intraday:
         print("❌ Каналы не найдены. Проверь TG_SOURCE_*_LINK или *_NAME в .env")
         await client.disconnect()
@@ -7,8 +7,13 @@
 """
 
 import re
-from dataclasses import dataclass
-from typing import Optional, List, Dict
+from dataclasses import dataclass, replace
+from typing import Optional, List, Dict, Iterable, Iterator, Any, Tuple
+
+from nlp.batch import parse_in_pool
+from nlp.cache import MISS, ParseCache
+from nlp.parser_rules import ParsedSignal
+from nlp.symbols import DEFAULT_SYMBOL, find_symbol
 
 @dataclass
 class TradingSignal:
@@ -23,11 +28,50 @@ class TradingSignal:
     leverage: Optional[str] = None
     timestamp: Optional[str] = None
     raw_text: str = ""
+    parsed: Optional[ParsedSignal] = None  # нормализованные числа для исполнения
+    channel_id: Optional[int] = None  # стабильный id канала (ключ дедупликации)
+
+def _trie_regex(words) -> str:
+    """Строит regex-альтернативу по префиксному дереву слов"""
+    root = {}
+    for word in words:
+        node = root
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[''] = {}
+
+    def emit(node) -> str:
+        branches = [re.escape(ch) + emit(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return f'(?:{body})?' if '' in node else body
+
+    return emit(root)
+
+@dataclass
+class MessageClass:
+    """Результат однопроходной классификации текста сообщения"""
+    has_noise: bool = False
+    has_long: bool = False
+    has_short: bool = False
+    has_numbers: bool = False
+
+    @property
+    def position_type(self) -> Optional[str]:
+        if self.has_long:
+            return 'LONG'
+        if self.has_short:
+            return 'SHORT'
+        return None
 
 class ImprovedSignalParser:
     """Улучшенный парсер торговых сигналов"""
     
-    def __init__(self):
+    def __init__(self, cache_size: int = 1024, negative_ttl_sec: float = 300.0):
+        # Кэш результатов по хэшу текста (репосты/правки); cache_size=0 — без кэша
+        self.cache = ParseCache(cache_size, negative_ttl_sec=negative_ttl_sec) if cache_size > 0 else None
+
         # Ключевые слова для лонгов (расширенный список)
         self.long_keywords = [
             'лонг', 'long', '📈', 'вверх', 'рост', 'покупка', 'buy',
@@ -84,6 +128,75 @@ class ImprovedSignalParser:
                 r'плечo:?\s*(х\d+)'
             ]
         }
+
+        self._compile()
+
+    def _compile(self):
+        """Собирает матчеры один раз: общий автомат ключевых слов и готовые regex параметров"""
+        kinds = {}
+        for kind, keywords in (('noise', self.noise_keywords),
+                               ('long', self.long_keywords),
+                               ('short', self.short_keywords)):
+            for keyword in keywords:
+                kinds.setdefault(keyword.lower(), set()).add(kind)
+
+        # Совпадение ключевого слова засчитывает и категории всех слов внутри него
+        # ('вход в лонг' ⊃ 'лонг', 'стримит' ⊃ 'стрим').
+        self._keyword_kinds = {
+            keyword: frozenset().union(*(kinds[other] for other in kinds if other in keyword))
+            for keyword in kinds
+        }
+
+        # Префиксное дерево в виде одной альтернативы: regex-движок отбрасывает позицию
+        # по первому символу, а жадность даёт самое длинное слово в позиции.
+        # \d{3} эквивалентно проверке наличия \d{3,6}.
+        alternation = _trie_regex(kinds)
+        self._classifier_re = re.compile(rf'(?P<kw>{alternation})|(?P<num>\d{{3}})')
+        self._keyword_re = re.compile(alternation)
+
+        flags = re.IGNORECASE | re.MULTILINE
+        self._compiled_patterns = {
+            param_type: [re.compile(pattern, flags) for pattern in patterns]
+            for param_type, patterns in self.patterns.items()
+        }
+        self._tp_price_re = re.compile(r'\d{4,6}')
+        self._number_re = re.compile(r'\d+(?:[.,]\d+)?')
+        self._last_classified = (None, None)
+
+    def classify(self, text: str) -> MessageClass:
+        """Классифицирует сообщение (шум, направление, наличие цен) за один проход по тексту"""
+        last_text, last_class = self._last_classified
+        if text is last_text:
+            # is_trading_signal + parse_signal на одном сообщении не сканируют текст дважды
+            return last_class
+
+        result = MessageClass()
+        kinds = set()
+        keyword_kinds = self._keyword_kinds
+        lowered = text.lower()
+        matcher = self._classifier_re
+        pos = 0
+        while True:
+            match = matcher.search(lowered, pos)
+            if match is None:
+                break
+            # Следующий поиск с позиции после начала совпадения, а не после конца:
+            # слова разных категорий могут перекрываться ('sell' + 'long' в 'sellong').
+            pos = match.start() + 1
+            if matcher is self._keyword_re:
+                kinds |= keyword_kinds[match.group()]
+            elif match.lastgroup == 'kw':
+                kinds |= keyword_kinds[match.group('kw')]
+            else:
+                # цифры уже найдены — дальше ищем только ключевые слова
+                result.has_numbers = True
+                matcher = self._keyword_re
+
+        result.has_noise = 'noise' in kinds
+        result.has_long = 'long' in kinds
+        result.has_short = 'short' in kinds
+        self._last_classified = (text, result)
+        return result
     
     def is_trading_signal(self, text: str) -> tuple[bool, "Optional[str]"]:
         """Определяет, является ли сообщение торговым сигналом.
@@ -91,33 +204,18 @@ class ImprovedSignalParser:
         Возвращает кортеж (is_signal, reason). reason — строка с причной отказа
         или None.
         """
-        text_lower = text.lower()
-
-        # Проверяем наличие ключевых слов сигналов
-        has_signal_keywords = any(
-            keyword in text_lower
-            for keyword in self.long_keywords + self.short_keywords
-        )
-
-        # Проверяем наличие цифр (цен) - более гибко
-        has_numbers = bool(re.search(r'\d{3,6}', text))
+        cls = self.classify(text)
 
         # Проверяем длину сообщения
         is_long_enough = len(text.strip()) > 20
 
-        # Проверяем отсутствие явного шума
-        has_noise = any(
-            keyword in text_lower
-            for keyword in self.noise_keywords
-        )
-
-        if has_noise:
+        if cls.has_noise:
             return False, "noise"
 
-        if not has_signal_keywords:
+        if not (cls.has_long or cls.has_short):
             return False, "no keywords"
 
-        if not has_numbers:
+        if not cls.has_numbers:
             return False, "no numbers"
 
         if not is_long_enough:
@@ -128,27 +226,20 @@ class ImprovedSignalParser:
     
     def extract_position_type(self, text: str) -> Optional[str]:
         """Извлекает тип позиции (LONG/SHORT)"""
-        text_lower = text.lower()
-        
-        if any(keyword in text_lower for keyword in self.long_keywords):
-            return 'LONG'
-        elif any(keyword in text_lower for keyword in self.short_keywords):
-            return 'SHORT'
-        
-        return None
+        return self.classify(text).position_type
     
     def extract_parameters(self, text: str) -> Dict[str, str]:
         """Извлекает параметры торгового сигнала"""
         params = {}
         
-        for param_type, patterns in self.patterns.items():
+        for param_type, patterns in self._compiled_patterns.items():
             for pattern in patterns:
-                match = re.search(pattern, text, re.IGNORECASE | re.MULTILINE)
+                match = pattern.search(text)
                 if match:
                     if param_type == 'take_profit':
                         # Обрабатываем множественные цели
                         tp_text = match.group(1)
-                        tp_prices = re.findall(r'\d{4,6}', tp_text)
+                        tp_prices = self._tp_price_re.findall(tp_text)
                         if tp_prices:
                             params[param_type] = '-'.join(tp_prices)
                     else:
@@ -157,13 +248,47 @@ class ImprovedSignalParser:
         
         return params
     
-    def parse_signal(self, message_id: str, channel_name: str, text: str, timestamp: str = None) -> Optional[TradingSignal]:
+    def parse_signal(self, message_id: str, channel_name: str, text: str, timestamp: str = None,
+                     channel_id: Optional[int] = None) -> Optional[TradingSignal]:
         """Парсит торговый сигнал из текста сообщения"""
+        cache = self.cache
+        if cache is None:
+            signal = self._parse_signal(message_id, channel_name, text, timestamp)
+            if signal is not None:
+                signal.channel_id = channel_id
+            return signal
+
+        key = cache.key(text)
+        if cache.is_negative(key):
+            return None
+        cached = cache.get(key)
+        if cached is MISS:
+            cached = self._parse_signal(message_id, channel_name, text, timestamp)
+            if cached is None:
+                cache.put_negative(key)  # отброшен фильтром: шум или не сигнал
+                return None
+            cache.put(key, cached)
+
+        # Наружу всегда копия: вызывающий код может менять сигнал,
+        # а тот же текст в другом сообщении получает свои метаданные
+        return replace(
+            cached,
+            message_id=message_id,
+            channel_name=channel_name,
+            channel_id=channel_id,
+            timestamp=timestamp,
+            raw_text=text,
+            take_profits=list(cached.take_profits),
+            parsed=replace(cached.parsed, take_profits=list(cached.parsed.take_profits)),
+        )
+
+    def _parse_signal(self, message_id: str, channel_name: str, text: str, timestamp: str = None) -> Optional[TradingSignal]:
         is_sig, reason = self.is_trading_signal(text)
         if not is_sig:
             return None
 
-        position_type = self.extract_position_type(text)
+        # classify() уже посчитан в is_trading_signal — берём результат из него
+        position_type = self.classify(text).position_type
         if not position_type:
             return None
         
@@ -172,8 +297,8 @@ class ImprovedSignalParser:
         # Разбираем take_profits на список
         take_profits = []
         if 'take_profit' in params:
-            tp_str = params['take_profit']
-            take_profits = re.findall(r'\d{4,6}', tp_str)
+            # extract_parameters уже склеил цены через '-'
+            take_profits = params['take_profit'].split('-')
         
         return TradingSignal(
             message_id=message_id,
@@ -185,7 +310,100 @@ class ImprovedSignalParser:
             risk_percent=params.get('risk'),
             leverage=params.get('leverage'),
             timestamp=timestamp,
-            raw_text=text
+            raw_text=text,
+            parsed=self.normalise(position_type, params, take_profits, find_symbol(text) or DEFAULT_SYMBOL)
+        )
+
+    def parse_many(self, messages: Iterable[Any], workers: Optional[int] = None,
+                   chunk_size: int = 256, channel_name: str = "") -> Iterator[Optional[TradingSignal]]:
+        """Парсит поток сообщений в пуле процессов, отдавая результаты по порядку.
+
+        messages — dict'ы формата extracted_messages.json, объекты Telethon Message,
+        кортежи (message_id, channel_name, text, timestamp) или просто строки.
+        Для каждого сообщения отдаётся TradingSignal или None.
+        """
+        args_iter = (
+            self._message_args(message, index, channel_name)
+            for index, message in enumerate(messages)
+        )
+        return parse_in_pool(self, 'parse_signal', args_iter, workers=workers, chunk_size=chunk_size)
+
+    @staticmethod
+    def _message_args(message: Any, index: int, channel_name: str) -> Tuple[str, str, str, Optional[str]]:
+        """Приводит сообщение к аргументам parse_signal (в родительском процессе)"""
+        if isinstance(message, str):
+            return str(index), channel_name, message, None
+        if isinstance(message, (tuple, list)):
+            return tuple(message)
+        if isinstance(message, dict):
+            timestamp = message.get('timestamp')
+            if timestamp is None:
+                timestamp = f"{message.get('date', '')} {message.get('time', '')}".strip() or None
+            return (
+                str(message.get('message_id', message.get('id', index))),
+                message.get('channel_name') or message.get('channel') or channel_name,
+                message.get('text') or message.get('raw_text') or '',
+                timestamp,
+            )
+        # Telethon Message: сам объект в воркер не передаём (тяжёлый и не всегда pickle-able)
+        date = getattr(message, 'date', None)
+        return (
+            str(getattr(message, 'id', index)),
+            channel_name,
+            getattr(message, 'text', None) or getattr(message, 'message', None) or '',
+            date.isoformat() if date else None,
+        )
+
+    def _numbers(self, value: Optional[str]) -> List[float]:
+        if not value:
+            return []
+        return [float(x.replace(',', '.')) for x in self._number_re.findall(value)]
+
+    def normalise(self, position_type: str, params: Dict[str, str], take_profits: List[str],
+                  symbol: str = DEFAULT_SYMBOL) -> ParsedSignal:
+        """Переводит строковые параметры в каноническую ParsedSignal.
+
+        Отсутствующие цены входа/стопа — 0.0, как в nlp.parser_rules. Цели по
+        неправильную сторону от входа или дальше 50% от него (без входа — от
+        первой цели) отбрасываются: склейки вроде "878008" не должны
+        превращаться в лимитные ордера.
+        """
+        entry = self._numbers(params.get('entry'))[:2]
+        entry_low, entry_high = (min(entry), max(entry)) if entry else (0.0, 0.0)
+        stop = self._numbers(params.get('stop'))
+        risk = self._numbers(params.get('risk'))
+        leverage = self._numbers(params.get('leverage'))
+
+        tp_levels = [float(tp) for tp in take_profits]
+        if entry:
+            mid = (entry_low + entry_high) / 2
+            if position_type == 'LONG':
+                tp_levels = [tp for tp in tp_levels if mid < tp <= mid * 1.5]
+            else:
+                tp_levels = [tp for tp in tp_levels if mid * 0.5 <= tp < mid]
+        elif tp_levels:
+            # без входа ориентируемся на первую цель
+            ref = tp_levels[0]
+            tp_levels = [tp for tp in tp_levels if ref * 0.5 <= tp <= ref * 1.5]
+
+        confidence = 0.3
+        if entry:
+            confidence += 0.3
+        if stop:
+            confidence += 0.2
+        if tp_levels:
+            confidence += 0.2
+
+        return ParsedSignal(
+            direction='BUY' if position_type == 'LONG' else 'SELL',
+            symbol=symbol,
+            entry_low=entry_low,
+            entry_high=entry_high,
+            stop_loss=stop[0] if stop else 0.0,
+            risk_percent=risk[0] if risk else None,
+            leverage=int(leverage[0]) if leverage else None,
+            confidence=round(confidence, 2),
+            take_profits=tp_levels
         )
 
 # Статистика обучения:
@@ -4,7 +4,7 @@ import logging
 from typing import Optional, Callable, Awaitable
 from telethon import TelegramClient, events
 from telethon.tl.types import Channel
-from config.settings import settings
+from core.channel_resolver import ChannelResolver
 
 log = logging.getLogger(__name__)
 
@@ -14,26 +14,14 @@ OnMessage = Callable[[str, str], Awaitable[None]]
 
 async def _resolve_channel_by_link_or_name(client: TelegramClient, link: Optional[str], name_substr: Optional[str]) -> Channel:
     """
-    Пытается найти канал: сначала по инвайт-ссылке (https://t.me/+XXXX),
-    если не получилось — по подстроке в названии среди твоих диалогов.
+    Пытается найти канал: сначала по кэшу на диске (core/channel_resolver.py),
+    потом по инвайт-ссылке (https://t.me/+XXXX), если не получилось — по
+    подстроке в названии среди твоих диалогов.
     """
-    # 1) по ссылке
-    if link:
-        try:
-            ent = await client.get_entity(link)
-            if isinstance(ent, Channel):
-                return ent
-        except Exception as e:
-            log.warning("Cannot resolve by link %s: %s", link, e)
-
-    # 2) по названию
-    if name_substr:
-        async for dialog in client.iter_dialogs():
-            if isinstance(dialog.entity, Channel):
-                if name_substr.lower() in (dialog.name or "").lower():
-                    return dialog.entity
-
-    raise RuntimeError(f"Channel not found. link={link} name_part={name_substr}")
+    ent = await ChannelResolver(client).resolve(link, name_substr)
+    if ent is None:
+        raise RuntimeError(f"Channel not found. link={link} name_part={name_substr}")
+    return ent
 
 async def start_telethon_reader(settings, on_message: OnMessage = None):
     """
@@ -56,8 +44,15 @@ async def start_telethon_reader(settings, on_message: OnMessage = None):
         await client.disconnect()
         return
 
-    scalping = await _resolve_channel_by_link_or_name(client, scalping_link, scalping_name)
-    intraday = await _resolve_channel_by_link_or_name(client, intraday_link, intraday_name)
+    # оба канала одним вызовом: при промахе кэша — один проход по диалогам
+    found = await ChannelResolver(client).resolve_many({
+        "SCALPING": (scalping_link, scalping_name),
+        "INTRADAY": (intraday_link, intraday_name),
+    })
+    for source, ent in found.items():
+        if ent is None:
+            raise RuntimeError(f"Channel not found: {source}")
+    scalping, intraday = found["SCALPING"], found["INTRADAY"]
 
     log.info("Resolved channels: SCALPING id=%s title=%s | INTRADAY id=%s title=%s",
              scalping.id, scalping.title, intraday.id, intraday.title)
@@ -14,13 +14,22 @@ from telethon import TelegramClient, events
 from telethon.tl.types import Channel
 
 from improved_signal_parser import ImprovedSignalParser, TradingSignal
+from nlp.parser_rules import as_parsed_signal
+from nlp.symbols import DEFAULT_SYMBOL
 from bitget_integration import BitgetTrader, load_bitget_config
 from trader.executor import Executor
-from market.watcher import Watcher
-from bot.tg_control import start_control_bot
-from core.signal_reader import start_signal_reader
-from bitget_integration import BitgetHTTP
-from aiogram import Bot as AiogramBot
+from storage.journal import SignalJournal, signal_record
+from storage.dedupe import SignalIndex, signal_key
+from market.watcher import Watcher, fetch_bitget_last_price
+from market.price_stream import TickerStream
+from core.pipeline import signal_pipeline
+from core.channel_cache import ChannelCache
+from core.channel_resolver import ChannelResolver
+from core.catch_up import CatchUp, SIGNAL_MAX_AGE_MIN, is_stale
+from core.health import run_checks
+from bitget_integration import PRODUCT_TYPE
+from market.contract_specs import contract_specs
+from market.bitget_transport import close_transports
 
 # 1) Загружаем .env (НЕ data.env)
 load_dotenv()
@@ -48,6 +57,8 @@ LEVERAGE_MIN = int(os.getenv('LEVERAGE_MIN', '10'))
 LEVERAGE_MAX = int(os.getenv('LEVERAGE_MAX', '25'))
 BREAKEVEN_AFTER_TP = int(os.getenv('BREAKEVEN_AFTER_TP', '2'))
 TIME_STOP_MIN = int(os.getenv('TIME_STOP_MIN', '240'))
+SIGNAL_DEDUPE_BLOOM = (os.getenv('SIGNAL_DEDUPE_BLOOM', 'false').lower() == 'true')
+PRICE_STREAM = ((os.getenv('PRICE_STREAM') or 'true').lower() == 'true')
 TGBOT_TOKEN = os.getenv('TGBOT_TOKEN', '')
 _owners_raw = os.getenv('TG_OWNER_IDS', os.getenv('TG_OWNER_ID', '')) or ''
 
@@ -82,10 +93,17 @@ class ImprovedTradingBot:
         self.bitget_trader: Optional[BitgetTrader] = None
         self.signal_manager = SignalManager()
         self.channel_entities: Dict[str, Channel] = {}
-        self.channel_source_by_id: Dict[int, str] = {}  # channel.id -> SCALPING|INTRADAY
+        self.channels = ChannelCache()  # peer_id (event.chat_id) -> название и SCALPING|INTRADAY
+        self.catch_up: Optional[CatchUp] = None
+        self._catch_up_task: Optional[asyncio.Task] = None
         self.phone = PHONE
         self.watcher: Optional[Watcher] = None
         self._synthetic_price = None  # для DRY_RUN синтетический «тик»
+        self.price_stream: Optional[TickerStream] = None
+        self.storage = None  # storage.async_repo.AsyncStorage: единственный писатель SQLite (только в бою)
+        # ingest -> parse -> persist -> execute; воркеры стадий — PIPELINE_WORKERS
+        self.pipeline = signal_pipeline(self._ingest, self._parse, self._persist, self._execute,
+                                        on_settled=self._settled)
 
         self.stats = {
             'signals_processed': 0,
@@ -127,19 +145,45 @@ class ImprovedTradingBot:
             print("🔧 Режим DRY_RUN - реальная торговля отключена")
 
         # создаём watcher (перевод SL в БУ после TP2)
-        def on_breakeven(plan: dict):
+        async def on_breakeven(plan: dict):
             side = plan["side"]
             entry = plan["entry"]
             be = entry + 1.0 if side == "SHORT" else entry - 1.0  # небольшой буфер в 1$
             print(f"🔁 Перенос SL → БУ на {be} по плану {plan.get('plan_id')}")
+            plan["stop"] = be  # watcher дальше следит за стопом уже на БУ
             if not DRY_RUN and self.bitget_trader:
                 try:
-                    self.bitget_trader.modify_stop(plan["side"], new_stop_price=be)
+                    trader = self.bitget_trader.for_symbol(plan.get("symbol"))
+                    await trader.modify_stop_async(plan["side"], new_stop_price=be)
                     print(f"✅ SL перенесен в БУ на {be}")
                 except Exception as e:
                     print(f"❌ Ошибка переноса SL в БУ: {e}")
 
-        self.watcher = Watcher(get_now_price=self._get_now_price, on_breakeven=on_breakeven, poll_interval_sec=3)
+        # стоп-лосс пересечён или вышло TIME_STOP_MIN — снимаем ордера и закрываем остаток
+        async def on_stop(plan: dict, reason: str):
+            what = "Стоп-лосс" if reason == "stop" else f"Тайм-стоп {TIME_STOP_MIN} мин"
+            print(f"⏹️ {what} по плану {plan.get('plan_id')}: закрываем позицию")
+            if not DRY_RUN and self.bitget_trader:
+                try:
+                    trader = self.bitget_trader.for_symbol(plan.get("symbol"))
+                    await trader.close_position_async(plan["side"], plan.get("qty_total"))  # нет объёма — живой размер позиции
+                    print("✅ Ордера отменены, позиция закрыта")
+                except Exception as e:
+                    print(f"❌ Ошибка закрытия позиции: {e}")
+
+        watch = dict(on_breakeven=on_breakeven, on_stop=on_stop, time_stop_min=TIME_STOP_MIN, poll_interval_sec=3)
+        if not DRY_RUN:
+            # планы реальных позиций переживают рестарт: пишем в positions/orders и поднимаем обратно
+            from storage.async_repo import AsyncStorage  # SQLite нужен только в бою
+            from storage.watcher_state import WatcherStore
+            self.storage = AsyncStorage()
+            await self.storage.start()
+            watch["store"] = WatcherStore(self.storage.database)
+            watch["writer"] = self.storage.writer  # события планов — через общий поток-писатель
+        self.watcher = self._make_watcher(watch)
+        restored = self.watcher.restore()
+        if restored:
+            print(f"♻️ Watcher: восстановлено {restored} активных планов")
         # запускаем watcher в фоне
         asyncio.create_task(self.watcher.start())
 
@@ -150,7 +194,16 @@ class ImprovedTradingBot:
 
         print("🎉 Бот готов к работе!")
 
-    def _get_now_price(self) -> float:
+    def _make_watcher(self, watch: Dict) -> Watcher:
+        if DRY_RUN or not PRICE_STREAM:
+            # без потока Watcher опрашивает _get_now_price(symbol) раз в poll_interval_sec
+            return Watcher(get_now_price=self._get_now_price, **watch)
+        # цена по WebSocket: БУ срабатывает на тике, а не через 3 с; REST — только пока поток лежит.
+        # Планы по другим символам досписывают поток сами (Watcher -> add_symbol)
+        self.price_stream = TickerStream(["BTCUSDT"])
+        return Watcher(get_now_price=self._get_now_price, stream=self.price_stream, **watch)
+
+    async def _get_now_price(self, symbol: str = "BTCUSDT") -> Optional[float]:
         # DRY_RUN: синтетическое движение цены к TP
         if DRY_RUN:
             if self._synthetic_price is None:
@@ -159,32 +212,26 @@ class ImprovedTradingBot:
             # двигаем цену на каждом запросе (упрощённо):
             self._synthetic_price += 50.0  # для LONG растёт; для SHORT можно убывать — не критично для теста
             return self._synthetic_price
-        # Реальный режим — можно кешировать последнюю цену из отдельной задачи
-        # Для простоты вернём entry последнего плана, если нет цены
-        return self._synthetic_price or 30000.0
+        # Реальный режим — последняя цена из живого потока, иначе REST (поток выключен или переподключается)
+        if self.price_stream and self.price_stream.connected.is_set():
+            price = self.price_stream.last_price(symbol)
+            if price is not None:
+                return price
+        return await fetch_bitget_last_price(symbol)
 
     async def _resolve_by_link_or_name(self, link: str, name_substr: str) -> Optional[Channel]:
-        # 4.1 сначала пробуем ссылку (invite)
-        if link:
-            try:
-                ent = await self.client.get_entity(link)
-                if isinstance(ent, Channel):
-                    return ent
-            except Exception as e:
-                print(f"⚠️ Не удалось получить канал по ссылке {link}: {e}")
-        # 4.2 затем ищем по подстроке названия среди твоих диалогов
-        if name_substr:
-            async for dialog in self.client.iter_dialogs():
-                if isinstance(dialog.entity, Channel):
-                    if name_substr.lower() in (dialog.name or "").lower():
-                        return dialog.entity
-        return None
+        # кэш на диске (одна проверка) -> ссылка (invite) -> подстрока названия среди диалогов
+        return await ChannelResolver(self.client).resolve(link, name_substr)
 
     async def _resolve_channels(self):
         print("📡 Поиск каналов...")
 
-        scalping = await self._resolve_by_link_or_name(SCALPING_LINK, SCALPING_NAME)
-        intraday = await self._resolve_by_link_or_name(INTRADAY_LINK, INTRADAY_NAME)
+        # оба канала разом: при промахе кэша диалоги перебираются один раз на оба названия
+        found = await ChannelResolver(self.client).resolve_many({
+            "SCALPING": (SCALPING_LINK, SCALPING_NAME),
+            "INTRADAY": (INTRADAY_LINK, INTRADAY_NAME),
+        })
+        scalping, intraday = found["SCALPING"], found["INTRADAY"]
 
         if not scalping:
             raise RuntimeError("Не найден SCALPING-канал (проверь TG_SOURCE_SCALPING_LINK или TG_SOURCE_SCALPING_NAME)")
@@ -193,64 +240,95 @@ class ImprovedTradingBot:
 
         self.channel_entities["SCALPING"] = scalping
         self.channel_entities["INTRADAY"] = intraday
-        self.channel_source_by_id[scalping.id] = "SCALPING"
-        self.channel_source_by_id[intraday.id] = "INTRADAY"
+        self.channels.add(scalping, "SCALPING")
+        self.channels.add(intraday, "INTRADAY")
 
         print(f"✅ Найден SCALPING: id={scalping.id}, title={scalping.title}")
         print(f"✅ Найден INTRADAY: id={intraday.id}, title={intraday.title}")
 
     def setup_message_handlers(self):
-        targets = list(self.channel_entities.values())
+        self.pipeline.start()
 
-        @self.client.on(events.NewMessage(chats=targets))
+        # фильтр по кэшу каналов, а не chats=[...]: переживает миграцию группы в супергруппу
+        @self.client.on(events.NewMessage(func=self.channels.watches))
         async def handle_new_message(event):
-            await self._process_message(event)
-
-    async def _process_message(self, event):
-        try:
-            message = event.message
-            channel = await event.get_chat()
-            channel_name = getattr(channel, 'title', str(channel.id))
-            source = self.channel_source_by_id.get(channel.id, "INTRADAY")  # дефолт пусть будет интрадей
-
-            text = message.text or ""
-            if not text.strip():
-                return
-
-            # 5) фильтруем не-сигналы — пусть решает улучшенный парсер
-            if not self.parser.is_trading_signal(text):
-                return
-
-            print(f"\n🎯 Новый сигнал [{source}] из канала {channel_name}:")
-            print(f"   Текст: {text[:120].replace(os.linesep,' ')}{'...' if len(text)>120 else ''}")
-
-            # Парсим сигнал
-            signal = self.parser.parse_signal(
-                message_id=str(message.id),
-                channel_name=channel_name,
-                text=text,
-                timestamp=message.date.isoformat()
-            )
-            if not signal:
-                print("   ❌ Не удалось распарсить сигнал")
-                return
-
-            # (опционально) проставим source внутрь сигнала, если у твоего dataclass есть такое поле
-            if hasattr(signal, "source"):
-                setattr(signal, "source", source)
-
-            self._print_signal_info(signal)
-
-            # Сохраняем
-            self.signal_manager.add_signal(signal)
-
-            # 6) Выполняем (с учётом деления депозита)
-            await self._execute_signal(signal, source)
-
-            self.stats['signals_processed'] += 1
+            # пока догоняем пропущенное — ждём, чтобы новые сообщения канала встали после старых
+            await self.catch_up.ready.wait()
+            # только в очередь: медленная отправка ордеров не держит чтение следующих сообщений
+            await self.pipeline.put(event, key=event.chat_id)
+
+        # смена названия / миграция — единственные события, обновляющие кэш каналов
+        @self.client.on(events.ChatAction())
+        async def handle_chat_action(event):
+            self.channels.on_chat_action(event)
+
+        # пропущенное за время простоя/разрыва — через тот же конвейер (core/catch_up.py)
+        self.catch_up = CatchUp(self.client, self.channels, self.pipeline.put)
+        self._catch_up_task = asyncio.create_task(self.catch_up.watch())
+
+    # ===== Стадии конвейера (core/pipeline.py), по порядку для каждого канала =====
+    async def _ingest(self, event) -> Optional[dict]:
+        message = event.message
+        text = message.text or ""
+        if not text.strip():
+            return None
+        # канал — из кэша по event.chat_id, без get_chat() на каждое сообщение
+        channel = self.channels.get(event.chat_id)
+        if channel is None:
+            channel = self.channels.add(await event.get_chat(), "INTRADAY")  # дефолт пусть будет интрадей
+        return {
+            "message": message,
+            "channel_id": channel.id,
+            "channel_name": channel.title,
+            "source": channel.source,
+            "text": text,
+            "stale": is_stale(message.date),  # старше SIGNAL_MAX_AGE_MIN — не исполняем
+        }
 
-        except Exception as e:
-            print(f"❌ Ошибка обработки сообщения: {e}")
+    def _settled(self, chat_id, event) -> None:
+        # сообщение сохранено или отфильтровано: после рестарта догонялка его уже не вернёт
+        self.catch_up.mark(chat_id, event.message.id)
+
+    def _parse(self, item: dict) -> Optional[dict]:
+        text, source = item["text"], item["source"]
+        # 5) фильтруем не-сигналы — пусть решает улучшенный парсер
+        is_sig, _ = self.parser.is_trading_signal(text)
+        if not is_sig:
+            return None
+
+        print(f"\n🎯 Новый сигнал [{source}] из канала {item['channel_name']}:")
+        print(f"   Текст: {text[:120].replace(os.linesep,' ')}{'...' if len(text)>120 else ''}")
+
+        signal = self.parser.parse_signal(
+            message_id=str(item["message"].id),
+            channel_name=item["channel_name"],
+            text=text,
+            timestamp=item["message"].date.isoformat(),
+            channel_id=item["channel_id"]
+        )
+        if not signal:
+            print("   ❌ Не удалось распарсить сигнал")
+            return None
+
+        # (опционально) проставим source внутрь сигнала, если у твоего dataclass есть такое поле
+        if hasattr(signal, "source"):
+            setattr(signal, "source", source)
+
+        self._print_signal_info(signal)
+        item["signal"] = signal
+        return item
+
+    def _persist(self, item: dict) -> Optional[dict]:
+        # уже был в истории (догонялка + живое событие) — второй раз не исполняем
+        return item if self.signal_manager.add_signal(item["signal"]) else None
+
+    async def _execute(self, item: dict) -> None:
+        if item["stale"]:
+            print(f"   ⏭️ Сигнал старше {SIGNAL_MAX_AGE_MIN:g} мин — сохранён, но не исполняется")
+            return
+        # 6) Выполняем (с учётом деления депозита)
+        await self._execute_signal(item["signal"], item["source"])
+        self.stats['signals_processed'] += 1
 
     def _print_signal_info(self, signal: TradingSignal):
         print("   📊 Параметры сигнала:")
@@ -283,7 +361,7 @@ class ImprovedTradingBot:
                 "leverage_min": LEVERAGE_MIN,
                 "breakeven_after_tp": BREAKEVEN_AFTER_TP
             })
-            orders, plan_dict = execu.place_all(plan)
+            orders, plan_dict = await execu.place_all_async(plan)
             print("   ✅ DRY_RUN: план составлен и ордера показаны")
             
             # Регистрируем план в watcher
@@ -323,10 +401,14 @@ class ImprovedTradingBot:
                 "tp_shares": plan.tp_shares,
             }
             
-            result = self.bitget_trader.execute_trade(signal, context=ctx)
+            result = await self.bitget_trader.execute_trade_async(signal, context=ctx)
             
             if result:
-                print("   ✅ Ордер(а) размещены")
+                if result.get("ok"):
+                    print(f"   ✅ Ордер(а) размещены за {result.get('elapsed_ms', 0):.0f} мс")
+                else:
+                    failed = [leg["name"] for leg in result.get("legs", []) if leg["status"] != "ok"]
+                    print(f"   ⚠️ Вход размещён, но не выставлены: {', '.join(failed)}")
                 self.stats['signals_executed'] += 1
                 
                 # Регистрируем план в watcher для реальной торговли
@@ -354,7 +436,7 @@ class ImprovedTradingBot:
                 'trade_id': f"demo_{signal.message_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
                 'signal_id': signal.message_id,
                 'channel': signal.channel_name,
-                'symbol': 'BTCUSDT',
+                'symbol': getattr(as_parsed_signal(signal), 'symbol', None) or DEFAULT_SYMBOL,
                 'side': signal.position_type,
                 'entry_price': signal.entry_price,
                 'stop_loss': signal.stop_loss,
@@ -413,176 +495,170 @@ class ImprovedTradingBot:
         except Exception as e:
             print(f"❌ Критическая ошибка: {e}")
         finally:
+            if self._catch_up_task:
+                self._catch_up_task.cancel()
+            await self.pipeline.stop()
+            if self.catch_up:
+                self.catch_up.flush()  # последние отметки после остановки конвейера
+            self.signal_manager.close()
+            if self.watcher:
+                self.watcher.stop()
+                await self.watcher.flush()  # события планов, ещё не записанные в positions/orders
+            if self.storage:
+                await self.storage.stop()
+            if self.price_stream:
+                await self.price_stream.stop()
+            await close_transports()
             if self.client:
                 await self.client.disconnect()
 
 
 class SignalManager:
-    def __init__(self, filename: str = 'signals_history.json'):
+    def __init__(self, filename: str = 'signals_history.json', bloom: bool = SIGNAL_DEDUPE_BLOOM):
         self.filename = filename
-        self.signals: list[TradingSignal] = []
+        # Новые сигналы дописываются в журнал; снапшот пересобирается при старте/остановке
+        # и каждые JOURNAL_COMPACT_EVERY записей
+        self.journal = SignalJournal(filename)
+        # Дедупликация по (channel_id, message_id) за O(1); Bloom-фильтр — чтобы не читать историю на старте
+        bloom_path = os.path.splitext(filename)[0] + '.bloom' if bloom else None
+        self.index = SignalIndex(self.journal, bloom_path=bloom_path)
+        self.count = 0
 
     def load_signals(self):
         try:
-            if os.path.exists(self.filename):
-                with open(self.filename, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                for item in data:
-                    self.signals.append(TradingSignal(
-                        message_id=item['message_id'],
-                        channel_name=item['channel_name'],
-                        position_type=item['position_type'],
-                        entry_price=item.get('entry_price'),
-                        stop_loss=item.get('stop_loss'),
-                        take_profits=item.get('take_profits', []),
-                        risk_percent=item.get('risk_percent'),
-                        leverage=item.get('leverage'),
-                        timestamp=item.get('timestamp'),
-                        raw_text=item.get('raw_text', '')
-                    ))
-                print(f"✅ Загружено {len(self.signals)} сигналов из истории")
+            self.count = self.index.load()
+            # Сворачиваем журнал прошлого запуска в снапшот
+            self.journal.compact()
+            self.index.save()
+            print(f"✅ Загружено {self.count} сигналов из истории")
         except Exception as e:
             print(f"❌ Ошибка загрузки истории сигналов: {e}")
 
     def add_signal(self, signal: TradingSignal):
-        for s in self.signals:
-            if s.message_id == signal.message_id and s.channel_name == signal.channel_name:
-                return False
-        self.signals.append(signal)
-        self.save_signals()
+        key = signal_key(getattr(signal, 'channel_id', None), signal.channel_name, signal.message_id)
+        if key in self.index:
+            return False
+        self.index.add(key)
+        self.count += 1
+        try:
+            self.journal.append(signal_record(signal))
+        except Exception as e:
+            print(f"❌ Ошибка сохранения сигнала: {e}")
         return True
 
     def save_signals(self):
+        """Сворачивает журнал в снапшот signals_history.json"""
+        try:
+            self.journal.compact()
+            self.index.save()
+        except Exception as e:
+            print(f"❌ Ошибка сохранения сигналов: {e}")
+
+    def close(self):
         try:
-            data = []
-            for s in self.signals:
-                data.append({
-                    'message_id': s.message_id,
-                    'channel_name': s.channel_name,
-                    'position_type': s.position_type,
-                    'entry_price': s.entry_price,
-                    'stop_loss': s.stop_loss,
-                    'take_profits': s.take_profits,
-                    'risk_percent': s.risk_percent,
-                    'leverage': s.leverage,
-                    'timestamp': s.timestamp,
-                    'raw_text': s.raw_text
-                })
-            with open(self.filename, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            self.journal.close()
+            self.index.save()
         except Exception as e:
             print(f"❌ Ошибка сохранения сигналов: {e}")
 
 
 async def main():
+    # aiogram (~секунды на импорт) и ридер нужны только этому пути запуска
+    from bot.tg_control import start_control_bot
+    from core.signal_reader import start_signal_reader
+
     print("🤖 Запуск signal_reader и control bot")
     print("=" * 60)
     # Check systems before starting services
     await check_systems()
 
     # Start core signal reader (Telethon user-bot) and aiogram control bot in parallel
-    await asyncio.gather(
-        start_signal_reader(),
-        start_control_bot()
-    )
+    try:
+        await asyncio.gather(
+            start_signal_reader(),
+            start_control_bot()
+        )
+    finally:
+        await close_transports()
 
 
 async def check_systems():
     """Run quick health checks for Bitget, Telethon session and Aiogram token.
 
     - Bitget: if DRY_RUN -> print simulation message, else fetch contracts and print count.
-    - Telethon: try to connect with TG_SESSION and report authorization state.
+    - Telethon: connect the shared user client (adapters.user_client) and report
+      authorization state; the reader reuses the same connected client.
     - Aiogram: if TGBOT_TOKEN present and FIRST_OWNER_ID set -> send test message.
     - Print SCALPING/INTRADAY channel names or ❌.
+
+    Checks run concurrently (core/health.py), each under CHECK_TIMEOUT_SEC:
+    start-up waits for the slowest check, not for the sum.
     """
     print("🔎 Running system checks...")
+    results = await run_checks({
+        "bitget": _check_bitget,
+        "telethon": _check_telethon,
+        "aiogram": _check_aiogram,
+    }, timeouts={"bitget": 5.0})
+    for name, result in results.items():
+        if result.error:
+            print(f"❌ {name} check error: {result.error}")
+    print("🎉 Все ключевые системы инициализированы!")
+    return results
 
-    # Bitget
-    try:
-        if DRY_RUN:
-            print("🔧 Bitget: DRY_RUN is enabled — API calls are simulated.")
-        else:
-            try:
-                http = BitgetHTTP()
-                path = "/api/mix/v1/market/contracts"
-                r = http._request("GET", path, {"productType":"umcbl"}, auth=False)
-                if getattr(r, 'status_code', None) == 200:
-                    data = r.json().get('data', [])
-                    print(f"✅ Bitget: contracts fetched — count={len(data)}")
-                else:
-                    print(f"❌ Bitget: request failed {getattr(r,'status_code',None)} {getattr(r,'text', '')}")
-            except Exception as e:
-                print(f"❌ Bitget check error: {e}")
-    except Exception as e:
-        print(f"❌ Bitget check unexpected error: {e}")
 
-    # Telethon session check and channel listing
+async def _check_bitget() -> bool:
+    if DRY_RUN:
+        print("🔧 Bitget: DRY_RUN is enabled — API calls are simulated.")
+        return True
+    # тот же запрос заодно прогревает общий кэш спецификаций (и его копию на диске)
+    data = await contract_specs.refresh_async(PRODUCT_TYPE, BitgetTrader().fetch_contracts_async)
+    print(f"✅ Bitget: contracts fetched — count={len(data)}")
+    return True
+
+
+async def _check_telethon() -> bool:
+    # тот же синглтон, что возьмёт start_signal_reader: соединение и авторизация не повторяются
+    from adapters.user_client import get_user_client
     try:
-        from telethon import TelegramClient
-        tc = TelegramClient(TG_SESSION, API_ID, API_HASH)
-        await tc.connect()
+        tc = await get_user_client()
+    except RuntimeError:
+        print(f"❌ Telethon session '{TG_SESSION}' is NOT authorized — reader will not start to avoid login")
+        return False
+    print(f"✅ Telethon session '{TG_SESSION}' is authorized")
+    # тот же кэш каналов, что у бота: при промахе — один проход по диалогам на оба названия
+    found = await ChannelResolver(tc).resolve_many({
+        "SCALPING": (SCALPING_LINK, SCALPING_NAME),
+        "INTRADAY": (INTRADAY_LINK, INTRADAY_NAME),
+    })
+    scalping_name, intraday_name = (getattr(found[k], 'title', None) for k in ("SCALPING", "INTRADAY"))
+    print("Channels:")
+    print(f"  SCALPING: {scalping_name if scalping_name else '❌ not found'}")
+    print(f"  INTRADAY: {intraday_name if intraday_name else '❌ not found'}")
+    return bool(scalping_name and intraday_name)
+
+
+async def _check_aiogram() -> bool:
+    if not TGBOT_TOKEN:
+        print("❌ TGBOT_TOKEN not set — control bot will not be able to send test message")
+        return False
+    if not FIRST_OWNER_ID:
+        print("❌ TG_OWNER_ID(S) not set — cannot send test message to owner")
+        return False
+    from aiogram import Bot as AiogramBot
+    bot = AiogramBot(token=TGBOT_TOKEN)
+    try:
+        await bot.send_message(FIRST_OWNER_ID, "[healthcheck] Test message from control bot.")
+        print(f"✅ Aiogram: sent test message to owner {FIRST_OWNER_ID}")
+        return True
+    finally:
         try:
-            authorized = await tc.is_user_authorized()
+            await bot.session.close()
         except Exception:
-            authorized = False
-        if authorized:
-            print(f"✅ Telethon session '{TG_SESSION}' is authorized")
-            # Try to resolve channels
-            def _resolve_entity_sync(link_or_name: str):
-                return None
-
-            async def _resolve(link: str, name: str):
-                if link:
-                    try:
-                        ent = await tc.get_entity(link)
-                        title = getattr(ent, 'title', None) or str(ent)
-                        return title
-                    except Exception:
-                        pass
-                if name:
-                    async for dialog in tc.iter_dialogs():
-                        ent = dialog.entity
-                        title = getattr(ent, 'title', '')
-                        if name.lower() in (title or '').lower():
-                            return title
-                return None
-
-            scalping_name = await _resolve(SCALPING_LINK, SCALPING_NAME)
-            intraday_name = await _resolve(INTRADAY_LINK, INTRADAY_NAME)
-            print("Channels:")
-            print(f"  SCALPING: {scalping_name if scalping_name else '❌ not found'}")
-            print(f"  INTRADAY: {intraday_name if intraday_name else '❌ not found'}")
-        else:
-            print(f"❌ Telethon session '{TG_SESSION}' is NOT authorized — reader will not start to avoid login")
-        await tc.disconnect()
-    except Exception as e:
-        print(f"❌ Telethon check error: {e}")
-
-    # Aiogram bot token and test message
-    try:
-        if not TGBOT_TOKEN:
-            print("❌ TGBOT_TOKEN not set — control bot will not be able to send test message")
-        elif not FIRST_OWNER_ID:
-            print("❌ TG_OWNER_ID(S) not set — cannot send test message to owner")
-        else:
             try:
-                bot = AiogramBot(token=TGBOT_TOKEN)
-                await bot.send_message(FIRST_OWNER_ID, "[healthcheck] Test message from control bot.")
-                print(f"✅ Aiogram: sent test message to owner {FIRST_OWNER_ID}")
-            except Exception as e:
-                print(f"❌ Aiogram test message failed: {e}")
-            finally:
-                try:
-                    await bot.session.close()
-                except Exception:
-                    try:
-                        await bot.close()
-                    except Exception:
-                        pass
-    except Exception as e:
-        print(f"❌ Aiogram check error: {e}")
-
-    print("🎉 Все ключевые системы инициализированы!")
+                await bot.close()
+            except Exception:
+                pass
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,141 @@
+# market/bitget_batch.py
+"""Пакетное размещение ордеров Bitget (/api/mix/v1/order/batch-orders).
+
+Лестница тейков уходит одним запросом на каждые BATCH_ORDER_LIMIT заявок
+вместо placeOrder на каждый уровень. Заявки помечаются clientOid: ответ
+биржи делится на orderInfo (принятые) и failure (отклонённые), и повтор
+отправляет только отклонённые — с теми же clientOid, так что уже принятые
+заявки не задваиваются. Ошибка всего запроса (сеть, не 200) считается
+отказом всех заявок пачки.
+
+Отправка (send) задаётся вызывающим: BitgetTrader и BitgetClient по-разному
+подписывают запросы, общая здесь только логика пачек и повторов.
+"""
+import asyncio
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+BATCH_ORDER_PATH = "/api/mix/v1/order/batch-orders"
+BATCH_ORDER_LIMIT = 50  # заявок в одном batch-orders (лимит API)
+
+
+@dataclass
+class BatchOutcome:
+    placed: Dict[str, str] = field(default_factory=dict)   # clientOid -> orderId
+    failed: Dict[str, str] = field(default_factory=dict)   # clientOid -> ошибка
+    requests: int = 0
+    attempts: int = 0
+
+    @property
+    def ok(self) -> bool:
+        return not self.failed
+
+
+class BatchOrderError(RuntimeError):
+    """Часть заявок так и не принята; result — то, что всё же размещено"""
+
+    def __init__(self, outcome: BatchOutcome, result: Any = None):
+        errors = ', '.join(f"{oid}: {err}" for oid, err in outcome.failed.items())
+        super().__init__(f"Не размещено {len(outcome.failed)} из "
+                         f"{len(outcome.failed) + len(outcome.placed)}: {errors}")
+        self.outcome = outcome
+        self.result = result
+
+
+def new_client_oid(prefix: str = "tp") -> str:
+    return f"{prefix}-{uuid.uuid4().hex[:16]}"
+
+
+def batch_body(symbol: str, margin_coin: str, orders: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+    return {"symbol": symbol, "marginCoin": margin_coin, "orderDataList": list(orders)}
+
+
+def dry_run_payload(orders: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+    """Ответ batch-orders для DRY_RUN: все заявки приняты"""
+    return {"code": "00000", "data": {
+        "orderInfo": [{"orderId": f"dry_run_{o['clientOid']}", "clientOid": o["clientOid"]} for o in orders],
+        "failure": [],
+    }}
+
+
+def split_response(payload: Dict[str, Any], orders: Sequence[Dict[str, Any]]) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """Ответ batch-orders -> (принятые, отклонённые) по clientOid"""
+    sent = [o["clientOid"] for o in orders]
+    if payload.get("error") or payload.get("code") not in (None, "00000"):
+        error = str(payload.get("error") or payload.get("msg") or payload.get("code"))
+        return {}, {oid: error for oid in sent}
+    data = payload.get("data") or {}
+    placed = {row["clientOid"]: str(row.get("orderId", "")) for row in data.get("orderInfo") or []
+              if row.get("clientOid")}
+    failed = {row["clientOid"]: str(row.get("errorMsg") or row.get("errorCode") or "rejected")
+              for row in data.get("failure") or [] if row.get("clientOid")}
+    for oid in sent:  # биржа не упомянула заявку — считаем неразмещённой
+        if oid not in placed and oid not in failed:
+            failed[oid] = "no acknowledgement"
+    return {oid: placed[oid] for oid in sent if oid in placed}, {oid: failed[oid] for oid in sent if oid in failed}
+
+
+def _chunks(orders: Sequence[Dict[str, Any]], size: int) -> List[List[Dict[str, Any]]]:
+    return [list(orders[i:i + size]) for i in range(0, len(orders), size)]
+
+
+def _merge(outcome: BatchOutcome, chunk, payload_or_error) -> None:
+    outcome.requests += 1
+    if isinstance(payload_or_error, Exception):
+        placed, failed = {}, {o["clientOid"]: str(payload_or_error) for o in chunk}
+    else:
+        placed, failed = split_response(payload_or_error, chunk)
+    outcome.placed.update(placed)
+    for oid in placed:
+        outcome.failed.pop(oid, None)
+    outcome.failed.update(failed)
+
+
+def submit_batches(send: Callable[[List[Dict[str, Any]]], Dict[str, Any]],
+                   orders: Sequence[Dict[str, Any]], retries: int = 2,
+                   retry_delay_sec: float = 0.2, limit: int = BATCH_ORDER_LIMIT) -> BatchOutcome:
+    """send(chunk) -> JSON-ответ batch-orders; повторяются только отклонённые clientOid"""
+    outcome = BatchOutcome()
+    pending = list(orders)
+    for attempt in range(retries + 1):
+        outcome.attempts = attempt + 1
+        for chunk in _chunks(pending, limit):
+            try:
+                _merge(outcome, chunk, send(chunk))
+            except Exception as e:
+                _merge(outcome, chunk, e)
+        pending = [o for o in pending if o["clientOid"] in outcome.failed]
+        if not pending:
+            break
+        if attempt < retries:
+            logger.warning(f"batch-orders: повтор {len(pending)} заявок ({attempt + 1}/{retries})")
+            time.sleep(retry_delay_sec * (attempt + 1))
+    return outcome
+
+
+async def submit_batches_async(send: Callable[[List[Dict[str, Any]]], Awaitable[Dict[str, Any]]],
+                               orders: Sequence[Dict[str, Any]], retries: int = 2,
+                               retry_delay_sec: float = 0.2, limit: int = BATCH_ORDER_LIMIT) -> BatchOutcome:
+    """submit_batches для asyncio: пачки одной попытки уходят параллельно"""
+    outcome = BatchOutcome()
+    pending = list(orders)
+    for attempt in range(retries + 1):
+        outcome.attempts = attempt + 1
+        chunks = _chunks(pending, limit)
+        payloads = await asyncio.gather(*(send(chunk) for chunk in chunks), return_exceptions=True)
+        for chunk, payload in zip(chunks, payloads):
+            if isinstance(payload, asyncio.CancelledError):
+                raise payload
+            _merge(outcome, chunk, payload)
+        pending = [o for o in pending if o["clientOid"] in outcome.failed]
+        if not pending:
+            break
+        if attempt < retries:
+            logger.warning(f"batch-orders: повтор {len(pending)} заявок ({attempt + 1}/{retries})")
+            await asyncio.sleep(retry_delay_sec * (attempt + 1))
+    return outcome
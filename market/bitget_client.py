@@ -1,11 +1,14 @@
 import time
 import hmac
 import hashlib
-import requests
+import httpx
 import json
 from typing import Dict, Any, Optional, List
 from urllib.parse import urlencode
-from config.settings import settings
+from config.settings import get_settings
+from market.bitget_transport import get_transport
+from market.rate_limit import CircuitOpenError, bitget_limiter
+from market.bitget_batch import BATCH_ORDER_PATH, batch_body, dry_run_payload
 import logging
 
 logger = logging.getLogger(__name__)
@@ -14,6 +17,7 @@ class BitgetClient:
     """Клиент для работы с Bitget API"""
     
     def __init__(self):
+        settings = get_settings()
         self.api_key = settings.bitget.api_key
         self.api_secret = settings.bitget.api_secret
         self.passphrase = settings.bitget.passphrase
@@ -21,13 +25,25 @@ class BitgetClient:
         self.market = settings.bitget.market
         self.symbol = settings.bitget.symbol
         self.dry_run = settings.behavior.dry_run
-        
-        self.session = requests.Session()
-        self.session.headers.update({
-            'Content-Type': 'application/json',
-            'ACCESS-KEY': self.api_key,
-            'ACCESS-PASSPHRASE': self.passphrase
-        })
+        self.equity_usdt = settings.risk.equity_usdt
+
+        self._session = None
+        # общий asyncio-транспорт (пул соединений) для *_async методов
+        self.transport = get_transport(self.base_url)
+        self.limiter = bitget_limiter
+
+    @property
+    def session(self):
+        """requests.Session для синхронных вызовов — создаётся при первом запросе"""
+        if self._session is None:
+            import requests
+            self._session = requests.Session()
+            self._session.headers.update({
+                'Content-Type': 'application/json',
+                'ACCESS-KEY': self.api_key,
+                'ACCESS-PASSPHRASE': self.passphrase
+            })
+        return self._session
     
     def _generate_signature(self, timestamp: str, method: str, request_path: str, body: str = '') -> str:
         """Генерация подписи для API запросов"""
@@ -39,9 +55,8 @@ class BitgetClient:
         ).hexdigest()
         return signature
     
-    def _make_request(self, method: str, endpoint: str, params: Dict = None, data: Dict = None) -> Dict[str, Any]:
-        """Выполнение HTTP запроса к API"""
-        url = f"{self.base_url}{endpoint}"
+    def _prepare_request(self, method: str, endpoint: str, params: Dict = None, data: Dict = None):
+        """Тело запроса и подписанные заголовки (общие для sync и async)"""
         timestamp = str(int(time.time() * 1000))
         
         # Подготовка параметров
@@ -65,33 +80,60 @@ class BitgetClient:
             'ACCESS-PASSPHRASE': self.passphrase,
             'Content-Type': 'application/json'
         }
-        
-        try:
+        return body, headers
+
+    def _make_request(self, method: str, endpoint: str, params: Dict = None, data: Dict = None) -> Dict[str, Any]:
+        """Выполнение HTTP запроса к API (через общий лимитер market/rate_limit.py)"""
+        if method not in ('GET', 'POST', 'DELETE'):
+            raise ValueError(f"Неподдерживаемый метод: {method}")
+        import requests
+        url = f"{self.base_url}{endpoint}"
+
+        def send():
+            # заголовки с подписью — заново на каждую попытку (метка времени)
+            body, headers = self._prepare_request(method, endpoint, params, data)
             if method == 'GET':
-                response = self.session.get(url, params=params, headers=headers)
-            elif method == 'POST':
-                response = self.session.post(url, json=data, headers=headers)
-            elif method == 'DELETE':
-                response = self.session.delete(url, json=data, headers=headers)
-            else:
-                raise ValueError(f"Неподдерживаемый метод: {method}")
-            
+                return self.session.get(url, params=params, headers=headers)
+            return self.session.request(method, url, json=data, headers=headers)
+
+        try:
+            response = self.limiter.call(method, endpoint, send)
             response.raise_for_status()
             return response.json()
             
-        except requests.exceptions.RequestException as e:
+        except (requests.exceptions.RequestException, CircuitOpenError) as e:
             logger.error(f"Ошибка API запроса: {e}")
             return {'error': str(e)}
-    
+
+    async def _make_request_async(self, method: str, endpoint: str, params: Dict = None, data: Dict = None,
+                                  timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Асинхронный _make_request через общий транспорт (keep-alive, без блокировки цикла)"""
+        if method not in ('GET', 'POST', 'DELETE'):
+            raise ValueError(f"Неподдерживаемый метод: {method}")
+
+        async def send():
+            body, headers = self._prepare_request(method, endpoint, params, data)
+            return await self.transport.request(
+                method, endpoint, params=params, content=body or None, headers=headers, timeout=timeout
+            )
+
+        try:
+            response = await self.limiter.call_async(method, endpoint, send)
+            response.raise_for_status()
+            return response.json()
+        except (httpx.HTTPError, CircuitOpenError) as e:
+            logger.error(f"Ошибка API запроса: {e}")
+            return {'error': str(e)}
+
     def get_account_info(self) -> Dict[str, Any]:
         """Получение информации об аккаунте"""
         if self.dry_run:
             return {
                 'code': '00000',
                 'data': {
-                    'totalEquity': settings.risk.equity_usdt,
-                    'availableBalance': settings.risk.equity_usdt * 0.9,
-                    'marginBalance': settings.risk.equity_usdt
+                    'totalEquity': self.equity_usdt,
+                    'availableBalance': self.equity_usdt * 0.9,
+                    'marginBalance': self.equity_usdt
                 }
             }
         
@@ -140,6 +182,14 @@ class BitgetClient:
         
         return self._make_request('POST', '/api/mix/v1/order/placeOrder', data=order_data)
     
+    def place_batch_orders(self, symbol: str, orders: List[Dict[str, Any]],
+                           margin_coin: str = 'USDT') -> Dict[str, Any]:
+        """Пакетное размещение (у каждой заявки clientOid, см. market/bitget_batch.py)"""
+        if self.dry_run:
+            logger.info(f"DRY_RUN: Пакет из {len(orders)} ордеров {orders}")
+            return dry_run_payload(orders)
+        return self._make_request('POST', BATCH_ORDER_PATH, data=batch_body(symbol, margin_coin, orders))
+
     def cancel_order(self, symbol: str, order_id: str) -> Dict[str, Any]:
         """Отмена ордера"""
         if self.dry_run:
@@ -223,6 +273,56 @@ class BitgetClient:
         }
         return self._make_request('POST', '/api/mix/v1/account/setLeverage', data=data)
     
+    # ===== Awaitable-версии для asyncio-хендлеров (DRY_RUN отвечает без сети) =====
+    async def get_ticker_async(self, symbol: str = None) -> Dict[str, Any]:
+        params = {'symbol': symbol or self.symbol}
+        return await self._make_request_async('GET', '/api/mix/v1/market/ticker', params)
+
+    async def place_order_async(self, order_data: Dict[str, Any]) -> Dict[str, Any]:
+        if self.dry_run:
+            return self.place_order(order_data)
+        return await self._make_request_async('POST', '/api/mix/v1/order/placeOrder', data=order_data)
+
+    async def place_batch_orders_async(self, symbol: str, orders: List[Dict[str, Any]],
+                                       margin_coin: str = 'USDT') -> Dict[str, Any]:
+        if self.dry_run:
+            return self.place_batch_orders(symbol, orders, margin_coin)
+        return await self._make_request_async('POST', BATCH_ORDER_PATH, data=batch_body(symbol, margin_coin, orders))
+
+    async def cancel_order_async(self, symbol: str, order_id: str) -> Dict[str, Any]:
+        if self.dry_run:
+            return self.cancel_order(symbol, order_id)
+        data = {
+            'symbol': symbol,
+            'orderId': order_id
+        }
+        return await self._make_request_async('POST', '/api/mix/v1/order/cancelOrder', data=data)
+
+    async def get_order_status_async(self, symbol: str, order_id: str) -> Dict[str, Any]:
+        if self.dry_run:
+            return self.get_order_status(symbol, order_id)
+        params = {
+            'symbol': symbol,
+            'orderId': order_id
+        }
+        return await self._make_request_async('GET', '/api/mix/v1/order/detail', params)
+
+    async def get_open_orders_async(self, symbol: str = None) -> Dict[str, Any]:
+        if self.dry_run:
+            return self.get_open_orders(symbol)
+        params = {'symbol': symbol or self.symbol}
+        return await self._make_request_async('GET', '/api/mix/v1/order/current', params)
+
+    async def set_leverage_async(self, symbol: str, leverage: int, margin_coin: str = 'USDT') -> Dict[str, Any]:
+        if self.dry_run:
+            return self.set_leverage(symbol, leverage, margin_coin)
+        data = {
+            'symbol': symbol,
+            'leverage': leverage,
+            'marginCoin': margin_coin
+        }
+        return await self._make_request_async('POST', '/api/mix/v1/account/setLeverage', data=data)
+    
     def get_market_data(self, symbol: str = None, granularity: str = '1m', limit: int = 100) -> Dict[str, Any]:
         """Получение исторических данных"""
         params = {
@@ -280,5 +380,19 @@ class BitgetClient:
         
         return self.place_order(order_data)
 
-# Глобальный экземпляр клиента
-bitget_client = BitgetClient()
+# Глобальный экземпляр клиента: создаётся при первом обращении
+# (market.bitget_client.bitget_client / get_bitget_client()), не при импорте
+_bitget_client: Optional[BitgetClient] = None
+
+
+def get_bitget_client() -> BitgetClient:
+    global _bitget_client
+    if _bitget_client is None:
+        _bitget_client = BitgetClient()
+    return _bitget_client
+
+
+def __getattr__(name: str):
+    if name == "bitget_client":
+        return get_bitget_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,117 @@
+# market/bitget_transport.py
+"""Общий асинхронный HTTP-транспорт к Bitget.
+
+Один httpx.AsyncClient на base URL: пул соединений с keep-alive, HTTP/2,
+если установлен пакет h2, и таймауты на каждый запрос. Им пользуются
+BitgetTrader (bitget_integration.py), BitgetClient (market/bitget_client.py)
+и Watcher — TLS-рукопожатие делается один раз, а не на каждый вызов.
+
+httpx.AsyncClient привязан к циклу событий, поэтому клиент пересоздаётся,
+если транспорт используют из другого цикла (например, повторный asyncio.run).
+Старый клиент при этом не должен течь: вместе с клиентом в его цикле
+заводится задача-закрыватель, и asyncio.run, отменяя оставшиеся задачи перед
+loop.close(), закрывает пул, пока цикл ещё жив. Если старый цикл ещё
+работает в другом потоке — клиент закрывается в нём.
+"""
+import asyncio
+import importlib.util
+import logging
+from typing import Any, Dict, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# Ордерные запросы короткие: быстрый connect, умеренное чтение
+DEFAULT_TIMEOUT = httpx.Timeout(10.0, connect=3.0, pool=5.0)
+DEFAULT_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60.0)
+
+
+class BitgetTransport:
+    """Пул соединений к одному base URL"""
+
+    def __init__(self, base_url: str, timeout: httpx.Timeout = DEFAULT_TIMEOUT,
+                 limits: httpx.Limits = DEFAULT_LIMITS, http2: Optional[bool] = None,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.limits = limits
+        self.http2 = HTTP2_AVAILABLE if http2 is None else http2
+        self._transport = transport  # подмена в тестах (httpx.MockTransport)
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._closer: Optional[asyncio.Task] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._loop is not loop:
+            self._release(loop)
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=self.limits,
+                http2=self.http2,
+                transport=self._transport,
+            )
+            self._loop = loop
+            self._closer = loop.create_task(self._close_with_loop(self._client))
+        return self._client
+
+    def _release(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Старый клиент при смене цикла: закрыть в его собственном цикле"""
+        client, old_loop = self._client, self._loop
+        if client is None or client.is_closed or old_loop is None or old_loop is loop:
+            return
+        if old_loop.is_running() and not old_loop.is_closed():
+            asyncio.run_coroutine_threadsafe(client.aclose(), old_loop)
+        else:
+            logger.debug(f"Клиент {self.base_url} остался от закрытого цикла без закрытия")
+
+    @staticmethod
+    async def _close_with_loop(client: httpx.AsyncClient) -> None:
+        try:
+            await asyncio.get_running_loop().create_future()  # до отмены при остановке цикла
+        finally:
+            if not client.is_closed:
+                await client.aclose()
+
+    async def request(self, method: str, path: str, *, params: Optional[Dict[str, Any]] = None,
+                      content: Optional[str] = None, headers: Optional[Dict[str, str]] = None,
+                      timeout: Optional[float] = None) -> httpx.Response:
+        """path — относительный (/api/mix/v1/...); timeout перекрывает таймаут по умолчанию"""
+        return await self.client.request(
+            method, path, params=params, content=content, headers=headers,
+            timeout=timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT,
+        )
+
+    async def aclose(self) -> None:
+        client, self._client, self._loop = self._client, None, None
+        closer, self._closer = self._closer, None
+        if client is not None and not client.is_closed:
+            await client.aclose()
+        if closer is not None:
+            closer.cancel()
+
+
+_transports: Dict[str, BitgetTransport] = {}
+
+
+def get_transport(base_url: str) -> BitgetTransport:
+    """Общий транспорт для base URL (создаётся при первом обращении)"""
+    key = base_url.rstrip("/")
+    transport = _transports.get(key)
+    if transport is None:
+        transport = _transports[key] = BitgetTransport(key)
+    return transport
+
+
+async def close_transports() -> None:
+    """Закрыть все пулы (при остановке бота)"""
+    for transport in list(_transports.values()):
+        try:
+            await transport.aclose()
+        except Exception as e:
+            logger.warning(f"Ошибка закрытия транспорта {transport.base_url}: {e}")
@@ -0,0 +1,219 @@
+# market/contract_specs.py
+"""Общий на процесс кэш спецификаций контрактов Bitget.
+
+Список /api/mix/v1/market/contracts — сотни килобайт, а шаги цены/объёма
+меняются редко. Строки контрактов хранятся по (symbol, productType):
+
+- свежие (моложе ttl_sec) отдаются сразу;
+- устаревшие тоже отдаются сразу, а обновление уходит в фон
+  (поток для sync-вызова, задача цикла для async);
+- копия лежит на диске, поэтому после рестарта первый сигнал берёт шаги
+  из файла и не ждёт загрузки; старше max_stale_sec копия не используется;
+- одновременные промахи по одному productType качают список один раз.
+
+Загрузку (fetch(product_type) -> список строк) передаёт вызывающий —
+у BitgetTrader это fetch_contracts / fetch_contracts_async.
+"""
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SPEC_CACHE_PATH = os.getenv("BITGET_SPEC_CACHE") or "data/contract_specs.json"
+SPEC_TTL_SEC = float(os.getenv("BITGET_SPEC_TTL_SEC") or 6 * 3600)
+SPEC_MAX_STALE_SEC = 7 * 24 * 3600
+
+Rows = List[Dict[str, Any]]
+
+
+class ContractSpecCache:
+    """Строки контрактов по (symbol, productType) с TTL и копией на диске"""
+
+    def __init__(self, path: Optional[str] = SPEC_CACHE_PATH, ttl_sec: float = SPEC_TTL_SEC,
+                 max_stale_sec: float = SPEC_MAX_STALE_SEC):
+        self.path = path
+        self.ttl_sec = ttl_sec
+        self.max_stale_sec = max_stale_sec
+        self._rows: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._fetched_at: Dict[str, float] = {}  # productType -> time.time() загрузки
+        self._lock = threading.Lock()
+        self._fetch_locks: Dict[str, threading.Lock] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._refreshing: set = set()
+        self._loaded = False
+        self.fetches = 0
+
+    @staticmethod
+    def _key(symbol: str, product_type: str) -> Tuple[str, str]:
+        return symbol.upper(), product_type.lower()
+
+    # ===== Диск =====
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            if not self.path or not os.path.exists(self.path):
+                return
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    saved = json.load(f)
+                for product_type, entry in saved.get('product_types', {}).items():
+                    self._store(product_type, entry.get('rows', []), float(entry.get('fetched_at', 0)))
+                logger.info(f"Спецификации контрактов загружены с диска: {self.path}")
+            except (OSError, ValueError) as e:
+                logger.warning(f"Не удалось прочитать кэш спецификаций {self.path}: {e}")
+
+    def save(self) -> None:
+        """Атомарная запись: tmp + os.replace"""
+        if not self.path:
+            return
+        with self._lock:
+            product_types = {
+                pt: {'fetched_at': fetched_at,
+                     'rows': [row for (_, row_pt), row in self._rows.items() if row_pt == pt]}
+                for pt, fetched_at in self._fetched_at.items()
+            }
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({'version': 1, 'product_types': product_types}, f, ensure_ascii=False)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            logger.warning(f"Не удалось сохранить кэш спецификаций {self.path}: {e}")
+
+    # ===== Содержимое =====
+    def _store(self, product_type: str, rows: Rows, fetched_at: float) -> None:
+        product_type = product_type.lower()
+        for key in [k for k in self._rows if k[1] == product_type]:
+            del self._rows[key]
+        for row in rows:
+            if row.get('symbol'):
+                self._rows[self._key(row['symbol'], product_type)] = row
+        self._fetched_at[product_type] = fetched_at
+
+    def put(self, product_type: str, rows: Rows, fetched_at: Optional[float] = None, persist: bool = True) -> None:
+        """Заменить все строки productType свежим списком"""
+        self._ensure_loaded()
+        with self._lock:
+            self._store(product_type, rows, time.time() if fetched_at is None else fetched_at)
+        if persist:
+            self.save()
+
+    def age(self, product_type: str) -> Optional[float]:
+        self._ensure_loaded()
+        fetched_at = self._fetched_at.get(product_type.lower())
+        return None if fetched_at is None else max(0.0, time.time() - fetched_at)
+
+    def peek(self, symbol: str, product_type: str) -> Optional[Dict[str, Any]]:
+        """Строка без загрузки и без учёта возраста"""
+        self._ensure_loaded()
+        return self._rows.get(self._key(symbol, product_type))
+
+    def _usable(self, product_type: str) -> Tuple[bool, bool]:
+        """(можно отдать из кэша, пора обновить в фоне)"""
+        age = self.age(product_type)
+        if age is None or age > self.max_stale_sec:
+            return False, False
+        return True, age > self.ttl_sec
+
+    def clear(self) -> None:
+        with self._lock:
+            self._rows.clear()
+            self._fetched_at.clear()
+            self._loaded = True
+
+    # ===== Загрузка: sync =====
+    def refresh(self, product_type: str, fetch: Callable[[str], Rows]) -> Rows:
+        """Загрузить список сейчас (один поток на productType, остальные ждут результат)"""
+        product_type = product_type.lower()
+        with self._lock:
+            fetch_lock = self._fetch_locks.setdefault(product_type, threading.Lock())
+        started = time.time()
+        with fetch_lock:
+            fetched_at = self._fetched_at.get(product_type)
+            if fetched_at is not None and fetched_at >= started:
+                # пока ждали замок, список скачал другой поток
+                return [row for (_, pt), row in self._rows.items() if pt == product_type]
+            rows = fetch(product_type)
+            self.fetches += 1
+            self.put(product_type, rows)
+            return rows
+
+    def _refresh_in_background(self, product_type: str, fetch: Callable[[str], Rows]) -> None:
+        with self._lock:
+            if product_type in self._refreshing:
+                return
+            self._refreshing.add(product_type)
+
+        def run():
+            try:
+                self.refresh(product_type, fetch)
+            except Exception as e:
+                logger.warning(f"Фоновое обновление спецификаций {product_type} не удалось: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(product_type)
+
+        threading.Thread(target=run, name=f'spec-refresh-{product_type}', daemon=True).start()
+
+    def get(self, symbol: str, product_type: str, fetch: Callable[[str], Rows]) -> Optional[Dict[str, Any]]:
+        """Строка контракта; None — символа нет в списке биржи"""
+        self._ensure_loaded()
+        usable, stale = self._usable(product_type)
+        if not usable:
+            self.refresh(product_type, fetch)
+        elif stale:
+            self._refresh_in_background(product_type.lower(), fetch)
+        return self.peek(symbol, product_type)
+
+    # ===== Загрузка: async =====
+    def _refresh_task(self, product_type: str, fetch: Callable[[str], Awaitable[Rows]]) -> asyncio.Task:
+        task = self._inflight.get(product_type)
+        if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+            task = self._inflight[product_type] = asyncio.ensure_future(self._fetch_and_put(product_type, fetch))
+        return task
+
+    async def refresh_async(self, product_type: str, fetch: Callable[[str], Awaitable[Rows]]) -> Rows:
+        """Загрузить список сейчас; одновременные вызовы ждут одну и ту же задачу"""
+        return await asyncio.shield(self._refresh_task(product_type.lower(), fetch))
+
+    async def _fetch_and_put(self, product_type: str, fetch: Callable[[str], Awaitable[Rows]]) -> Rows:
+        try:
+            rows = await fetch(product_type)
+            self.fetches += 1
+            # запись файла — в поток, чтобы не держать цикл событий
+            await asyncio.to_thread(self.put, product_type, rows)
+            return rows
+        finally:
+            if self._inflight.get(product_type) is asyncio.current_task():
+                del self._inflight[product_type]
+
+    async def get_async(self, symbol: str, product_type: str,
+                        fetch: Callable[[str], Awaitable[Rows]]) -> Optional[Dict[str, Any]]:
+        self._ensure_loaded()
+        usable, stale = self._usable(product_type)
+        if not usable:
+            await self.refresh_async(product_type, fetch)
+        elif stale and product_type.lower() not in self._inflight:
+            self._refresh_task(product_type.lower(), fetch).add_done_callback(self._log_background_failure)
+        return self.peek(symbol, product_type)
+
+    @staticmethod
+    def _log_background_failure(task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Фоновое обновление спецификаций не удалось: {task.exception()}")
+
+
+# Глобальный кэш спецификаций
+contract_specs = ContractSpecCache()
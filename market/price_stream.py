@@ -0,0 +1,199 @@
+# market/price_stream.py
+"""Поток цен Bitget по WebSocket вместо опроса REST раз в несколько секунд.
+
+TickerStream подписывается на ticker (или trade) по символам и отдаёт каждый
+тик слушателям (Watcher.on_tick и т.п.) сразу по приходу. Соединение
+держится само:
+
+- heartbeat: текстовый "ping" раз в ping_interval_sec (так требует Bitget),
+  соединение без сообщений дольше stale_after_sec считается мёртвым;
+- переподключение с экспоненциальной задержкой и джиттером, после
+  переподключения подписка восстанавливается;
+- last_price(symbol) — последняя цена для синхронных потребителей;
+- add_symbol(symbol) — досписаться на лету (новый план по другому символу).
+
+[Неподтверждено] формат Bitget mix v1 public WS:
+subscribe {"op":"subscribe","args":[{"instType":"mc","channel":"ticker","instId":"BTCUSDT"}]}
+push      {"action":"snapshot","arg":{...,"instId":"BTCUSDT"},"data":[{"last":"...","ts":...}]}
+trade     data: [["ts","price","size","side"], ...]
+"""
+import asyncio
+import inspect
+import json
+import logging
+import os
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+BITGET_WS_URL = os.getenv("BITGET_WS_URL") or "wss://ws.bitget.com/mix/v1/stream"
+
+
+@dataclass
+class Tick:
+    symbol: str
+    price: float
+    ts: float          # время биржи (сек), если пришло, иначе локальное
+    received: float    # time.monotonic() приёма — для замеров задержки
+
+
+class TickerStream:
+    """Подписка на цены с автопереподключением"""
+
+    def __init__(self, symbols: Iterable[str] = ("BTCUSDT",), url: str = BITGET_WS_URL,
+                 channel: str = "ticker", inst_type: str = "mc",
+                 ping_interval_sec: float = 25.0, stale_after_sec: float = 60.0,
+                 reconnect_min_sec: float = 0.5, reconnect_max_sec: float = 30.0):
+        self.symbols = [s.upper() for s in symbols]
+        self.url = url
+        self.channel = channel
+        self.inst_type = inst_type
+        self.ping_interval_sec = ping_interval_sec
+        self.stale_after_sec = stale_after_sec
+        self.reconnect_min_sec = reconnect_min_sec
+        self.reconnect_max_sec = reconnect_max_sec
+        self.connected = asyncio.Event()
+        self.connects = 0
+        self.ticks = 0
+        self._listeners: List[Callable[[Tick], Any]] = []
+        self._last: Dict[str, Tick] = {}
+        self._stopped = False
+        self._ws: Optional[aiohttp.ClientWebSocketResponse] = None
+
+    def add_listener(self, listener: Callable[[Tick], Any]) -> None:
+        """listener(tick) — функция или корутина; вызывается по порядку тиков"""
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[Tick], Any]) -> None:
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def add_symbol(self, symbol: str) -> None:
+        """Добавить символ; на открытом соединении подписка уходит сразу, иначе — при подключении"""
+        symbol = symbol.upper()
+        if symbol in self.symbols:
+            return
+        self.symbols.append(symbol)
+        ws = self._ws
+        if ws is not None and not ws.closed:
+            try:
+                asyncio.get_running_loop().create_task(ws.send_str(self._subscribe_message([symbol])))
+            except RuntimeError:
+                pass  # нет цикла событий — подпишемся при следующем подключении
+
+    def last_price(self, symbol: str = "BTCUSDT") -> Optional[float]:
+        tick = self._last.get(symbol.upper())
+        return tick.price if tick else None
+
+    def last_tick(self, symbol: str = "BTCUSDT") -> Optional[Tick]:
+        return self._last.get(symbol.upper())
+
+    def _subscribe_message(self, symbols: Optional[Iterable[str]] = None) -> str:
+        args = [{"instType": self.inst_type, "channel": self.channel, "instId": s}
+                for s in (self.symbols if symbols is None else symbols)]
+        return json.dumps({"op": "subscribe", "args": args})
+
+    @staticmethod
+    def parse(message: str) -> List[Tick]:
+        """Сообщение WS -> тики (пусто для служебных: pong, event=subscribe, error)"""
+        if message == "pong":
+            return []
+        try:
+            payload = json.loads(message)
+        except ValueError:
+            return []
+        if not isinstance(payload, dict) or "data" not in payload:
+            if isinstance(payload, dict) and payload.get("event") == "error":
+                logger.warning(f"[PriceStream] ошибка подписки: {payload}")
+            return []
+        symbol = str((payload.get("arg") or {}).get("instId", "")).upper()
+        now = time.monotonic()
+        ticks = []
+        for row in payload.get("data") or []:
+            try:
+                if isinstance(row, dict):  # ticker
+                    price = float(row.get("last") or row.get("lastPr"))
+                    ts = float(row.get("ts") or row.get("systemTime") or time.time() * 1000) / 1000
+                    ticks.append(Tick(str(row.get("instId") or symbol).upper(), price, ts, now))
+                else:  # trade: [ts, price, size, side]
+                    ticks.append(Tick(symbol, float(row[1]), float(row[0]) / 1000, now))
+            except (TypeError, ValueError, IndexError):
+                continue
+        return ticks
+
+    async def _dispatch(self, tick: Tick) -> None:
+        self._last[tick.symbol] = tick
+        self.ticks += 1
+        for listener in list(self._listeners):
+            try:
+                result = listener(tick)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.error(f"[PriceStream] listener error: {e}")
+
+    async def _pinger(self, ws: aiohttp.ClientWebSocketResponse) -> None:
+        while not ws.closed:
+            await asyncio.sleep(self.ping_interval_sec)
+            await ws.send_str("ping")
+
+    async def _session(self, http: aiohttp.ClientSession) -> bool:
+        """Одно соединение до разрыва; True — если успели получить данные"""
+        got_data = False
+        async with http.ws_connect(self.url, autoping=True) as ws:
+            self._ws = ws
+            await ws.send_str(self._subscribe_message())
+            self.connects += 1
+            self.connected.set()
+            logger.info(f"[PriceStream] подключено к {self.url}: {', '.join(self.symbols)}")
+            pinger = asyncio.create_task(self._pinger(ws))
+            try:
+                while not self._stopped:
+                    try:
+                        msg = await ws.receive(timeout=self.stale_after_sec)
+                    except asyncio.TimeoutError:
+                        logger.warning("[PriceStream] нет данных — переподключение")
+                        break
+                    if msg.type == aiohttp.WSMsgType.TEXT:
+                        for tick in self.parse(msg.data):
+                            got_data = True
+                            await self._dispatch(tick)
+                    elif msg.type in (aiohttp.WSMsgType.CLOSE, aiohttp.WSMsgType.CLOSING,
+                                      aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                        break
+            finally:
+                self.connected.clear()
+                self._ws = None
+                pinger.cancel()
+        return got_data
+
+    async def run(self) -> None:
+        """Держать подписку до stop(); переподключаться при любом разрыве"""
+        self._stopped = False
+        attempt = 0
+        async with aiohttp.ClientSession() as http:
+            while not self._stopped:
+                try:
+                    if await self._session(http):
+                        attempt = 0  # соединение было рабочим — начинаем задержки заново
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.warning(f"[PriceStream] соединение оборвалось: {e}")
+                if self._stopped:
+                    break
+                delay = random.uniform(0, min(self.reconnect_max_sec, self.reconnect_min_sec * (2 ** attempt)))
+                attempt += 1
+                await asyncio.sleep(delay)
+
+    async def stop(self) -> None:
+        self._stopped = True
+        ws = self._ws
+        if ws is not None and not ws.closed:
+            await ws.close()
@@ -0,0 +1,350 @@
+# market/rate_limit.py
+"""Клиентские лимиты запросов к Bitget REST.
+
+Запросы делятся на классы по пути: order (/order/), plan (/plan/),
+market (/market/) и account (всё остальное приватное: /account/,
+/position/). У каждого класса свои:
+
+- токен-бакет: запрос ждёт токен до выхода на провод (лимиты биржи —
+  на UID/IP, поэтому бакеты общие на процесс);
+- повторы с экспоненциальной задержкой и полным джиттером на 429/5xx
+  (Retry-After, если биржа его прислала);
+- автомат-предохранитель: после N подряд неудач класс закрывается на
+  reset_sec, запросы сразу получают CircuitOpenError, затем пробный запрос.
+
+Ордерные POST не идемпотентны: их повторяем только когда биржа запрос
+точно не исполнила — 429, 503 и ошибка соединения до отправки. GET
+повторяется на любые 5xx и сетевые ошибки.
+
+Метрики по классам разделяют время в очереди (бакет + паузы повторов)
+и время на проводе — см. RequestLimiter.metrics().
+"""
+import asyncio
+import logging
+import random
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(RuntimeError):
+    """Класс эндпоинтов временно закрыт предохранителем"""
+
+
+class TokenBucket:
+    """rate токенов в секунду, запас до burst; reserve() не блокирует, а говорит, сколько ждать"""
+
+    def __init__(self, rate_per_sec: float, burst: Optional[float] = None):
+        self.rate = rate_per_sec
+        self.burst = float(burst if burst is not None else max(1.0, rate_per_sec))
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens  # уходим в долг: следующие ждут дольше
+            return max(0.0, -self._tokens / self.rate)
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        delay = self.reserve(tokens)
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    async def acquire_async(self, tokens: float = 1.0) -> float:
+        delay = self.reserve(tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+
+
+class CircuitBreaker:
+    """closed -> open после failure_threshold неудач подряд -> half-open через reset_sec"""
+
+    def __init__(self, failure_threshold: int = 5, reset_sec: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_sec = reset_sec
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probe = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return 'closed'
+        return 'half-open' if time.monotonic() - self.opened_at >= self.reset_sec else 'open'
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half-open' and not self._probe:
+                self._probe = True  # один пробный запрос
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probe = False
+
+    def release_probe(self) -> None:
+        """Пробный запрос прерван без ответа (отмена): исход неизвестен — пробу разрешаем снова"""
+        with self._lock:
+            self._probe = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._probe or self.failures >= self.failure_threshold:
+                if self.opened_at is None or self._probe:
+                    logger.warning(f"Предохранитель открыт после {self.failures} неудач")
+                self.opened_at = time.monotonic()
+            self._probe = False
+
+
+@dataclass
+class RetryPolicy:
+    max_retries: int = 3
+    base_delay_sec: float = 0.2
+    max_delay_sec: float = 5.0
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Полный джиттер: U(0, min(max, base * 2^attempt)); Retry-After — нижняя граница"""
+        backoff = random.uniform(0, min(self.max_delay_sec, self.base_delay_sec * (2 ** attempt)))
+        return max(backoff, retry_after or 0.0)
+
+
+@dataclass
+class ClassLimits:
+    rate_per_sec: float
+    burst: Optional[float] = None
+
+
+# [Неподтверждено] лимиты Bitget mix v1: ордера/планы ~10 запросов/с на UID, маркет-данные ~20/с на IP
+DEFAULT_CLASS_LIMITS: Dict[str, ClassLimits] = {
+    'order': ClassLimits(10.0),
+    'plan': ClassLimits(10.0),
+    'market': ClassLimits(20.0),
+    'account': ClassLimits(10.0),
+}
+
+
+def endpoint_class(path: str) -> str:
+    if '/market/' in path:
+        return 'market'
+    if '/plan/' in path:
+        return 'plan'
+    if '/order/' in path:
+        return 'order'
+    return 'account'
+
+
+# ошибки, после которых запрос точно не дошёл до биржи
+_NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+_NETWORK_ERRORS = (httpx.TransportError,)
+
+
+def _error_classes(method: str) -> tuple:
+    """Ошибки requests добавляются, только если его уже импортировал синхронный клиент:
+    без импорта таких исключений быть не может, а сам импорт стоит ~0.1 с на старте"""
+    requests = sys.modules.get('requests')
+    if method != 'GET':
+        return _NOT_SENT_ERRORS + ((requests.exceptions.ConnectTimeout,) if requests else ())
+    return _NETWORK_ERRORS + ((requests.exceptions.ConnectionError, requests.exceptions.Timeout) if requests else ())
+
+
+@dataclass
+class ClassMetrics:
+    requests: int = 0
+    retries: int = 0
+    throttled: int = 0          # ответы 429
+    failures: int = 0           # итоговые неудачи (после повторов)
+    rejected: int = 0           # отбито предохранителем
+    queued_ms: float = 0.0
+    wire_ms: float = 0.0
+    max_queued_ms: float = 0.0
+    max_wire_ms: float = 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        n = max(1, self.requests)
+        return {
+            'requests': self.requests, 'retries': self.retries, 'throttled': self.throttled,
+            'failures': self.failures, 'rejected': self.rejected,
+            'avg_queued_ms': round(self.queued_ms / n, 2), 'max_queued_ms': round(self.max_queued_ms, 2),
+            'avg_wire_ms': round(self.wire_ms / n, 2), 'max_wire_ms': round(self.max_wire_ms, 2),
+        }
+
+
+@dataclass
+class _Attempt:
+    queued: float = 0.0
+    wire: float = 0.0
+    retries: int = 0
+    throttled: int = 0
+    finished: bool = False
+
+
+class RequestLimiter:
+    """Бакеты, повторы и предохранители по классам эндпоинтов"""
+
+    def __init__(self, limits: Optional[Dict[str, ClassLimits]] = None, retry: Optional[RetryPolicy] = None,
+                 failure_threshold: int = 5, reset_sec: float = 30.0):
+        limits = limits or DEFAULT_CLASS_LIMITS
+        self.retry = retry or RetryPolicy()
+        self.buckets = {name: TokenBucket(l.rate_per_sec, l.burst) for name, l in limits.items()}
+        self.breakers = {name: CircuitBreaker(failure_threshold, reset_sec) for name in limits}
+        self._metrics: Dict[str, ClassMetrics] = {name: ClassMetrics() for name in limits}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _retryable_status(method: str, status: int) -> bool:
+        if status == 429:
+            return True
+        if method == 'GET':
+            return status >= 500
+        return status == 503
+
+    @staticmethod
+    def _retryable_error(method: str, error: BaseException) -> bool:
+        return isinstance(error, _error_classes(method))
+
+    @staticmethod
+    def _retry_after(response) -> Optional[float]:
+        try:
+            return float(response.headers.get('Retry-After'))
+        except (TypeError, ValueError, AttributeError):
+            return None
+
+    def _admit(self, cls: str) -> None:
+        if not self.breakers[cls].allow():
+            with self._lock:
+                self._metrics[cls].rejected += 1
+            raise CircuitOpenError(f"Bitget {cls}: предохранитель открыт, запрос не отправлен")
+
+    def _finish(self, cls: str, attempt: _Attempt, ok: bool) -> None:
+        attempt.finished = True
+        (self.breakers[cls].record_success if ok else self.breakers[cls].record_failure)()
+        with self._lock:
+            m = self._metrics[cls]
+            m.requests += 1
+            m.retries += attempt.retries
+            m.throttled += attempt.throttled
+            m.failures += 0 if ok else 1
+            m.queued_ms += attempt.queued * 1000
+            m.wire_ms += attempt.wire * 1000
+            m.max_queued_ms = max(m.max_queued_ms, attempt.queued * 1000)
+            m.max_wire_ms = max(m.max_wire_ms, attempt.wire * 1000)
+
+    def call(self, method: str, path: str, send: Callable[[], Any]):
+        """send() — сам HTTP-запрос (подписывается заново на каждой попытке)"""
+        cls = endpoint_class(path)
+        self._admit(cls)
+        attempt = _Attempt()
+        try:
+            return self._attempts(method, cls, send, attempt)
+        finally:
+            self._abandon(cls, attempt)
+
+    def _abandon(self, cls: str, attempt: _Attempt) -> None:
+        # отмена/прерывание (BaseException) мимо _finish: иначе проба half-open висит вечно
+        if not attempt.finished:
+            self.breakers[cls].release_probe()
+
+    def _attempts(self, method: str, cls: str, send: Callable[[], Any], attempt: _Attempt):
+        for n in range(self.retry.max_retries + 1):
+            attempt.queued += self.buckets[cls].acquire()
+            started = time.perf_counter()
+            try:
+                response = send()
+            except Exception as e:
+                attempt.wire += time.perf_counter() - started
+                if n < self.retry.max_retries and self._retryable_error(method, e):
+                    attempt.retries += 1
+                    attempt.queued += self._sleep(self.retry.delay(n))
+                    continue
+                self._finish(cls, attempt, ok=False)
+                raise
+            attempt.wire += time.perf_counter() - started
+            status = response.status_code
+            attempt.throttled += status == 429
+            if self._retryable_status(method, status):
+                if n < self.retry.max_retries:
+                    attempt.retries += 1
+                    attempt.queued += self._sleep(self.retry.delay(n, self._retry_after(response)))
+                    continue
+                self._finish(cls, attempt, ok=False)
+                return response
+            # 4xx — ошибка запроса, а не биржи: предохранитель не трогаем
+            self._finish(cls, attempt, ok=True)
+            return response
+
+    async def call_async(self, method: str, path: str, send: Callable[[], Awaitable[Any]]):
+        cls = endpoint_class(path)
+        self._admit(cls)
+        attempt = _Attempt()
+        try:
+            return await self._attempts_async(method, cls, send, attempt)
+        finally:
+            self._abandon(cls, attempt)
+
+    async def _attempts_async(self, method: str, cls: str, send: Callable[[], Awaitable[Any]], attempt: _Attempt):
+        for n in range(self.retry.max_retries + 1):
+            attempt.queued += await self.buckets[cls].acquire_async()
+            started = time.perf_counter()
+            try:
+                response = await send()
+            except Exception as e:
+                attempt.wire += time.perf_counter() - started
+                if n < self.retry.max_retries and self._retryable_error(method, e):
+                    attempt.retries += 1
+                    attempt.queued += await self._sleep_async(self.retry.delay(n))
+                    continue
+                self._finish(cls, attempt, ok=False)
+                raise
+            attempt.wire += time.perf_counter() - started
+            status = response.status_code
+            attempt.throttled += status == 429
+            if self._retryable_status(method, status):
+                if n < self.retry.max_retries:
+                    attempt.retries += 1
+                    attempt.queued += await self._sleep_async(self.retry.delay(n, self._retry_after(response)))
+                    continue
+                self._finish(cls, attempt, ok=False)
+                return response
+            self._finish(cls, attempt, ok=True)
+            return response
+
+    @staticmethod
+    def _sleep(delay: float) -> float:
+        time.sleep(delay)
+        return delay
+
+    @staticmethod
+    async def _sleep_async(delay: float) -> float:
+        await asyncio.sleep(delay)
+        return delay
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            snapshot = {cls: m.snapshot() for cls, m in self._metrics.items()}
+        for cls, breaker in self.breakers.items():
+            snapshot[cls]['breaker'] = breaker.state
+        return snapshot
+
+
+# Общий на процесс: лимиты биржи считаются на аккаунт, а не на клиента
+bitget_limiter = RequestLimiter()
@@ -0,0 +1,116 @@
+# market/trigger_book.py
+"""Книга ценовых триггеров для Watcher.
+
+Вместо обхода всех планов и всех TP на каждом тике держим кучи
+ближайших порогов:
+
+- up   — срабатывают, когда цена >= порога (TP лонга, стоп шорта), минимум сверху;
+- down — срабатывают, когда цена <= порога (TP шорта, стоп лонга), максимум сверху;
+- deadlines — сроки тайм-стопа (unix-время), ближайший сверху.
+
+Тик снимает с вершин только пересечённые пороги: O(сработавших · log n),
+таймер — только истёкшие сроки.
+Удаление ленивое: актуальна только последняя запись (plan_id, kind),
+остальные выкидываются при снятии с вершины.
+"""
+import heapq
+import itertools
+from typing import Dict, List, Optional, Tuple
+
+UP = "up"
+DOWN = "down"
+
+_SIDES = {"LONG": "LONG", "BUY": "LONG", "SHORT": "SHORT", "SELL": "SHORT"}
+
+
+def normalize_side(side: str) -> str:
+    """BUY/LONG -> LONG, SELL/SHORT -> SHORT (план приходит в обоих вариантах)"""
+    try:
+        return _SIDES[str(side).upper()]
+    except KeyError:
+        raise ValueError(f"Неизвестная сторона сделки: {side!r}")
+
+
+def tp_direction(side: str) -> str:
+    """Куда должна пройти цена, чтобы TP был достигнут"""
+    return UP if normalize_side(side) == "LONG" else DOWN
+
+
+def stop_direction(side: str) -> str:
+    """Куда должна пройти цена, чтобы сработал стоп"""
+    return DOWN if normalize_side(side) == "LONG" else UP
+
+
+class TriggerBook:
+    def __init__(self):
+        self._up: List[Tuple[float, int, str, str]] = []    # (порог, seq, plan_id, kind)
+        self._down: List[Tuple[float, int, str, str]] = []  # (-порог, seq, plan_id, kind)
+        self._deadlines: List[Tuple[float, int, str, str]] = []  # (срок, seq, plan_id, kind)
+        self._live: Dict[Tuple[str, str], int] = {}         # (plan_id, kind) -> seq актуальной записи
+        self._seq = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._live)
+
+    def set(self, plan_id: str, kind: str, threshold: float, direction: str) -> None:
+        """Поставить (или переставить) порог kind для плана"""
+        seq = next(self._seq)  # он же поколение: уникален, даже если план удаляли и ставили заново
+        self._live[(plan_id, kind)] = seq
+        if direction == UP:
+            heapq.heappush(self._up, (float(threshold), seq, plan_id, kind))
+        else:
+            heapq.heappush(self._down, (-float(threshold), seq, plan_id, kind))
+
+    def set_deadline(self, plan_id: str, kind: str, at: float) -> None:
+        """Срок (unix-время), после которого kind плана срабатывает в due()"""
+        seq = next(self._seq)
+        self._live[(plan_id, kind)] = seq
+        heapq.heappush(self._deadlines, (float(at), seq, plan_id, kind))
+
+    def discard(self, plan_id: str, *kinds: str) -> None:
+        for kind in kinds:
+            self._live.pop((plan_id, kind), None)
+
+    def _alive(self, entry) -> bool:
+        _, seq, plan_id, kind = entry
+        return self._live.get((plan_id, kind)) == seq
+
+    def crossed(self, price: float) -> List[Tuple[str, str, float]]:
+        """Снять все пороги, пересечённые ценой: [(plan_id, kind, порог)]"""
+        fired = []
+        while self._up and self._up[0][0] <= price:
+            entry = heapq.heappop(self._up)
+            if self._alive(entry):
+                del self._live[(entry[2], entry[3])]
+                fired.append((entry[2], entry[3], entry[0]))
+        while self._down and -self._down[0][0] >= price:
+            entry = heapq.heappop(self._down)
+            if self._alive(entry):
+                del self._live[(entry[2], entry[3])]
+                fired.append((entry[2], entry[3], -entry[0]))
+        self._compact()
+        return fired
+
+    def due(self, now: float) -> List[Tuple[str, str, float]]:
+        """Снять истёкшие сроки: [(plan_id, kind, срок)]"""
+        fired = []
+        while self._deadlines and self._deadlines[0][0] <= now:
+            entry = heapq.heappop(self._deadlines)
+            if self._alive(entry):
+                del self._live[(entry[2], entry[3])]
+                fired.append((entry[2], entry[3], entry[0]))
+        self._compact()
+        return fired
+
+    def next_deadline(self) -> Optional[float]:
+        while self._deadlines and not self._alive(self._deadlines[0]):
+            heapq.heappop(self._deadlines)
+        return self._deadlines[0][0] if self._deadlines else None
+
+    def _compact(self) -> None:
+        """Пересобрать кучи, если мёртвых записей стало больше живых"""
+        if len(self._up) + len(self._down) + len(self._deadlines) > 2 * len(self._live) + 64:
+            for name in ("_up", "_down", "_deadlines"):
+                heap = [e for e in getattr(self, name) if self._alive(e)]
+                heapq.heapify(heap)
+                setattr(self, name, heap)
@@ -1,99 +1,315 @@
 # market/watcher.py
 import asyncio
+import inspect
 import time
-from typing import Callable, Dict, List, Optional
-import httpx
+from typing import Any, Callable, Dict, List, Optional
 import logging
 
+from market.bitget_transport import get_transport
+from market.trigger_book import TriggerBook, normalize_side, stop_direction, tp_direction
+
 logger = logging.getLogger(__name__)
 
 class Watcher:
-    def __init__(self, get_now_price: Callable[[], float], on_breakeven: Callable[[Dict], None], poll_interval_sec: int = 3):
-        self.get_now_price = get_now_price         # функция, которая возвращает текущую цену BTCUSDT
-        self.on_breakeven = on_breakeven           # коллбек при срабатывании условия БУ
+    """Перевод SL в БУ после N достигнутых TP, локальный стоп-лосс и тайм-стоп.
+
+    Цена приходит либо из потока (stream=TickerStream: каждый тик сразу
+    проверяется в on_tick), либо опросом get_now_price раз в
+    poll_interval_sec. С потоком опрос остаётся запасным: работает, только
+    пока поток не подключён.
+
+    Пороги TP и стопов лежат в TriggerBook, сроки тайм-стопа — в его куче
+    сроков: тик трогает только планы, чей порог пересечён, таймер — только
+    истёкшие планы (точность — poll_interval_sec). Сторона плана приводится
+    к LONG/SHORT (BUY/SELL тоже принимаются).
+
+    Книга своя на каждый символ (plan["symbol"], по умолчанию symbol):
+    тик ETHUSDT не трогает планы BTCUSDT. План по новому символу
+    досписывает поток на него; get_now_price(symbol) с аргументом
+    опрашивается по всем символам, без аргумента — только по symbol.
+
+    План живёт до закрытия позиции: после БУ стоп переставляется на
+    plan["stop"] (on_breakeven может его поменять), план снимается по стопу,
+    тайм-стопу или последнему TP. on_stop(plan, reason) вызывается с
+    reason "stop" или "time" — здесь отменяют ордера и закрывают позицию.
+
+    store (storage.watcher_state.WatcherStore) — запись каждого события в
+    positions/orders; restore() после рестарта поднимает активные планы
+    одним запросом и пересобирает книгу триггеров. Счётчик TP пишется после
+    on_breakeven: упав между ними, БУ повторим, а не потеряем.
+
+    Внутри цикла событий записи не блокируют тик: с writer
+    (storage.async_repo.DatabaseWriter — поток-писатель AsyncStorage) они
+    уходят в его очередь и фиксируются в порядке событий вместе с прочими
+    записями бота. Без writer (скрипты, restore) store пишется сразу.
+    flush() дожидается записанного (остановка, тесты).
+    """
+
+    def __init__(self, get_now_price: Optional[Callable[[], Optional[float]]], on_breakeven: Callable[[Dict], Any],
+                 poll_interval_sec: int = 3, stream=None, symbol: str = "BTCUSDT",
+                 on_stop: Optional[Callable[[Dict, str], Any]] = None, time_stop_min: float = 0,
+                 clock: Callable[[], float] = time.time, store=None, writer=None):
+        self.get_now_price = get_now_price         # текущая цена: get_now_price() или get_now_price(symbol)
+        self.on_breakeven = on_breakeven           # коллбек при срабатывании условия БУ (может быть async)
+        self.on_stop = on_stop                     # коллбек стопа/тайм-стопа (может быть async)
+        self.time_stop_min = time_stop_min         # 0 — без тайм-стопа; план может задать свой time_stop_min
+        self.clock = clock
+        self.store = store
+        self.writer = writer                       # DatabaseWriter над той же Database, что и store
         self.poll_interval_sec = poll_interval_sec
-        self._plans: List[Dict] = []               # список активных планов
+        self.stream = stream                       # market.price_stream.TickerStream или None
+        self.symbol = symbol.upper()
+        self._plans: Dict[str, Dict] = {}          # plan_id -> активный план
+        self._books: Dict[str, TriggerBook] = {}   # symbol -> книга триггеров
         self._tp_hit_count: Dict[str, int] = {}    # plan_id -> сколько TP достигнуто
         self._stopped = False
+        self._lock = asyncio.Lock()                # тики из потока и из опроса не пересекаются
+        self._stop_event = asyncio.Event()
+        self._pending: List[asyncio.Future] = []   # записи в очереди писателя, ещё без COMMIT
 
-    def register_plan(self, plan: Dict):
+    def register_plan(self, plan: Dict, persist: bool = True):
         """Добавь уникальный plan_id, например f"{symbol}:{side}:{entry}:{stop}:{time.time_ns()}" """
         plan_id = plan.get("plan_id")
         if not plan_id:
             plan_id = f"{plan['symbol']}:{plan['side']}:{plan['entry']}:{plan['stop']}:{int(time.time()*1000)}"
             plan["plan_id"] = plan_id
-        self._plans.append(plan)
-        self._tp_hit_count[plan_id] = 0
+        plan["side"] = normalize_side(plan["side"])
+        plan["symbol"] = (plan.get("symbol") or self.symbol).upper()
+        plan.setdefault("opened_at", self.clock())
+        if persist:
+            self._persist("save_plan", dict(plan))  # снимок; первым в очереди: события плана пишутся после него
+        self._plans[plan_id] = plan
+        self._tp_hit_count.setdefault(plan_id, 0)
+        self._arm_next_tp(plan)
+        self._arm_stop(plan)
+        minutes = float(plan.get("time_stop_min") or self.time_stop_min or 0)
+        if minutes > 0:
+            self._book(plan).set_deadline(plan_id, "time", float(plan["opened_at"]) + minutes * 60)
         logger.info(f"[Watcher] Зарегистрирован план {plan_id}")
 
-    async def start(self):
-        self._stopped = False
-        logger.info("[Watcher] Запуск наблюдателя цен")
-        while not self._stopped:
+    def restore(self) -> int:
+        """Поднять активные планы из store (после рестарта); возвращает их число"""
+        if self.store is None:
+            return 0
+        restored = self.store.load_active()
+        for plan, hit in restored:
+            self._tp_hit_count[plan["plan_id"]] = hit
+            self.register_plan(plan, persist=False)
+        if restored:
+            logger.info(f"[Watcher] Восстановлено планов: {len(restored)}")
+        return len(restored)
+
+    def _persist(self, method: str, *args) -> None:
+        if self.store is None:
+            return
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            self._write(method, args)  # вне цикла событий (скрипты, restore) — сразу
+            return
+        if self.writer is None:
+            self._write(method, args)
+            return
+        self._pending = [f for f in self._pending if not f.done()]
+        self._pending.append(self.writer.submit(self._write, method, args))
+
+    def _write(self, method: str, args: tuple) -> None:
+        try:
+            getattr(self.store, method)(*args)
+        except Exception as e:
+            logger.error(f"[Watcher] store.{method} error: {e}")
+
+    async def flush(self) -> None:
+        """Дождаться записи всех событий в store"""
+        pending, self._pending = self._pending, []
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    @property
+    def plans(self) -> List[Dict]:
+        return list(self._plans.values())
+
+    @property
+    def symbols(self) -> List[str]:
+        return list(self._books) or [self.symbol]
+
+    def _book(self, plan: Dict) -> TriggerBook:
+        symbol = plan["symbol"]
+        book = self._books.get(symbol)
+        if book is None:
+            book = self._books[symbol] = TriggerBook()
+            if self.stream is not None:
+                self.stream.add_symbol(symbol)
+        return book
+
+    def _arm_next_tp(self, plan: Dict) -> None:
+        pid = plan["plan_id"]
+        tps = plan.get("tps", [])
+        hit = self._tp_hit_count.get(pid, 0)
+        if hit < len(tps):
+            self._book(plan).set(pid, "tp", tps[hit], tp_direction(plan["side"]))
+
+    def _arm_stop(self, plan: Dict) -> None:
+        if plan.get("stop") is not None:
+            self._book(plan).set(plan["plan_id"], "stop", plan["stop"], stop_direction(plan["side"]))
+
+    def _drop_plan(self, pid: str) -> None:
+        plan = self._plans.pop(pid, None)
+        self._tp_hit_count.pop(pid, None)
+        if plan is not None:
+            self._book(plan).discard(pid, "tp", "stop", "time")
+
+    @staticmethod
+    async def _call(callback, *args) -> None:
+        try:
+            result = callback(*args)
+            if inspect.isawaitable(result):
+                await result
+        except Exception as e:
+            logger.error(f"[Watcher] {getattr(callback, '__name__', 'callback')} error: {e}")
+
+    async def _close(self, plan: Dict, reason: str, price: Optional[float] = None) -> None:
+        self._drop_plan(plan["plan_id"])
+        self._persist("record_closed", plan["plan_id"], reason)
+        what = "стоп-лосс" if reason == "stop" else "тайм-стоп"
+        logger.info(f"[Watcher] plan {plan['plan_id']}: {what} (price={price})")
+        if self.on_stop:
+            await self._call(self.on_stop, plan, reason)
+
+    async def check_deadlines(self) -> None:
+        """Тайм-стопы, срок которых истёк (вызывается из цикла start и на тиках)"""
+        async with self._lock:
+            now = self.clock()
+            for book in list(self._books.values()):
+                for pid, _kind, _at in book.due(now):
+                    plan = self._plans.get(pid)
+                    if plan is not None:
+                        await self._close(plan, "time")
+
+    async def on_tick(self, tick) -> None:
+        """Слушатель TickerStream: проверка планов символа тика"""
+        if tick.symbol not in self._books:
+            return
+        await self._guarded_tick(tick.price, tick.symbol)
+
+    async def _guarded_tick(self, price: Optional[float], symbol: Optional[str] = None) -> None:
+        if price is None:
+            return
+        async with self._lock:
+            await self._tick(price, symbol)
+
+    def _price_takes_symbol(self) -> bool:
+        try:
+            return bool(inspect.signature(self.get_now_price).parameters)
+        except (TypeError, ValueError):
+            return False
+
+    async def _poll(self) -> None:
+        by_symbol = self._price_takes_symbol()
+        for symbol in (self.symbols if by_symbol else [self.symbol]):
             try:
-                price = self.get_now_price()
-                await self._tick(price)
+                price = self.get_now_price(symbol) if by_symbol else self.get_now_price()
+                if inspect.isawaitable(price):
+                    price = await price
+                await self._guarded_tick(price, symbol)
             except Exception as e:
                 logger.error(f"[Watcher] error: {e}")
-            await asyncio.sleep(self.poll_interval_sec)
 
-    async def _tick(self, price: float):
-        # для каждого плана проверяем TP-порог(и)
-        remain_plans: List[Dict] = []
-        for plan in self._plans:
-            pid = plan["plan_id"]
+    async def start(self):
+        self._stopped = False
+        self._stop_event.clear()
+        logger.info("[Watcher] Запуск наблюдателя цен")
+        if self.stream is None:
+            while not self._stopped:
+                await self._poll()
+                await self.check_deadlines()
+                await asyncio.sleep(self.poll_interval_sec)
+            return
+
+        self.stream.add_listener(self.on_tick)
+        stream_task = asyncio.create_task(self.stream.run())
+        try:
+            while not self._stopped:
+                try:
+                    await asyncio.wait_for(self._stop_event.wait(), self.poll_interval_sec)
+                    break
+                except asyncio.TimeoutError:
+                    pass
+                stream_down = stream_task.done() or not self.stream.connected.is_set()
+                if stream_down and self.get_now_price is not None:
+                    await self._poll()  # поток переподключается — не теряем тики совсем
+                await self.check_deadlines()
+        finally:
+            self.stream.remove_listener(self.on_tick)
+            await self.stream.stop()
+            stream_task.cancel()
+            await asyncio.gather(stream_task, return_exceptions=True)
+
+    async def _tick(self, price: float, symbol: Optional[str] = None):
+        # только планы символа, чей порог (следующий TP или стоп) пересечён ценой
+        book = self._books.get((symbol or self.symbol).upper())
+        if book is None:
+            return
+        for pid, kind, _threshold in book.crossed(price):
+            plan = self._plans.get(pid)
+            if plan is None:
+                continue
+            if kind == "stop":
+                await self._close(plan, "stop", price)
+                continue
+
             tps = plan.get("tps", [])
             count_needed = int(plan.get("breakeven_after_tp", 2))
-            side = plan["side"]
-            # считаем, сколько TP «пересечено» текущей ценой
+            long = plan["side"] == "LONG"
             hit = self._tp_hit_count.get(pid, 0)
 
             # Для LONG: TP считается достигнутым, когда price >= TP
             # Для SHORT: TP считается достигнутым, когда price <= TP
             new_hit = hit
-            for i in range(hit, len(tps)):
-                tp = tps[i]
-                if side == "LONG" and price >= tp: 
-                    new_hit += 1
-                elif side == "SHORT" and price <= tp:
+            for tp in tps[hit:]:
+                if (price >= tp) if long else (price <= tp):
                     new_hit += 1
                 else:
                     break  # дальше TP ещё дальше от цены
 
-            if new_hit != hit:
-                self._tp_hit_count[pid] = new_hit
-                logger.info(f"[Watcher] plan {pid} TP hit count: {new_hit}/{len(tps)} (price={price})")
+            self._tp_hit_count[pid] = new_hit
+            logger.info(f"[Watcher] plan {pid} TP hit count: {new_hit}/{len(tps)} (price={price})")
 
-            if new_hit >= count_needed:
-                # переносим в БУ один раз
-                try:
-                    self.on_breakeven(plan)
-                except Exception as e:
-                    logger.error(f"[Watcher] on_breakeven error: {e}")
-                # этот план можно удалить
-                continue
+            if hit < count_needed <= new_hit:
+                # переносим в БУ один раз; коллбек может сдвинуть plan["stop"]
+                await self._call(self.on_breakeven, plan)
+                self._arm_stop(plan)
+                self._persist("record_breakeven", pid, plan["stop"])
+            self._persist("record_hits", pid, new_hit)
 
-            remain_plans.append(plan)
+            if new_hit >= len(tps):
+                # последний TP — позиция закрыта биржей, наблюдать нечего
+                logger.info(f"[Watcher] plan {pid}: все TP достигнуты")
+                self._drop_plan(pid)
+                self._persist("record_closed", pid, "tp")
+                continue
 
-        self._plans = remain_plans
+            self._arm_next_tp(plan)
 
     def stop(self):
         self._stopped = True
+        self._stop_event.set()
         logger.info("[Watcher] Остановка наблюдателя цен")
 
 # Утилита: получение цены с Bitget (можно не использовать в тестах)
-async def fetch_bitget_last_price() -> Optional[float]:
+async def fetch_bitget_last_price(symbol: str = "BTCUSDT") -> Optional[float]:
     try:
         # [Неподтверждено] проверь символ и путь под твой рынок (umcbl)
-        url = "https://api.bitget.com/api/mix/v1/market/ticker?symbol=BTCUSDT_UMCBL"
-        async with httpx.AsyncClient(timeout=5.0) as http:
-            r = await http.get(url)
-            if r.status_code == 200:
-                data = r.json()
-                # ожидаем data["data"]["last"] или похожее поле — проверь и поправь
-                # [Неподтверждено] ниже — пример рабочего варианта
-                last = float(data["data"]["last"])
-                return last
+        # общий пул соединений вместо нового клиента (и TLS-рукопожатия) на каждый тик
+        transport = get_transport("https://api.bitget.com")
+        product = symbol.upper() if "_" in symbol else f"{symbol.upper()}_UMCBL"
+        r = await transport.request("GET", "/api/mix/v1/market/ticker",
+                                    params={"symbol": product}, timeout=5.0)
+        if r.status_code == 200:
+            data = r.json()
+            # ожидаем data["data"]["last"] или похожее поле — проверь и поправь
+            # [Неподтверждено] ниже — пример рабочего варианта
+            last = float(data["data"]["last"])
+            return last
     except Exception as e:
         logger.error(f"[Watcher] fetch price error: {e}")
     return None
@@ -0,0 +1,63 @@
+# nlp/batch.py
+"""Пакетный парсинг исторических сообщений в пуле процессов.
+
+Сообщения режутся на чанки, чанки уходят в ProcessPoolExecutor, результаты
+отдаются потоком строго в исходном порядке. В полёте держим не больше
+2 * workers чанков, поэтому память не растёт с размером истории.
+"""
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Any, Iterable, Iterator, List, Optional, Sequence
+
+# Экземпляр парсера в процессе-воркере (передаётся через initializer,
+# чтобы изменённые ключевые слова/паттерны доехали до воркеров)
+_worker_parser = None
+
+
+def _init_worker(parser) -> None:
+    global _worker_parser
+    _worker_parser = parser
+
+
+def _parse_chunk(method: str, chunk: List[Sequence[Any]]) -> List[Any]:
+    parse = getattr(_worker_parser, method)
+    return [parse(*args) for args in chunk]
+
+
+def chunked(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    it = iter(items)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def parse_in_pool(parser, method: str, args_iter: Iterable[Sequence[Any]],
+                  workers: Optional[int] = None, chunk_size: int = 256) -> Iterator[Any]:
+    """Вызывает parser.<method>(*args) для каждого набора аргументов.
+
+    workers=None — по числу ядер; workers<=1 — последовательно в текущем процессе.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1:
+        parse = getattr(parser, method)
+        for args in args_iter:
+            yield parse(*args)
+        return
+
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(parser,))
+    try:
+        pending = deque()
+        for chunk in chunked(args_iter, chunk_size):
+            pending.append(pool.submit(_parse_chunk, method, chunk))
+            if len(pending) >= workers * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+    finally:
+        # потребитель мог бросить итерацию на середине — не ждём лишние чанки
+        pool.shutdown(wait=True, cancel_futures=True)
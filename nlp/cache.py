@@ -0,0 +1,101 @@
+# nlp/cache.py
+"""Кэш результатов парсинга по хэшу текста.
+
+Каналы репостят, пересылают и редактируют один и тот же сигнал — полный
+парсинг на каждое такое сообщение не нужен. Ключ — хэш нормализованного
+текста; значения вытесняются по LRU. Тексты, отброшенные фильтром
+(шум/не сигнал), живут в отдельном коротком негативном кэше с TTL.
+"""
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Dict
+
+MISS = object()
+
+
+def normalise_text(text: str) -> str:
+    """Нормализация для ключа кэша.
+
+    Только обрезка краевых пробелов: паттерны парсеров не якорятся к краям,
+    а любое более сильное приведение (регистр, схлопывание пробелов) могло
+    бы дать один ключ текстам с разным результатом парсинга.
+    """
+    return text.strip()
+
+
+class ParseCache:
+    """LRU-кэш парсинга со счётчиками hit/miss/eviction и негативным кэшем"""
+
+    def __init__(self, maxsize: int = 1024, negative_maxsize: int = 4096, negative_ttl_sec: float = 300.0):
+        self.maxsize = maxsize
+        self.negative_maxsize = negative_maxsize
+        self.negative_ttl_sec = negative_ttl_sec
+        self._entries: "OrderedDict[bytes, Any]" = OrderedDict()
+        self._negative: "OrderedDict[bytes, float]" = OrderedDict()  # key -> expires_at (monotonic)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.negative_hits = 0
+
+    @staticmethod
+    def key(text: str) -> bytes:
+        return hashlib.blake2b(normalise_text(text).encode('utf-8'), digest_size=16).digest()
+
+    def get(self, key: bytes) -> Any:
+        """Значение или MISS; попадание поднимает запись в начало LRU"""
+        value = self._entries.get(key, MISS)
+        if value is MISS:
+            self.misses += 1
+            return MISS
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: bytes, value: Any) -> None:
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        self._negative.pop(key, None)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def is_negative(self, key: bytes) -> bool:
+        expires_at = self._negative.get(key)
+        if expires_at is None:
+            return False
+        if expires_at < time.monotonic():
+            del self._negative[key]
+            return False
+        self.negative_hits += 1
+        return True
+
+    def put_negative(self, key: bytes) -> None:
+        self._negative[key] = time.monotonic() + self.negative_ttl_sec
+        self._negative.move_to_end(key)
+        while len(self._negative) > self.negative_maxsize:
+            self._negative.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._negative.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'negative_size': len(self._negative),
+            'negative_hits': self.negative_hits,
+        }
+
+    def __getstate__(self):
+        # В воркеры parse_many уходит только конфигурация, не содержимое
+        state = self.__dict__.copy()
+        state['_entries'] = OrderedDict()
+        state['_negative'] = OrderedDict()
+        return state
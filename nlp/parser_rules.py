@@ -1,10 +1,18 @@
 import re
-from typing import Dict, Any, Optional, Tuple
-from dataclasses import dataclass
+from typing import Dict, Any, Optional, Tuple, List, Iterable, Iterator
+from dataclasses import dataclass, field, replace
+
+from nlp.batch import parse_in_pool
+from nlp.cache import MISS, ParseCache
+from nlp.symbols import DEFAULT_SYMBOL, find_symbol
 
 @dataclass
 class ParsedSignal:
-    """Результат парсинга сигнала"""
+    """Результат парсинга сигнала.
+
+    Каноническая структура с нормализованными числами: её строит любой парсер
+    один раз, а Executor, SignalRouter и BitgetTrader читают её напрямую.
+    """
     direction: str  # BUY | SELL
     symbol: str     # BTCUSDT
     entry_low: float
@@ -15,11 +23,44 @@ class ParsedSignal:
     risk_percent: Optional[float] = None
     leverage: Optional[int] = None
     confidence: float = 0.0  # 0.0 - 1.0
+    take_profits: List[float] = field(default_factory=list)  # вся лестница TP
+
+    def __post_init__(self):
+        # take_profit/take_profit2 и take_profits — два вида одних и тех же уровней
+        if self.take_profits:
+            if self.take_profit is None:
+                self.take_profit = self.take_profits[0]
+            if self.take_profit2 is None and len(self.take_profits) > 1:
+                self.take_profit2 = self.take_profits[1]
+        else:
+            self.take_profits = [tp for tp in (self.take_profit, self.take_profit2) if tp]
+
+    @property
+    def position_type(self) -> str:
+        """LONG | SHORT — в терминах ImprovedSignalParser и BitgetTrader"""
+        return 'LONG' if self.direction == 'BUY' else 'SHORT'
+
+    @property
+    def entry_zone(self) -> List[float]:
+        return [self.entry_low, self.entry_high]
+
+
+def as_parsed_signal(signal) -> Optional[ParsedSignal]:
+    """Достаёт каноническую структуру из сигнала любого вида (или None)"""
+    if isinstance(signal, ParsedSignal):
+        return signal
+    parsed = getattr(signal, 'parsed', None)
+    if isinstance(parsed, ParsedSignal):
+        return parsed
+    return None
 
 class SignalParser:
     """Парсер торговых сигналов на основе регулярных выражений"""
     
-    def __init__(self):
+    def __init__(self, cache_size: int = 1024, negative_ttl_sec: float = 300.0):
+        # Кэш результатов по хэшу текста; cache_size=0 — без кэша
+        self.cache = ParseCache(cache_size, negative_ttl_sec=negative_ttl_sec) if cache_size > 0 else None
+
         # Паттерны для направления
         self.buy_patterns = [
             r'\b(?:buy|long|покупка|лонг|вверх|up|bull)\b',
@@ -76,18 +117,28 @@ class SignalParser:
             r'(\d+)x\s*(?:lev|leverage|плечо)',
             r'(\d+)\s*leverage',
         ]
-        
-        # Паттерны для символов
-        self.symbol_patterns = [
-            r'\b(btc|bitcoin|биткоин)\b',
-            r'\b(eth|ethereum|эфир)\b',
-            r'\b(sol|solana)\b',
-            r'\b(ada|cardano)\b',
-            r'\b(dot|polkadot)\b',
-        ]
 
     def parse(self, text: str) -> Optional[ParsedSignal]:
         """Парсинг текста сигнала"""
+        cache = self.cache
+        if cache is None:
+            return self._parse(text)
+
+        key = cache.key(text)
+        if cache.is_negative(key):
+            return None
+        cached = cache.get(key)
+        if cached is not MISS:
+            return replace(cached, take_profits=list(cached.take_profits))
+
+        result = self._parse(text)
+        if result is None:
+            cache.put_negative(key)
+        else:
+            cache.put(key, result)
+        return result
+
+    def _parse(self, text: str) -> Optional[ParsedSignal]:
         text_lower = text.lower()
         
         # Определяем направление
@@ -96,9 +147,7 @@ class SignalParser:
             return None
         
         # Определяем символ
-        symbol = self._parse_symbol(text_lower)
-        if not symbol:
-            symbol = "BTCUSDT"  # По умолчанию
+        symbol = self._parse_symbol(text_lower) or DEFAULT_SYMBOL
         
         # Парсим цены
         entry_low, entry_high = self._parse_entry_zone(text_lower)
@@ -131,6 +180,18 @@ class SignalParser:
             confidence=confidence
         )
 
+    def parse_many(self, texts: Iterable[Any], workers: Optional[int] = None,
+                   chunk_size: int = 256) -> Iterator[Optional[ParsedSignal]]:
+        """Пакетный parse() в пуле процессов; результаты отдаются по порядку.
+
+        texts — строки или dict'ы с ключом 'text' (формат extracted_messages.json).
+        """
+        args_iter = (
+            (item.get('text') or '',) if isinstance(item, dict) else (item,)
+            for item in texts
+        )
+        return parse_in_pool(self, 'parse', args_iter, workers=workers, chunk_size=chunk_size)
+
     def _parse_direction(self, text: str) -> Optional[str]:
         """Парсинг направления"""
         buy_score = 0
@@ -151,26 +212,8 @@ class SignalParser:
         return None
 
     def _parse_symbol(self, text: str) -> Optional[str]:
-        """Парсинг символа"""
-        symbol_map = {
-            'btc': 'BTCUSDT',
-            'bitcoin': 'BTCUSDT',
-            'биткоин': 'BTCUSDT',
-            'eth': 'ETHUSDT',
-            'ethereum': 'ETHUSDT',
-            'эфир': 'ETHUSDT',
-            'sol': 'SOLUSDT',
-            'solana': 'SOLUSDT',
-            'ada': 'ADAUSDT',
-            'cardano': 'ADAUSDT',
-            'dot': 'DOTUSDT',
-            'polkadot': 'DOTUSDT',
-        }
-        
-        for pattern, symbol in symbol_map.items():
-            if re.search(rf'\b{pattern}\b', text, re.IGNORECASE):
-                return symbol
-        return None
+        """Парсинг символа (общая таблица алиасов nlp/symbols.py)"""
+        return find_symbol(text)
 
     def _parse_entry_zone(self, text: str) -> Tuple[float, float]:
         """Парсинг зоны входа"""
@@ -274,5 +317,18 @@ class SignalParser:
         
         return min(confidence, 1.0)
 
-# Глобальный экземпляр парсера
-parser = SignalParser()
+# Глобальный экземпляр парсера: создаётся при первом обращении
+_parser: Optional[SignalParser] = None
+
+
+def get_parser() -> SignalParser:
+    global _parser
+    if _parser is None:
+        _parser = SignalParser()
+    return _parser
+
+
+def __getattr__(name: str):
+    if name == "parser":
+        return get_parser()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
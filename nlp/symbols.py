@@ -0,0 +1,39 @@
+# nlp/symbols.py
+"""Таблица алиасов торговых символов.
+
+Один заранее скомпилированный regex по всем алиасам (длинные раньше
+коротких) вместо re.search на каждый алиас при каждом вызове. Совпадение
+ищется по границам слов. Если в тексте упомянут основной символ (prefer),
+берётся он — «eth»/«sol» в комментарии к BTC-сигналу не перехватывают
+символ; иначе — самое левое совпадение.
+"""
+import re
+from typing import Dict, Optional
+
+DEFAULT_SYMBOL = "BTCUSDT"
+
+SYMBOL_ALIASES: Dict[str, str] = {
+    'btc': 'BTCUSDT', 'btcusdt': 'BTCUSDT', 'bitcoin': 'BTCUSDT', 'биткоин': 'BTCUSDT', 'биток': 'BTCUSDT',
+    'eth': 'ETHUSDT', 'ethusdt': 'ETHUSDT', 'ethereum': 'ETHUSDT', 'эфир': 'ETHUSDT',
+    'sol': 'SOLUSDT', 'solusdt': 'SOLUSDT', 'solana': 'SOLUSDT',
+    'ada': 'ADAUSDT', 'adausdt': 'ADAUSDT', 'cardano': 'ADAUSDT',
+    'dot': 'DOTUSDT', 'dotusdt': 'DOTUSDT', 'polkadot': 'DOTUSDT',
+}
+
+_ALIAS_RE = re.compile(
+    r'\b(' + '|'.join(re.escape(a) for a in sorted(SYMBOL_ALIASES, key=len, reverse=True)) + r')\b',
+    re.IGNORECASE,
+)
+
+
+def find_symbol(text: str, prefer: Optional[str] = DEFAULT_SYMBOL) -> Optional[str]:
+    """Символ сигнала: prefer, если он упомянут, иначе первый алиас в тексте (или None)"""
+    found = [SYMBOL_ALIASES[m.group(1).lower()] for m in _ALIAS_RE.finditer(text)]
+    if prefer and prefer in found:
+        return prefer
+    return found[0] if found else None
+
+
+def base_symbol(symbol: str) -> str:
+    """BTCUSDT_UMCBL / btcusdt -> BTCUSDT"""
+    return symbol.upper().split('_')[0]
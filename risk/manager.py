@@ -1,7 +1,7 @@
 # risk/manager.py
 from dataclasses import dataclass, field
 from typing import List, Optional, Literal, Dict
-from config.settings import settings
+from config.settings import get_settings
 from risk.formulas import (
     PositionLeg, leg_sizing, risk_usdt, tp_shares_cover_risk
 )
@@ -34,20 +34,26 @@ def build_order_plan(
     stop_loss: float,
     tp_levels: List[float],         # список уровней
     legs: str = "1/2",              # "1/2" или "1/3" и т.п. — сейчас используем "1/2"
-    leverage_hint: Optional[int] = None
+    leverage_hint: Optional[int] = None,
+    symbol: Optional[str] = None    # None — символ по умолчанию (SYMBOL)
 ) -> OrderPlan:
     # Backwards-compatible: original code expected flat attributes on settings
     # New config.settings exposes grouped dataclasses (bitget, risk, behavior).
     # Map the required values here.
-    symbol = getattr(settings, 'SYMBOL', None) or getattr(settings, 'bitget', None) and settings.bitget.symbol
-    assert symbol == "BTCUSDT", "Сейчас торгуем только BTCUSDT по ТЗ"
+    settings = get_settings()
+    default_symbol = getattr(settings, 'SYMBOL', None) or getattr(settings, 'bitget', None) and settings.bitget.symbol
+    symbol = (symbol or default_symbol).upper()
+    allowed = getattr(settings.bitget, 'symbols', None) or (default_symbol,)
+    if symbol not in allowed:
+        raise ValueError(f"Символ {symbol} не разрешён к торговле (SYMBOLS={','.join(allowed)})")
 
-    # Поддепозит по источнику
+    # Поддепозит по источнику, из него — бюджет символа (SYMBOL_BUDGET_PCT)
     equity_total = getattr(settings, 'EQUITY_USDT', None) or settings.risk.equity_usdt
     if source.upper() == "SCALPING":
         equity_sub = equity_total * settings.risk.split_scalping_pct / 100.0
     else:
         equity_sub = equity_total * settings.risk.split_intraday_pct / 100.0
+    equity_sub *= settings.risk.budget_pct(symbol) / 100.0
 
     # Риски
     risk_total_usdt = risk_usdt(equity_sub, settings.risk.risk_total_cap_pct)  # 3% от поддепозита
@@ -103,6 +109,7 @@ def build_order_plan(
         meta={
             "source": source,
             "equity_sub": equity_sub,
+            "symbol_budget_pct": settings.risk.budget_pct(symbol),
             "risk_total_usdt": risk_total_usdt,
             "note": "После TP2 перенос в БУ"
         }
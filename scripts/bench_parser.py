@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""Offline parser benchmark and golden-file regression check.
+
+Usage:
+  python scripts/bench_parser.py
+  python scripts/bench_parser.py --repeat 5 --out bench.json --check
+
+Loads the real channel export (extracted_messages.json) and the golden parser
+output (test_results.json), then for ImprovedSignalParser.parse_signal and
+nlp.parser_rules.SignalParser.parse reports messages/sec, p50/p99 latency,
+tracemalloc allocation figures and accuracy against the golden file. Prints
+JSON. With --check exits 1 if the golden fields regress, so parser speedups
+can be gated on extraction quality.
+"""
+import sys, os, json, time, argparse, tracemalloc
+# ensure project root is on sys.path when running from scripts/
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from improved_signal_parser import ImprovedSignalParser
+from nlp.parser_rules import SignalParser
+
+MESSAGES_PATH = os.path.join(ROOT, 'extracted_messages.json')
+GOLDEN_PATH = os.path.join(ROOT, 'test_results.json')
+
+# Поля TradingSignal, которые сверяем с test_results.json
+GOLDEN_FIELDS = ('position_type', 'entry_price', 'stop_loss', 'take_profits',
+                 'risk_percent', 'leverage', 'timestamp', 'raw_text')
+
+
+def load_corpus(path: str = MESSAGES_PATH) -> list:
+    """Сообщения канала как аргументы parse_signal: (message_id, channel, text, timestamp)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        messages = json.load(f)
+    return [ImprovedSignalParser._message_args(m, i, 'bench') for i, m in enumerate(messages)]
+
+
+def load_golden(path: str = GOLDEN_PATH) -> dict:
+    with open(path, 'r', encoding='utf-8') as f:
+        return {row['message_id']: row for row in json.load(f)}
+
+
+def _percentile(sorted_values: list, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, max(0, int(round(pct / 100.0 * (len(sorted_values) - 1)))))
+    return sorted_values[k]
+
+
+def measure(fn, args_list: list, repeat: int = 3) -> dict:
+    """Пропускная способность, латентность и аллокации для fn(*args) по корпусу"""
+    for args in args_list:  # прогрев (кэш re, ленивые структуры)
+        fn(*args)
+
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for args in args_list:
+            t0 = time.perf_counter_ns()
+            fn(*args)
+            latencies.append(time.perf_counter_ns() - t0)
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+
+    # Аллокации меряем отдельным проходом: tracemalloc сильно замедляет код
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        per_message_peak = []
+        results = []
+        for args in args_list:
+            current, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            results.append(fn(*args))
+            per_message_peak.append(tracemalloc.get_traced_memory()[1] - current)
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    diff = after.compare_to(before, 'filename')
+    allocated_blocks = sum(stat.count_diff for stat in diff if stat.count_diff > 0)
+    del results
+
+    n = len(latencies)
+    return {
+        'messages': len(args_list),
+        'repeat': repeat,
+        'messages_per_sec': round(n / elapsed, 1) if elapsed else None,
+        'latency_us': {
+            'p50': round(_percentile(latencies, 50) / 1000, 2),
+            'p99': round(_percentile(latencies, 99) / 1000, 2),
+            'max': round(latencies[-1] / 1000, 2) if latencies else 0.0,
+            'mean': round(sum(latencies) / n / 1000, 2) if n else 0.0,
+        },
+        'alloc': {
+            'peak_bytes_per_msg_mean': round(sum(per_message_peak) / len(per_message_peak), 1) if per_message_peak else 0.0,
+            'peak_bytes_per_msg_max': max(per_message_peak) if per_message_peak else 0,
+            'retained_blocks': allocated_blocks,
+        },
+    }
+
+
+def golden_accuracy(parser: ImprovedSignalParser, corpus: list, golden: dict) -> dict:
+    """Пополевая точность ImprovedSignalParser относительно test_results.json"""
+    found = {}
+    for args in corpus:
+        signal = parser.parse_signal(*args)
+        if signal:
+            found[signal.message_id] = signal
+
+    matched = {field: 0 for field in GOLDEN_FIELDS}
+    mismatches = []
+    for message_id, row in golden.items():
+        signal = found.get(message_id)
+        for field in GOLDEN_FIELDS:
+            value = getattr(signal, field, None) if signal else None
+            if signal and value == row.get(field):
+                matched[field] += 1
+            else:
+                mismatches.append({'message_id': message_id, 'field': field,
+                                   'expected': row.get(field), 'actual': value})
+
+    total = len(golden) or 1
+    return {
+        'golden_signals': len(golden),
+        'recall': round(sum(1 for mid in golden if mid in found) / total, 4),
+        'extra_signals': sorted(mid for mid in found if mid not in golden),
+        'field_accuracy': {field: round(count / total, 4) for field, count in matched.items()},
+        'mismatches': mismatches[:50],
+    }
+
+
+def rules_direction_accuracy(parser: SignalParser, corpus: list, golden: dict) -> dict:
+    """У nlp.parser_rules нет своего golden-файла: сверяем только направление"""
+    texts = {args[0]: args[2] for args in corpus}
+    hits = 0
+    for message_id, row in golden.items():
+        parsed = parser.parse(texts.get(message_id, ''))
+        if parsed and parsed.position_type == row['position_type']:
+            hits += 1
+    return {'golden_signals': len(golden), 'direction_accuracy': round(hits / (len(golden) or 1), 4)}
+
+
+def run(repeat: int = 3) -> dict:
+    corpus = load_corpus()
+    golden = load_golden()
+    # Без кэша: иначе повторные проходы меряют попадания, а не парсер
+    improved = ImprovedSignalParser(cache_size=0)
+    rules = SignalParser(cache_size=0)
+    cached = ImprovedSignalParser()
+    return {
+        'improved_signal_parser': {
+            'perf': measure(improved.parse_signal, corpus, repeat),
+            'accuracy': golden_accuracy(improved, corpus, golden),
+            'cached_accuracy': golden_accuracy(cached, corpus, golden),
+            'cache': cached.cache.stats(),
+        },
+        'parser_rules': {
+            'perf': measure(rules.parse, [(args[2],) for args in corpus], repeat),
+            'accuracy': rules_direction_accuracy(rules, corpus, golden),
+        },
+    }
+
+
+def regressions(report: dict) -> list:
+    problems = []
+    for name in ('accuracy', 'cached_accuracy'):
+        accuracy = report['improved_signal_parser'].get(name)
+        if accuracy is None:
+            continue
+        if accuracy['recall'] < 1.0:
+            problems.append(f"{name}: recall {accuracy['recall']} < 1.0")
+        for field, value in accuracy['field_accuracy'].items():
+            if value < 1.0:
+                problems.append(f"{name}: {field} accuracy {value} < 1.0")
+    return problems
+
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description='Parser benchmark + golden regression check')
+    ap.add_argument('--repeat', type=int, default=3, help='passes over the corpus for timing')
+    ap.add_argument('--out', help='write JSON report to this file instead of stdout')
+    ap.add_argument('--check', action='store_true', help='exit 1 if golden fields regress')
+    opts = ap.parse_args()
+
+    report = run(opts.repeat)
+    problems = regressions(report)
+    report['regressions'] = problems
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if opts.out:
+        with open(opts.out, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        print(text)
+    if opts.check and problems:
+        sys.exit(1)
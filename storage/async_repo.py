@@ -0,0 +1,187 @@
+# storage/async_repo.py
+"""Асинхронный фасад над storage.repo для хендлеров Telethon/aiogram.
+
+Запись идёт через один поток-писатель: операции из очереди собираются в
+пачку и фиксируются одной транзакцией (каждая операция — свой SAVEPOINT,
+ошибка одной не откатывает соседей). Awaitable завершается только после
+COMMIT, поэтому следующее чтение видит записанное.
+
+Это единственный путь записи в SQLite из цикла событий: Watcher пишет
+события планов (storage.watcher_state) в ту же очередь — Watcher(writer=
+storage.writer, store=WatcherStore(storage.database)).
+
+Чтение выполняется в пуле потоков (asyncio.to_thread): у каждого потока
+своё соединение Database, в WAL читатели не ждут писателя.
+
+Пример — позиция с ордерами одной транзакцией:
+
+    storage = AsyncStorage()
+    await storage.start()
+    position_id = await storage.run_in_transaction(setup_position, plan)
+"""
+import asyncio
+import logging
+import queue
+import threading
+from typing import Any, Callable, Optional
+
+from storage.db import Database, get_db
+from storage.repo import FillRepository, OrderRepository, PositionRepository, StatsRepository
+
+log = logging.getLogger("storage.async_repo")
+
+_STOP = object()
+
+
+def _resolve(future: asyncio.Future, result: Any = None, error: Optional[BaseException] = None) -> None:
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+class DatabaseWriter:
+    """Поток-писатель с очередью и коалесценцией записей в пачки"""
+
+    def __init__(self, database: Optional[Database] = None, max_batch: int = 128, max_delay_sec: float = 0.0):
+        self.database = database or get_db()
+        self.max_batch = max_batch
+        self.max_delay_sec = max_delay_sec  # >0 — подождать попутные записи перед коммитом
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self.batches = 0
+        self.operations = 0
+
+    def start(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='db-writer', daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Дописывает очередь и останавливает поток"""
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+            self._thread = None
+
+    def submit(self, fn: Callable, *args, **kwargs) -> "asyncio.Future":
+        """Ставит fn(*args, **kwargs) в очередь писателя; результат — после COMMIT"""
+        if self._thread is None:
+            raise RuntimeError('DatabaseWriter is not started')
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._queue.put((fn, args, kwargs, loop, future))
+        return future
+
+    def _collect(self, first) -> list:
+        batch = [first]
+        while len(batch) < self.max_batch:
+            try:
+                item = self._queue.get(timeout=self.max_delay_sec) if self.max_delay_sec else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(item)
+            if item is _STOP:
+                break
+        return batch
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            batch = self._collect(self._queue.get())
+            if batch[-1] is _STOP:
+                stopping = True
+                batch.pop()
+            if batch:
+                self._write_batch(batch)
+        self.database.close_thread()
+
+    def _write_batch(self, batch: list) -> None:
+        outcomes = []
+        try:
+            with self.database.transaction():
+                for fn, args, kwargs, _, _ in batch:
+                    try:
+                        with self.database.transaction():  # SAVEPOINT на операцию
+                            outcomes.append((fn(*args, **kwargs), None))
+                    except Exception as e:
+                        outcomes.append((None, e))
+        except Exception as e:
+            log.exception('DB batch commit failed: %s', e)
+            outcomes = [(None, e)] * len(batch)
+
+        self.batches += 1
+        self.operations += len(batch)
+        for (_, _, _, loop, future), (result, error) in zip(batch, outcomes):
+            try:
+                loop.call_soon_threadsafe(_resolve, future, result, error)
+            except RuntimeError:
+                pass  # цикл событий уже закрыт — ждать результат некому
+
+
+class _AsyncRepository:
+    """Прокси репозитория: методы из _writes — через писателя, остальные — чтение в пуле"""
+
+    _writes: frozenset = frozenset()
+
+    def __init__(self, repo: Any, writer: DatabaseWriter):
+        self._repo = repo
+        self._writer = writer
+
+    def __getattr__(self, name: str):
+        method = getattr(self._repo, name)
+        if name in self._writes:
+            async def call(*args, **kwargs):
+                return await self._writer.submit(method, *args, **kwargs)
+        else:
+            async def call(*args, **kwargs):
+                return await asyncio.to_thread(method, *args, **kwargs)
+        call.__name__ = name
+        return call
+
+
+class AsyncPositionRepository(_AsyncRepository):
+    _writes = frozenset({'create', 'update_state', 'update_position'})
+
+
+class AsyncOrderRepository(_AsyncRepository):
+    _writes = frozenset({'create', 'update_status', 'update_order'})
+
+
+class AsyncFillRepository(_AsyncRepository):
+    _writes = frozenset({'create'})
+
+
+class AsyncStatsRepository(_AsyncRepository):
+    _writes = frozenset({'create', 'update_stats'})
+
+
+class AsyncStorage:
+    """Писатель + асинхронные репозитории поверх одной Database"""
+
+    def __init__(self, database: Optional[Database] = None, max_batch: int = 128, max_delay_sec: float = 0.0):
+        self.database = database or get_db()
+        self.writer = DatabaseWriter(self.database, max_batch=max_batch, max_delay_sec=max_delay_sec)
+        self.positions = AsyncPositionRepository(PositionRepository(self.database), self.writer)
+        self.orders = AsyncOrderRepository(OrderRepository(self.database), self.writer)
+        self.fills = AsyncFillRepository(FillRepository(self.database), self.writer)
+        self.stats = AsyncStatsRepository(StatsRepository(self.database), self.writer)
+
+    async def start(self) -> None:
+        self.writer.start()
+
+    async def stop(self) -> None:
+        await asyncio.to_thread(self.writer.stop)
+
+    async def run_in_transaction(self, fn: Callable, *args, **kwargs) -> Any:
+        """fn(*args, **kwargs) в потоке писателя одной транзакцией (несколько записей сразу)"""
+        return await self.writer.submit(fn, *args, **kwargs)
+
+    async def __aenter__(self) -> "AsyncStorage":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.stop()
@@ -1,12 +1,39 @@
 import sqlite3
 import os
+import threading
+from functools import lru_cache
 from typing import Optional
 from contextlib import contextmanager
-from config.settings import settings
+from config.settings import get_settings
+
+
+@lru_cache(maxsize=256)
+def _insert_sql(table: str, columns: tuple) -> str:
+    # одна и та же строка SQL -> попадание в кэш подготовленных выражений sqlite3
+    return f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})"
+
+
+@lru_cache(maxsize=256)
+def _update_sql(table: str, columns: tuple, where: str) -> str:
+    return f"UPDATE {table} SET {', '.join(f'{k} = ?' for k in columns)} WHERE {where}"
+
 
 class Database:
-    def __init__(self, db_path: Optional[str] = None):
-        self.db_path = db_path or settings.behavior.db_path
+    """SQLite с постоянным соединением на поток.
+
+    Соединение открывается один раз на поток и живёт до close(): WAL,
+    synchronous=NORMAL и кэш подготовленных выражений. Вне transaction()
+    каждый запрос фиксируется сам (autocommit); внутри — все запросы
+    потока уходят одним коммитом.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, cached_statements: int = 256, busy_timeout_ms: int = 5000):
+        self.db_path = db_path or get_settings().behavior.db_path
+        self.cached_statements = cached_statements
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
         self._ensure_db_directory()
         self._init_database()
 
@@ -26,75 +53,113 @@ class Database:
             
             # Выполняем миграции
             conn.executescript(sql_script)
-            conn.commit()
+
+    def _connect(self) -> sqlite3.Connection:
+        # isolation_level=None: транзакциями управляем сами (BEGIN/SAVEPOINT)
+        conn = sqlite3.connect(self.db_path, isolation_level=None, cached_statements=self.cached_statements)
+        conn.row_factory = sqlite3.Row  # Возвращаем результаты как словари
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        with self._lock:
+            self._connections.append(conn)
+        return conn
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Постоянное соединение текущего потока"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+            self._local.depth = 0
+        return conn
 
     @contextmanager
     def get_connection(self):
-        """Контекстный менеджер для получения соединения с БД"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row  # Возвращаем результаты как словари
+        """Контекстный менеджер для получения соединения с БД (соединение не закрывается)"""
+        yield self.connection
+
+    @contextmanager
+    def transaction(self):
+        """Транзакция: один коммит на все запросы блока.
+
+        Вложенные transaction() становятся SAVEPOINT: ошибка во вложенном
+        блоке откатывает только его, ошибка снаружи — всё.
+        """
+        conn = self.connection
+        depth = self._local.depth
+        savepoint = f"sp_{depth}"
+        conn.execute("BEGIN IMMEDIATE" if depth == 0 else f"SAVEPOINT {savepoint}")
+        self._local.depth = depth + 1
         try:
             yield conn
-        finally:
-            conn.close()
+        except BaseException:
+            self._local.depth = depth
+            if depth == 0:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+            else:
+                conn.execute(f"ROLLBACK TO {savepoint}")
+                conn.execute(f"RELEASE {savepoint}")
+            raise
+        self._local.depth = depth
+        conn.execute("COMMIT" if depth == 0 else f"RELEASE {savepoint}")
+
+    def close(self):
+        """Закрыть соединения всех потоков"""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        self._local = threading.local()
+
+    def close_thread(self):
+        """Закрыть соединение текущего потока (для завершающихся рабочих потоков)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            return
+        with self._lock:
+            if conn in self._connections:
+                self._connections.remove(conn)
+        conn.close()
+        self._local.conn = None
 
     def execute(self, sql: str, params: tuple = ()) -> sqlite3.Cursor:
         """Выполнить SQL запрос"""
-        with self.get_connection() as conn:
-            cursor = conn.execute(sql, params)
-            conn.commit()
-            return cursor
+        return self.connection.execute(sql, params)
 
     def execute_many(self, sql: str, params_list: list) -> sqlite3.Cursor:
         """Выполнить SQL запрос с множественными параметрами"""
-        with self.get_connection() as conn:
-            cursor = conn.executemany(sql, params_list)
-            conn.commit()
-            return cursor
+        with self.transaction() as conn:
+            return conn.executemany(sql, params_list)
 
     def fetch_one(self, sql: str, params: tuple = ()) -> Optional[dict]:
         """Получить одну запись"""
-        with self.get_connection() as conn:
-            cursor = conn.execute(sql, params)
-            row = cursor.fetchone()
-            return dict(row) if row else None
+        row = self.connection.execute(sql, params).fetchone()
+        return dict(row) if row else None
 
     def fetch_all(self, sql: str, params: tuple = ()) -> list:
         """Получить все записи"""
-        with self.get_connection() as conn:
-            cursor = conn.execute(sql, params)
-            return [dict(row) for row in cursor.fetchall()]
+        return [dict(row) for row in self.connection.execute(sql, params).fetchall()]
 
     def insert(self, table: str, data: dict) -> int:
         """Вставить запись и вернуть ID"""
-        columns = ', '.join(data.keys())
-        placeholders = ', '.join(['?' for _ in data])
-        sql = f"INSERT INTO {table} ({columns}) VALUES ({placeholders})"
-        
-        with self.get_connection() as conn:
-            cursor = conn.execute(sql, tuple(data.values()))
-            conn.commit()
-            return cursor.lastrowid
+        sql = _insert_sql(table, tuple(data.keys()))
+        return self.connection.execute(sql, tuple(data.values())).lastrowid
 
     def update(self, table: str, data: dict, where: str, where_params: tuple = ()) -> int:
         """Обновить записи"""
-        set_clause = ', '.join([f"{k} = ?" for k in data.keys()])
-        sql = f"UPDATE {table} SET {set_clause} WHERE {where}"
+        sql = _update_sql(table, tuple(data.keys()), where)
         params = tuple(data.values()) + where_params
-        
-        with self.get_connection() as conn:
-            cursor = conn.execute(sql, params)
-            conn.commit()
-            return cursor.rowcount
+        return self.connection.execute(sql, params).rowcount
 
     def delete(self, table: str, where: str, where_params: tuple = ()) -> int:
         """Удалить записи"""
         sql = f"DELETE FROM {table} WHERE {where}"
-        
-        with self.get_connection() as conn:
-            cursor = conn.execute(sql, where_params)
-            conn.commit()
-            return cursor.rowcount
+        return self.connection.execute(sql, where_params).rowcount
 
     def table_exists(self, table_name: str) -> bool:
         """Проверить существование таблицы"""
@@ -110,5 +175,22 @@ class Database:
         sql = f"PRAGMA table_info({table_name})"
         return self.fetch_all(sql)
 
-# Глобальный экземпляр базы данных
-db = Database()
+# Глобальный экземпляр базы данных: файл открывается и миграции прогоняются
+# при первом обращении (storage.db.db / get_db()), а не при импорте
+_db: Optional[Database] = None
+_db_lock = threading.Lock()
+
+
+def get_db() -> Database:
+    global _db
+    if _db is None:
+        with _db_lock:
+            if _db is None:
+                _db = Database()
+    return _db
+
+
+def __getattr__(name: str):
+    if name == "db":
+        return get_db()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,151 @@
+# storage/dedupe.py
+"""Индекс дубликатов сигналов.
+
+Ключ — (channel_id, message_id): id канала не меняется при переименовании,
+в отличие от title. У записей, сохранённых до появления channel_id, вместо
+него используется channel_name.
+
+Точное множество ключей даёт проверку за O(1). Опциональный Bloom-фильтр на
+диске позволяет при холодном старте не читать всю историю: снапшот покрыт
+фильтром, читается только несвёрнутый хвост журнала, а точное множество
+достраивается лениво — лишь если фильтр ответил «возможно, было».
+"""
+import hashlib
+import logging
+import math
+import os
+import struct
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+log = logging.getLogger("storage.dedupe")
+
+
+def signal_key(channel_id: Optional[int], channel_name: Optional[str], message_id: Any) -> Tuple[Hashable, str]:
+    return (channel_id if channel_id is not None else channel_name, str(message_id))
+
+
+def record_key(record: Dict[str, Any]) -> Tuple[Hashable, str]:
+    return signal_key(record.get('channel_id'), record.get('channel_name'), record.get('message_id'))
+
+
+class BloomFilter:
+    """Bloom-фильтр с двойным хэшированием (blake2b) и бинарным файлом на диске"""
+
+    _MAGIC = b'SBF1'
+    # magic, размер в битах, число хэшей, число ключей, размер и mtime_ns снапшота
+    _HEADER = struct.Struct('<4sQIQQQ')
+
+    def __init__(self, capacity: int = 100_000, error_rate: float = 0.001):
+        capacity = max(1, capacity)
+        self.size = max(8, int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)))
+        self.hashes = max(1, int(round(self.size / capacity * math.log(2))))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: Hashable):
+        digest = hashlib.blake2b(repr(key).encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key: Hashable) -> None:
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key: Hashable) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    def save(self, path: str, snapshot_stat: Tuple[int, int]) -> None:
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(self._HEADER.pack(self._MAGIC, self.size, self.hashes, self.count, *snapshot_stat))
+            f.write(self.bits)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, snapshot_stat: Tuple[int, int]) -> Optional['BloomFilter']:
+        """Фильтр с диска; None — если файла нет, он битый или снапшот с тех пор менялся"""
+        try:
+            with open(path, 'rb') as f:
+                header = f.read(cls._HEADER.size)
+                magic, size, hashes, count, st_size, st_mtime = cls._HEADER.unpack(header)
+                bits = bytearray(f.read())
+        except (OSError, struct.error):
+            return None
+        if magic != cls._MAGIC or (st_size, st_mtime) != tuple(snapshot_stat) or len(bits) != (size + 7) // 8:
+            return None
+        bloom = cls.__new__(cls)
+        bloom.size, bloom.hashes, bloom.count, bloom.bits = size, hashes, count, bits
+        return bloom
+
+
+class SignalIndex:
+    """Индекс (channel_id, message_id) поверх SignalJournal"""
+
+    def __init__(self, journal, bloom_path: Optional[str] = None, bloom_capacity: int = 100_000):
+        self.journal = journal
+        self.bloom_path = bloom_path
+        self.bloom_capacity = bloom_capacity
+        self.keys = set()
+        self.bloom: Optional[BloomFilter] = None
+        self._complete = True  # keys содержит всю историю
+
+    def _snapshot_stat(self) -> Tuple[int, int]:
+        try:
+            st = os.stat(self.journal.path)
+        except OSError:
+            return (0, 0)
+        return (st.st_size, st.st_mtime_ns)
+
+    def load(self) -> int:
+        """Строит индекс; возвращает число известных сигналов"""
+        self.keys = set()
+        self._complete = True
+        self.bloom = None
+        if self.bloom_path:
+            self.bloom = BloomFilter.load(self.bloom_path, self._snapshot_stat())
+            if self.bloom is not None:
+                # снапшот покрыт фильтром — читаем только хвост журнала
+                for record in self.journal.tail():
+                    self.add(record_key(record))
+                self._complete = False
+                return self.bloom.count
+
+        for record in self.journal.load():
+            self.keys.add(record_key(record))
+        if self.bloom_path:
+            self.bloom = BloomFilter(max(self.bloom_capacity, 2 * len(self.keys)))
+            for key in self.keys:
+                self.bloom.add(key)
+        return len(self.keys)
+
+    def _materialise(self) -> None:
+        log.info('Bloom filter hit, building exact dedupe index from history')
+        for record in self.journal.load():
+            self.keys.add(record_key(record))
+        self._complete = True
+
+    def __contains__(self, key: Tuple[Hashable, str]) -> bool:
+        if key in self.keys:
+            return True
+        if self._complete:
+            return False
+        if key not in self.bloom:
+            return False
+        self._materialise()
+        return key in self.keys
+
+    def add(self, key: Tuple[Hashable, str]) -> None:
+        if key in self.keys:
+            return
+        self.keys.add(key)
+        if self.bloom is not None:
+            self.bloom.add(key)
+
+    def save(self) -> None:
+        """Сохраняет фильтр; вызывать после компакции журнала"""
+        if self.bloom_path and self.bloom is not None:
+            self.bloom.save(self.bloom_path, self._snapshot_stat())
@@ -0,0 +1,182 @@
+# storage/journal.py
+"""Журнал сигналов: append-only JSONL + компактный снапшот.
+
+Новый сигнал — одна строка в конец signals_history.journal.jsonl, поэтому
+стоимость записи не зависит от длины истории. fsync делается пачками
+(каждые fsync_every записей или раз в fsync_interval_sec); между ними
+данные уже в буфере ОС и переживают падение процесса.
+
+Снапшот signals_history.json остаётся JSON-массивом (его читают
+check_demo_trades.py и demo_trade_monitor.py), но пишется по записи на
+строку — так его можно читать потоково. Компакция (снапшот + журнал ->
+новый снапшот через tmp + os.replace, затем очистка журнала) стоит
+O(истории) и выполняется при старте, при остановке и по ходу работы —
+каждые JOURNAL_COMPACT_EVERY новых записей, чтобы журнал не рос, пока бот
+запущен.
+"""
+import json
+import logging
+import os
+import time
+from itertools import chain
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, Optional
+
+from storage.dedupe import record_key
+
+log = logging.getLogger("storage.journal")
+
+JOURNAL_COMPACT_EVERY = int(os.getenv('JOURNAL_COMPACT_EVERY') or 500)  # 0 — только при старте/остановке
+
+# Поля TradingSignal, которые попадают в историю
+SIGNAL_FIELDS = ('message_id', 'channel_id', 'channel_name', 'position_type', 'entry_price', 'stop_loss',
+                 'take_profits', 'risk_percent', 'leverage', 'timestamp', 'raw_text')
+
+
+def signal_record(signal: Any) -> Dict[str, Any]:
+    """TradingSignal -> запись истории"""
+    record = {field: getattr(signal, field, None) for field in SIGNAL_FIELDS}
+    record['take_profits'] = record['take_profits'] or []
+    record['raw_text'] = record['raw_text'] or ''
+    return record
+
+
+def iter_snapshot(path: str) -> Iterator[Dict[str, Any]]:
+    """Потоковое чтение снапшота; старый формат (indent=2) читается через json.load"""
+    if not os.path.exists(path):
+        return
+    with open(path, 'r', encoding='utf-8') as f:
+        if f.readline().strip() == '[':
+            yielded = 0
+            for line in f:
+                line = line.strip()
+                if not line or line == ']':
+                    continue
+                try:
+                    record = json.loads(line.rstrip(','))
+                except ValueError:
+                    if yielded:
+                        raise
+                    break  # не построчный формат — читаем целиком ниже
+                yielded += 1
+                yield record
+            else:
+                return
+        f.seek(0)
+        yield from json.load(f)
+
+
+def iter_journal(path: str) -> Iterator[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return
+    with open(path, 'r', encoding='utf-8') as f:
+        for lineno, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                # недописанная строка после падения — пропускаем
+                log.warning('Skipping corrupt journal line %s:%d', path, lineno)
+
+
+def write_snapshot(path: str, records: Iterable[Dict[str, Any]]) -> int:
+    """JSON-массив по записи на строку; возвращает число записей"""
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('[\n')
+        for record in records:
+            if count:
+                f.write(',\n')
+            f.write(json.dumps(record, ensure_ascii=False))
+            count += 1
+        f.write('\n]\n')
+        f.flush()
+        os.fsync(f.fileno())
+    return count
+
+
+class SignalJournal:
+    """Append-only история сигналов со снапшотом"""
+
+    def __init__(self, path: str = 'signals_history.json',
+                 key: Callable[[Dict[str, Any]], Hashable] = record_key,
+                 fsync_every: int = 32, fsync_interval_sec: float = 1.0,
+                 compact_every: int = JOURNAL_COMPACT_EVERY):
+        self.path = path
+        self.journal_path = os.path.splitext(path)[0] + '.journal.jsonl'
+        self.key = key
+        self.fsync_every = fsync_every
+        self.fsync_interval_sec = fsync_interval_sec
+        self.compact_every = compact_every
+        self._fh = None
+        self._pending = 0
+        self._appended = 0  # записей в журнале с последней компакции
+        self._last_fsync = time.monotonic()
+
+    def load(self) -> Iterator[Dict[str, Any]]:
+        """Снапшот, затем журнал.
+
+        Дубликаты по ключу (см. storage.dedupe) пропускаются: они возможны, если процесс упал
+        между заменой снапшота и очисткой журнала.
+        """
+        seen = set()
+        for record in chain(iter_snapshot(self.path), iter_journal(self.journal_path)):
+            key = self.key(record)
+            if key in seen:
+                continue
+            seen.add(key)
+            yield record
+
+    def tail(self) -> Iterator[Dict[str, Any]]:
+        """Только несвёрнутые записи журнала"""
+        return iter_journal(self.journal_path)
+
+    def append(self, record: Dict[str, Any]) -> None:
+        if self._fh is None:
+            self._fh = open(self.journal_path, 'a', encoding='utf-8')
+        self._fh.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self._fh.flush()
+        self._pending += 1
+        self._appended += 1
+        if self.compact_every and self._appended >= self.compact_every:
+            self.compact()  # включает fsync
+        elif self._pending >= self.fsync_every or time.monotonic() - self._last_fsync >= self.fsync_interval_sec:
+            self.sync()
+
+    def sync(self) -> None:
+        """fsync накопленных записей"""
+        if self._fh is not None and self._pending:
+            os.fsync(self._fh.fileno())
+        self._pending = 0
+        self._last_fsync = time.monotonic()
+
+    def compact(self) -> Optional[int]:
+        """Сворачивает журнал в снапшот; None — если сворачивать нечего"""
+        self.sync()
+        has_journal = os.path.exists(self.journal_path) and os.path.getsize(self.journal_path) > 0
+        if not has_journal and os.path.exists(self.path):
+            return None
+
+        tmp_path = self.path + '.tmp'
+        count = write_snapshot(tmp_path, self.load())
+        os.replace(tmp_path, self.path)
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+        # снапшот уже на диске — теперь журнал можно очистить
+        open(self.journal_path, 'w', encoding='utf-8').close()
+        self._appended = 0
+        return count
+
+    def close(self) -> None:
+        try:
+            self.compact()
+        finally:
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+
+
+def read_history(path: str = 'signals_history.json') -> Iterator[Dict[str, Any]]:
+    """Вся история (снапшот + несвёрнутый журнал) для утилит, только чтение"""
+    return SignalJournal(path).load()
@@ -1,39 +1,42 @@
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 import json
-from storage.db import db
+from storage.db import Database, get_db
 
 class PositionRepository:
     """Репозиторий для работы с позициями"""
+
+    def __init__(self, database: Optional[Database] = None):
+        self.db = database or get_db()
     
     def create(self, data: Dict[str, Any]) -> int:
         """Создать новую позицию"""
-        return db.insert('positions', data)
+        return self.db.insert('positions', data)
     
     def get_by_id(self, position_id: int) -> Optional[Dict[str, Any]]:
         """Получить позицию по ID"""
-        return db.fetch_one(
+        return self.db.fetch_one(
             "SELECT * FROM positions WHERE id = ?", 
             (position_id,)
         )
     
     def get_by_signal_id(self, signal_id: str) -> Optional[Dict[str, Any]]:
         """Получить позицию по signal_id"""
-        return db.fetch_one(
+        return self.db.fetch_one(
             "SELECT * FROM positions WHERE signal_id = ?", 
             (signal_id,)
         )
     
     def get_by_state(self, state: str) -> List[Dict[str, Any]]:
         """Получить позиции по состоянию"""
-        return db.fetch_all(
+        return self.db.fetch_all(
             "SELECT * FROM positions WHERE state = ? ORDER BY created_at DESC", 
             (state,)
         )
     
     def get_active_positions(self) -> List[Dict[str, Any]]:
         """Получить все активные позиции"""
-        return db.fetch_all(
+        return self.db.fetch_all(
             """
             SELECT * FROM positions 
             WHERE state NOT IN ('CLOSED', 'CANCELED') 
@@ -43,7 +46,7 @@ class PositionRepository:
     
     def update_state(self, position_id: int, new_state: str) -> int:
         """Обновить состояние позиции"""
-        return db.update(
+        return self.db.update(
             'positions', 
             {'state': new_state}, 
             'id = ?', 
@@ -52,39 +55,42 @@ class PositionRepository:
     
     def update_position(self, position_id: int, data: Dict[str, Any]) -> int:
         """Обновить позицию"""
-        return db.update('positions', data, 'id = ?', (position_id,))
+        return self.db.update('positions', data, 'id = ?', (position_id,))
     
     def get_recent_positions(self, limit: int = 50) -> List[Dict[str, Any]]:
         """Получить последние позиции"""
-        return db.fetch_all(
+        return self.db.fetch_all(
             "SELECT * FROM positions ORDER BY created_at DESC LIMIT ?", 
             (limit,)
         )
 
 class OrderRepository:
     """Репозиторий для работы с ордерами"""
+
+    def __init__(self, database: Optional[Database] = None):
+        self.db = database or get_db()
     
     def create(self, data: Dict[str, Any]) -> int:
         """Создать новый ордер"""
-        return db.insert('orders', data)
+        return self.db.insert('orders', data)
     
     def get_by_id(self, order_id: int) -> Optional[Dict[str, Any]]:
         """Получить ордер по ID"""
-        return db.fetch_one(
+        return self.db.fetch_one(
             "SELECT * FROM orders WHERE id = ?", 
             (order_id,)
         )
     
     def get_by_position_id(self, position_id: int) -> List[Dict[str, Any]]:
         """Получить ордера позиции"""
-        return db.fetch_all(
+        return self.db.fetch_all(
             "SELECT * FROM orders WHERE position_id = ? ORDER BY created_at", 
             (position_id,)
         )
     
     def get_by_status(self, status: str) -> List[Dict[str, Any]]:
         """Получить ордера по статусу"""
-        return db.fetch_all(
+        return self.db.fetch_all(
             "SELECT * FROM orders WHERE status = ? ORDER BY created_at DESC", 
             (status,)
         )
@@ -94,50 +100,56 @@ class OrderRepository:
         data = {'status': new_status}
         if order_id_external:
             data['order_id'] = order_id_external
-        return db.update('orders', data, 'id = ?', (order_id,))
+        return self.db.update('orders', data, 'id = ?', (order_id,))
     
     def update_order(self, order_id: int, data: Dict[str, Any]) -> int:
         """Обновить ордер"""
-        return db.update('orders', data, 'id = ?', (order_id,))
+        return self.db.update('orders', data, 'id = ?', (order_id,))
 
 class FillRepository:
     """Репозиторий для работы с исполнениями"""
+
+    def __init__(self, database: Optional[Database] = None):
+        self.db = database or get_db()
     
     def create(self, data: Dict[str, Any]) -> int:
         """Создать новое исполнение"""
-        return db.insert('fills', data)
+        return self.db.insert('fills', data)
     
     def get_by_order_id(self, order_id: int) -> List[Dict[str, Any]]:
         """Получить исполнения ордера"""
-        return db.fetch_all(
+        return self.db.fetch_all(
             "SELECT * FROM fills WHERE order_id = ? ORDER BY ts", 
             (order_id,)
         )
     
     def get_by_position_id(self, position_id: int) -> List[Dict[str, Any]]:
         """Получить исполнения позиции"""
-        return db.fetch_all(
+        return self.db.fetch_all(
             "SELECT * FROM fills WHERE position_id = ? ORDER BY ts", 
             (position_id,)
         )
 
 class StatsRepository:
     """Репозиторий для работы со статистикой"""
+
+    def __init__(self, database: Optional[Database] = None):
+        self.db = database or get_db()
     
     def create(self, data: Dict[str, Any]) -> int:
         """Создать новую статистику"""
-        return db.insert('stats', data)
+        return self.db.insert('stats', data)
     
     def get_by_position_id(self, position_id: int) -> Optional[Dict[str, Any]]:
         """Получить статистику позиции"""
-        return db.fetch_one(
+        return self.db.fetch_one(
             "SELECT * FROM stats WHERE position_id = ?", 
             (position_id,)
         )
     
     def update_stats(self, position_id: int, data: Dict[str, Any]) -> int:
         """Обновить статистику"""
-        return db.update('stats', data, 'position_id = ?', (position_id,))
+        return self.db.update('stats', data, 'position_id = ?', (position_id,))
     
     def get_overall_stats(self) -> Dict[str, Any]:
         """Получить общую статистику"""
@@ -153,7 +165,7 @@ class StatsRepository:
         FROM stats
         WHERE closed_at IS NOT NULL
         """
-        result = db.fetch_one(sql)
+        result = self.db.fetch_one(sql)
         if result:
             total_trades = result['total_trades']
             wins = result['wins']
@@ -175,10 +187,21 @@ class StatsRepository:
         GROUP BY DATE(closed_at)
         ORDER BY date DESC
         """.format(days)
-        return db.fetch_all(sql)
+        return self.db.fetch_all(sql)
+
+# Глобальные экземпляры репозиториев: создаются (и открывают общую БД)
+# при первом обращении, а не при импорте модуля
+_REPOSITORIES = {
+    'position_repo': PositionRepository,
+    'order_repo': OrderRepository,
+    'fill_repo': FillRepository,
+    'stats_repo': StatsRepository,
+}
+
 
-# Глобальные экземпляры репозиториев
-position_repo = PositionRepository()
-order_repo = OrderRepository()
-fill_repo = FillRepository()
-stats_repo = StatsRepository()
+def __getattr__(name: str):
+    factory = _REPOSITORIES.get(name)
+    if factory is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    repo = globals()[name] = factory()  # следующие обращения идут мимо __getattr__
+    return repo
@@ -0,0 +1,147 @@
+# storage/watcher_state.py
+"""Состояние Watcher в таблицах positions/orders.
+
+План Watcher — строка positions (signal_id = plan_id) и ордера к ней:
+по одному TP на уровень и один SL. Параметры, которым нет колонки
+(breakeven_after_tp, opened_at, time_stop_min, qty_total, entry, tp_shares),
+лежат в extra_json ордера SL. Доли TP хранятся сами по себе: из объёмов
+ордеров их не восстановить, если qty_total не был известен (0).
+
+Пишем по событию, короткими транзакциями:
+- регистрация — позиция и ордера одним коммитом;
+- достигнутые TP — ордера TP -> FILLED, позиция -> TP{n}_HIT;
+- перенос стопа в БУ — цена SL, позиция -> BREAKEVEN;
+- закрытие — позиция -> CLOSED, невыполненные ордера -> CANCELED.
+
+На старте load_active() одним запросом (positions JOIN orders) собирает
+активные планы со счётчиками TP — из них Watcher пересобирает книгу
+триггеров.
+"""
+import json
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from storage.db import Database, get_db
+
+logger = logging.getLogger(__name__)
+
+_ACTIVE_SQL = """
+SELECT p.id AS position_id, p.signal_id, p.source, p.symbol, p.side, p.entry_low, p.entry_high,
+       p.stop_price, p.state, o.id AS order_id, o.kind, o.price, o.qty, o.status, o.extra_json
+FROM positions p
+JOIN orders o ON o.position_id = p.id
+WHERE p.state NOT IN ('CLOSED', 'CANCELED') AND o.kind IN ('TP', 'SL')
+ORDER BY p.id, o.id
+"""
+
+_META_KEYS = ("breakeven_after_tp", "opened_at", "time_stop_min", "qty_total", "entry", "tp_shares")
+
+
+class WatcherStore:
+    """Запись и восстановление планов Watcher"""
+
+    def __init__(self, database: Optional[Database] = None):
+        self.db = database or get_db()
+
+    def _position_id(self, plan_id: str) -> Optional[int]:
+        row = self.db.fetch_one("SELECT id FROM positions WHERE signal_id = ?", (plan_id,))
+        return row["id"] if row else None
+
+    def save_plan(self, plan: Dict[str, Any]) -> int:
+        """Позиция и ордера TP/SL; повторная регистрация того же plan_id ничего не пишет"""
+        existing = self._position_id(plan["plan_id"])
+        if existing is not None:
+            return existing
+        side = "BUY" if plan["side"] == "LONG" else "SELL"
+        close_side = "SELL" if side == "BUY" else "BUY"
+        entry = float(plan["entry"])
+        zone = plan.get("entry_zone") or [entry, entry]
+        tps = plan.get("tps", [])
+        shares = (plan.get("tp_shares") or [1.0 / len(tps)] * len(tps)) if tps else []
+        qty_total = float(plan.get("qty_total") or 0.0)
+        meta = {key: plan.get(key) for key in _META_KEYS}
+        meta["tp_shares"] = shares
+        with self.db.transaction():
+            position_id = self.db.insert("positions", {
+                "signal_id": plan["plan_id"], "source": plan.get("source") or "UNKNOWN",
+                "symbol": plan["symbol"], "side": side,
+                "entry_low": float(min(zone)), "entry_high": float(max(zone)),
+                "stop_price": float(plan["stop"]),
+                "risk_leg_pct": float(plan.get("risk_leg_pct") or 0.0),
+                "risk_total_cap_pct": float(plan.get("risk_total_pct") or 0.0),
+                "leverage_min": int(plan.get("leverage") or 0), "leverage_max": int(plan.get("leverage") or 0),
+                "state": "WATCHING",
+            })
+            for i, tp in enumerate(tps):
+                share = shares[i] if i < len(shares) else 0.0
+                self.db.insert("orders", {"position_id": position_id, "kind": "TP", "side": close_side,
+                                          "price": float(tp), "qty": qty_total * share, "reduce_only": 1})
+            self.db.insert("orders", {"position_id": position_id, "kind": "SL", "side": close_side,
+                                      "price": float(plan["stop"]), "qty": qty_total, "reduce_only": 1,
+                                      "extra_json": json.dumps(meta)})
+        return position_id
+
+    def record_hits(self, plan_id: str, hit: int) -> None:
+        """Первые hit ордеров TP исполнены"""
+        position_id = self._position_id(plan_id)
+        if position_id is None:
+            return
+        with self.db.transaction():
+            tp_ids = [row["id"] for row in self.db.fetch_all(
+                "SELECT id FROM orders WHERE position_id = ? AND kind = 'TP' ORDER BY id", (position_id,))]
+            for order_id in tp_ids[:hit]:
+                self.db.update("orders", {"status": "FILLED"}, "id = ? AND status = 'NEW'", (order_id,))
+            self.db.update("positions", {"state": f"TP{hit}_HIT"}, "id = ? AND state != 'BREAKEVEN'",
+                           (position_id,))
+
+    def record_breakeven(self, plan_id: str, stop: float) -> None:
+        position_id = self._position_id(plan_id)
+        if position_id is None:
+            return
+        with self.db.transaction():
+            self.db.update("positions", {"state": "BREAKEVEN", "stop_price": float(stop)}, "id = ?", (position_id,))
+            self.db.update("orders", {"price": float(stop)}, "position_id = ? AND kind = 'SL'", (position_id,))
+
+    def record_closed(self, plan_id: str, reason: str) -> None:
+        """reason: stop | time | tp; по стопу SL помечается FILLED, остальное невыполненное — CANCELED"""
+        position_id = self._position_id(plan_id)
+        if position_id is None:
+            return
+        with self.db.transaction():
+            self.db.update("positions", {"state": "CLOSED"}, "id = ?", (position_id,))
+            if reason == "stop":
+                self.db.update("orders", {"status": "FILLED"}, "position_id = ? AND kind = 'SL'", (position_id,))
+            self.db.update("orders", {"status": "CANCELED"}, "position_id = ? AND status = 'NEW'", (position_id,))
+
+    def load_active(self) -> List[Tuple[Dict[str, Any], int]]:
+        """Активные планы одним запросом: [(plan, сколько TP достигнуто)]"""
+        plans: Dict[int, Dict[str, Any]] = {}
+        hits: Dict[int, int] = {}
+        tp_qty: Dict[int, List[float]] = {}
+        for row in self.db.fetch_all(_ACTIVE_SQL):
+            pid = row["position_id"]
+            plan = plans.get(pid)
+            if plan is None:
+                plan = plans[pid] = {
+                    "plan_id": row["signal_id"], "source": row["source"], "symbol": row["symbol"],
+                    "side": "LONG" if row["side"] == "BUY" else "SHORT",
+                    "entry": (row["entry_low"] + row["entry_high"]) / 2,
+                    "stop": row["stop_price"], "tps": [],
+                }
+                hits[pid] = 0
+                tp_qty[pid] = []
+            if row["kind"] == "TP":
+                plan["tps"].append(row["price"])
+                tp_qty[pid].append(row["qty"])
+                hits[pid] += row["status"] == "FILLED"
+            else:
+                meta = json.loads(row["extra_json"] or "{}")
+                plan.update({k: v for k, v in meta.items() if v is not None})
+        result = []
+        for pid, plan in plans.items():
+            if not plan.get("tp_shares"):
+                # записи до хранения долей в метаданных — по объёмам ордеров TP
+                qty_total = plan.get("qty_total") or sum(tp_qty[pid])
+                plan["tp_shares"] = [q / qty_total for q in tp_qty[pid]] if qty_total else []
+            result.append((plan, hits[pid]))
+        return result
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Общие фикстуры тестов: настройки без .env и хранилище (storage/*)."""
+
+import pytest
+
+TEST_ENV = {"API_ID": "1", "API_HASH": "x", "TGBOT_TOKEN": "1:x", "TG_OWNER_ID": "1"}
+
+
+@pytest.fixture
+def settings_env(monkeypatch):
+    """Обязательные переменные окружения и сброшенный ленивый get_settings(): без .env валидация не пройдёт"""
+    for name, value in TEST_ENV.items():
+        monkeypatch.setenv(name, value)
+    monkeypatch.delenv("SYMBOLS", raising=False)
+    monkeypatch.setattr("config.settings._settings", None)
+
+
+@pytest.fixture
+def settings(settings_env, monkeypatch):
+    """Свой экземпляр Settings вместо ленивого синглтона"""
+    from config import settings as config_settings
+    test_settings = config_settings.Settings()
+    monkeypatch.setattr(config_settings, "_settings", test_settings)
+    return test_settings
+
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    # ленивый storage.db.db (get_db) открывается по относительному пути — пусть и он окажется в tmp
+    monkeypatch.chdir(tmp_path)
+    from storage.db import Database
+    database = Database(str(tmp_path / 'trader.db'))
+    yield database
+    database.close()
+
+
+@pytest.fixture
+def position_row():
+    """Фабрика строки positions: position_row('sig-1') -> dict для PositionRepository.create"""
+    def make(signal_id):
+        return {
+            'signal_id': signal_id, 'source': 'INTRADAY', 'symbol': 'BTCUSDT', 'side': 'SELL',
+            'entry_low': 88800.0, 'entry_high': 90400.0, 'stop_price': 91600.0,
+            'risk_leg_pct': 1.5, 'risk_total_cap_pct': 3.0, 'leverage_min': 10, 'leverage_max': 25,
+            'state': 'PENDING_SETUP',
+        }
+    return make
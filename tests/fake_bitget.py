@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Local fake of the Bitget mix v1 REST API for offline tests.
+
+A real HTTP server on 127.0.0.1 (random port) that speaks just enough of the
+API for BitgetTrader / BitgetClient: leverage, placeOrder, placePlan,
+batch-orders, cancel-all and per-symbol cancel (orders and plans), single
+position, contracts and ticker. Every
+request is recorded. Failures can be injected:
+
+- ``reject_price[price] = n`` rejects the next n orders at that price
+  (inside batch-orders this lands in ``data.failure``, like the real API);
+- ``fail_next[path] = n`` answers the next n calls to path with HTTP 500;
+- ``throttle_next[path] = n`` answers the next n calls with HTTP 429
+  (``Retry-After: 0``), like the exchange rate limiter.
+
+As on the exchange, a clientOid that was already accepted is rejected as a
+duplicate, so a retry that re-sends accepted legs shows up in the results.
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class FakeBitget:
+    def __init__(self, latency_sec: float = 0.0):
+        self.latency_sec = latency_sec
+        self.requests = []          # (method, path, json body | query dict, headers)
+        self.orders = {}            # orderId -> order
+        self.client_oids = set()
+        self.reject_price = {}
+        self.fail_next = {}
+        self.throttle_next = {}
+        self.contracts = [{"symbol": "BTCUSDT_UMCBL", "pricePlace": "1", "sizeMultiplier": "0.001",
+                           "minTradeNum": "0.001"},
+                          {"symbol": "ETHUSDT_UMCBL", "pricePlace": "2", "sizeMultiplier": "0.01",
+                           "minTradeNum": "0.01"}]
+        self.last_price = "90000.0"
+        self.positions = {}         # symbol -> [{"holdSide": "long", "total": "0.5"}]
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def paths(self):
+        return [r[1] for r in self.requests]
+
+    # ===== API =====
+    def _accept(self, order):
+        with self._lock:
+            price = order.get("price") or order.get("triggerPrice")
+            if self.reject_price.get(price, 0) > 0:
+                self.reject_price[price] -= 1
+                return None, "40762 price rejected"
+            oid = order.get("clientOid")
+            if oid and oid in self.client_oids:
+                return None, "40757 duplicate clientOid"
+            order_id = str(len(self.orders) + 1)
+            self.orders[order_id] = order
+            if oid:
+                self.client_oids.add(oid)
+            return order_id, None
+
+    def _route(self, method, path, body):
+        if method == "GET" and path == "/api/mix/v1/market/contracts":
+            return 200, {"code": "00000", "data": self.contracts}
+        if method == "GET" and path == "/api/mix/v1/market/ticker":
+            return 200, {"code": "00000", "data": {"symbol": body.get("symbol"), "last": self.last_price}}
+        if path == "/api/mix/v1/account/setLeverage":
+            return 200, {"code": "00000", "data": {"symbol": body.get("symbol"), "leverage": body.get("leverage")}}
+        if path in ("/api/mix/v1/order/placeOrder", "/api/mix/v1/plan/placePlan"):
+            order_id, error = self._accept(body)
+            if error:
+                return 400, {"code": error.split()[0], "msg": error}
+            return 200, {"code": "00000", "data": {"orderId": order_id, "clientOid": body.get("clientOid")}}
+        if path in ("/api/mix/v1/order/cancel-all-orders", "/api/mix/v1/plan/cancelAllPlan"):
+            with self._lock:
+                cancelled = len(self.orders)
+                self.orders.clear()
+            return 200, {"code": "00000", "data": {"cancelled": cancelled}}
+        if path in ("/api/mix/v1/order/cancel-symbol-orders", "/api/mix/v1/plan/cancelSymbolPlan"):
+            with self._lock:
+                ids = [i for i, o in self.orders.items() if o.get("symbol") == body.get("symbol")]
+                for order_id in ids:
+                    del self.orders[order_id]
+            return 200, {"code": "00000", "data": {"cancelled": len(ids)}}
+        if method == "GET" and path == "/api/mix/v1/position/singlePosition-v2":
+            return 200, {"code": "00000", "data": self.positions.get(body.get("symbol"), [])}
+        if path == "/api/mix/v1/order/batch-orders":
+            info, failure = [], []
+            for order in body.get("orderDataList", []):
+                order_id, error = self._accept({**order, "symbol": body.get("symbol")})
+                if error:
+                    failure.append({"orderId": "", "clientOid": order.get("clientOid"), "errorMsg": error})
+                else:
+                    info.append({"orderId": order_id, "clientOid": order.get("clientOid")})
+            return 200, {"code": "00000", "data": {"orderInfo": info, "failure": failure}}
+        return 404, {"code": "40404", "msg": f"unknown {method} {path}"}
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+
+            def log_message(self, *args):
+                pass
+
+            def _serve(self, method):
+                url = urlparse(self.path)
+                if method == "GET":
+                    body = {k: v[0] for k, v in parse_qs(url.query).items()}
+                else:
+                    length = int(self.headers.get("Content-Length") or 0)
+                    raw = self.rfile.read(length) if length else b""
+                    body = json.loads(raw) if raw else {}
+                with fake._lock:
+                    fake.requests.append((method, url.path, body, dict(self.headers)))
+                    throttled = fake.throttle_next.get(url.path, 0) > 0
+                    failing = not throttled and fake.fail_next.get(url.path, 0) > 0
+                    if throttled:
+                        fake.throttle_next[url.path] -= 1
+                    if failing:
+                        fake.fail_next[url.path] -= 1
+                if fake.latency_sec:
+                    threading.Event().wait(fake.latency_sec)
+                if throttled:
+                    status, payload = 429, {"code": "429", "msg": "Too Many Requests"}
+                elif failing:
+                    status, payload = 500, {"code": "50000", "msg": "injected failure"}
+                else:
+                    status, payload = fake._route(method, url.path, body)
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                if throttled:
+                    self.send_header("Retry-After", "0")
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._serve("GET")
+
+            def do_POST(self):
+                self._serve("POST")
+
+        return Handler
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Local fake of the Bitget mix v1 public WebSocket for offline tests.
+
+An aiohttp server on 127.0.0.1 (random port), run inside the test's event
+loop. It answers the text "ping" with "pong", records subscribe requests
+and lets the test drive the feed:
+
+- ``await push(symbol, price)`` sends a ticker snapshot to subscribed clients;
+- ``await drop()`` closes every open connection, like an exchange restart.
+"""
+import json
+import time
+
+from aiohttp import WSMsgType, web
+
+
+class FakeBitgetWS:
+    def __init__(self):
+        self.subscriptions = []     # args of every subscribe request, in order
+        self.pings = 0
+        self.connections = 0
+        self._clients = {}          # ws -> set of subscribed instIds
+        self._runner = None
+        self.url = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/mix/v1/stream", self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        self.url = f"http://127.0.0.1:{port}/mix/v1/stream"
+        return self
+
+    async def stop(self):
+        await self.drop()
+        await self._runner.cleanup()
+
+    async def _handle(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.connections += 1
+        self._clients[ws] = set()
+        try:
+            async for msg in ws:
+                if msg.type != WSMsgType.TEXT:
+                    continue
+                if msg.data == "ping":
+                    self.pings += 1
+                    await ws.send_str("pong")
+                    continue
+                payload = json.loads(msg.data)
+                if payload.get("op") == "subscribe":
+                    for arg in payload["args"]:
+                        self.subscriptions.append(arg)
+                        self._clients[ws].add(arg["instId"])
+                        await ws.send_str(json.dumps({"event": "subscribe", "arg": arg}))
+        finally:
+            self._clients.pop(ws, None)
+        return ws
+
+    @property
+    def subscribed(self):
+        return sum(1 for symbols in self._clients.values() if symbols)
+
+    async def push(self, symbol, price):
+        message = json.dumps({
+            "action": "snapshot",
+            "arg": {"instType": "mc", "channel": "ticker", "instId": symbol},
+            "data": [{"instId": symbol, "last": str(price), "ts": int(time.time() * 1000)}],
+        })
+        for ws, symbols in list(self._clients.items()):
+            if symbol in symbols and not ws.closed:
+                await ws.send_str(message)
+
+    async def drop(self):
+        for ws in list(self._clients):
+            await ws.close()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import asyncio
+import threading
+
+import pytest
+
+
+def test_writes_are_coalesced_and_off_loop(database, position_row):
+    from storage.async_repo import AsyncStorage
+    write_threads = set()
+
+    async def scenario():
+        async with AsyncStorage(database) as storage:
+            original = storage.positions._repo.create
+
+            def create(data):
+                write_threads.add(threading.current_thread().name)
+                return original(data)
+            storage.positions._repo.create = create
+
+            ids = await asyncio.gather(*(storage.positions.create(position_row(f'sig-{i}')) for i in range(20)))
+            rows = await storage.positions.get_recent_positions(limit=100)
+            return ids, rows, storage.writer.batches
+
+    ids, rows, batches = asyncio.run(scenario())
+    assert sorted(ids) == list(range(1, 21)) and len(rows) == 20
+    assert write_threads == {'db-writer'}
+    assert batches < 20  # пачки, а не коммит на каждую запись
+
+
+def test_failed_write_does_not_break_batch(database, position_row):
+    from storage.async_repo import AsyncStorage
+
+    async def scenario():
+        async with AsyncStorage(database) as storage:
+            results = await asyncio.gather(
+                storage.positions.create(position_row('dup')),
+                storage.positions.create(position_row('dup')),  # UNIQUE signal_id
+                storage.positions.create(position_row('ok')),
+                return_exceptions=True,
+            )
+            found = await storage.positions.get_by_signal_id('ok')
+            return results, found
+
+    results, found = asyncio.run(scenario())
+    assert isinstance(results[1], Exception)
+    assert not isinstance(results[0], Exception) and found is not None
+
+
+def test_run_in_transaction_is_atomic(database, position_row):
+    from storage.async_repo import AsyncStorage
+    from storage.repo import OrderRepository, PositionRepository
+
+    def setup(fail):
+        position_id = PositionRepository(database).create(position_row('setup'))
+        OrderRepository(database).create({'position_id': position_id, 'kind': 'ENTRY', 'side': 'BUY',
+                                          'price': 88000.0, 'qty': 0.01})
+        if fail:
+            raise RuntimeError('exchange rejected')
+        return position_id
+
+    async def scenario():
+        async with AsyncStorage(database) as storage:
+            with pytest.raises(RuntimeError):
+                await storage.run_in_transaction(setup, True)
+            assert await storage.positions.get_by_signal_id('setup') is None
+            position_id = await storage.run_in_transaction(setup, False)
+            return await storage.orders.get_by_position_id(position_id)
+
+    assert len(asyncio.run(scenario())) == 1
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import asyncio
+
+import pytest
+
+import bitget_integration
+from bitget_integration import BitgetHTTP, BitgetTrader, Spec
+from fake_bitget import FakeBitget
+from improved_signal_parser import ImprovedSignalParser
+from market.bitget_batch import BATCH_ORDER_PATH, BatchOrderError, submit_batches
+from market.rate_limit import RequestLimiter
+
+TEXT = "Пробую шорт 88800-90400 риском 0.5% стоп над 91600 Плечо: х10 Цели: 88600-88400"
+
+
+@pytest.fixture
+def fake_bitget():
+    with FakeBitget() as server:
+        yield server
+
+
+@pytest.fixture
+def trader(fake_bitget, monkeypatch):
+    monkeypatch.setattr(bitget_integration, "DRY_RUN", False)
+    trader = BitgetTrader()
+    trader.http = BitgetHTTP(fake_bitget.url)
+    trader.http.limiter = RequestLimiter()  # инъекции 500 не должны открыть общий предохранитель
+    trader.spec = Spec(price_step=0.1, size_step=0.001, min_size=0.001)
+    return trader
+
+
+def test_ladder_goes_out_as_one_batch(trader, fake_bitget):
+    levels = [(88600.0 - 100 * i, 0.002) for i in range(10)]
+    outcome = trader.place_take_profits("SHORT", levels)
+
+    assert outcome.ok and len(outcome.placed) == 10 and outcome.requests == 1
+    assert fake_bitget.paths() == [BATCH_ORDER_PATH]
+    body = fake_bitget.requests[0][2]
+    assert body["symbol"] == "BTCUSDT_UMCBL" and len(body["orderDataList"]) == 10
+    assert all(o["reduceOnly"] == "true" and o["side"] == "close_long" for o in body["orderDataList"])
+    assert "ACCESS-SIGN" in fake_bitget.requests[0][3]
+
+
+def test_only_rejected_legs_are_retried(trader, fake_bitget, monkeypatch):
+    monkeypatch.setattr("market.bitget_batch.time.sleep", lambda s: None)
+    fake_bitget.reject_price["88400.0"] = 1
+    outcome = trader.place_take_profits("SHORT", [(88600.0, 0.01), (88400.0, 0.01), (88200.0, 0.01)])
+
+    assert outcome.ok and outcome.attempts == 2 and len(outcome.placed) == 3
+    retried = fake_bitget.requests[1][2]["orderDataList"]
+    assert [o["price"] for o in retried] == ["88400.0"]  # без дублей уже принятых
+    assert len(fake_bitget.orders) == 3
+
+
+def test_persistent_rejection_raises_with_partial_result(trader, fake_bitget, monkeypatch):
+    monkeypatch.setattr("market.bitget_batch.time.sleep", lambda s: None)
+    fake_bitget.reject_price["88400.0"] = 10
+    with pytest.raises(BatchOrderError) as err:
+        trader.place_take_profits("SHORT", [(88600.0, 0.01), (88400.0, 0.01)], retries=2)
+    assert len(err.value.result) == 1 and len(err.value.outcome.failed) == 1
+    assert err.value.outcome.attempts == 3
+
+
+def test_whole_request_failure_retries_chunk(trader, fake_bitget, monkeypatch):
+    monkeypatch.setattr("market.bitget_batch.time.sleep", lambda s: None)
+    fake_bitget.fail_next[BATCH_ORDER_PATH] = 1
+    outcome = trader.place_take_profits("SHORT", [(88600.0, 0.01), (88400.0, 0.01)])
+    assert outcome.ok and outcome.requests == 2 and len(fake_bitget.orders) == 2
+
+
+def test_chunks_respect_api_limit():
+    sent = []
+
+    def send(chunk):
+        sent.append(len(chunk))
+        return {"code": "00000", "data": {"orderInfo": [{"orderId": o["clientOid"], "clientOid": o["clientOid"]}
+                                                          for o in chunk]}}
+
+    outcome = submit_batches(send, [{"clientOid": str(i)} for i in range(120)], limit=50)
+    assert sent == [50, 50, 20] and len(outcome.placed) == 120
+
+
+def test_execute_trade_async_against_fake_server(trader, fake_bitget):
+    signal = ImprovedSignalParser().parse_signal("1", "test", TEXT)
+    result = asyncio.run(trader.execute_trade_async(signal, {"qty_total": 0.02, "tp_shares": [0.5, 0.5]}))
+
+    assert result["ok"] and [leg["name"] for leg in result["legs"]] == ["leverage", "entry", "stop", "tps"]
+    assert fake_bitget.paths()[:2] == ["/api/mix/v1/account/setLeverage", "/api/mix/v1/order/placeOrder"]
+    assert sorted(fake_bitget.paths()[2:]) == [BATCH_ORDER_PATH, "/api/mix/v1/plan/placePlan"]
+
+
+def test_executor_batches_take_profits(fake_bitget, settings):
+    from market.bitget_client import BitgetClient
+    from market.bitget_transport import BitgetTransport
+    from risk.manager import build_order_plan
+    from trader.executor import Executor
+
+    client = BitgetClient()
+    client.dry_run = False
+    client.base_url = fake_bitget.url
+    client.transport = BitgetTransport(fake_bitget.url)
+    executor = Executor(dry_run=False)
+    executor.client = client
+    plan = build_order_plan(source="INTRADAY", side="SELL", entry_zone=[88800, 90400], stop_loss=91600,
+                            tp_levels=[88600, 88400, 88200], legs="1/2", leverage_hint=10)
+
+    orders, _ = asyncio.run(executor.place_all_async(plan))
+    batches = [r for r in fake_bitget.requests if r[1] == BATCH_ORDER_PATH]
+    assert len(batches) == 1 and len(batches[0][2]["orderDataList"]) == len(orders) - 2
+    assert executor.last_report.ok and all(o.order_id for o in orders)
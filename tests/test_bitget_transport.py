@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import asyncio
+import json
+
+import httpx
+
+import bitget_integration
+from bitget_integration import BitgetTrader, Spec
+from improved_signal_parser import ImprovedSignalParser
+from market.bitget_transport import BitgetTransport
+
+TEXT = "Пробую шорт 88800-90400 риском 0.5% стоп над 91600 Плечо: х10 Цели: 88600-88400"
+
+
+def _mock_transport(calls):
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(200, json={"code": "00000", "data": {"orderId": str(len(calls))}})
+    return BitgetTransport("https://bitget.test", transport=httpx.MockTransport(handler))
+
+
+def test_execute_trade_async_signs_and_reuses_client(monkeypatch):
+    monkeypatch.setattr(bitget_integration, "DRY_RUN", False)
+    monkeypatch.setattr(bitget_integration, "BATCH_TAKE_PROFITS", False)  # по одному placeOrder на TP
+    calls = []
+    trader = BitgetTrader()
+    trader.spec = Spec(price_step=0.1, size_step=0.001, min_size=0.001)
+    trader.http.transport = _mock_transport(calls)
+    signal = ImprovedSignalParser().parse_signal("1", "test", TEXT)
+
+    async def scenario():
+        result = await trader.execute_trade_async(signal, {"qty_total": 0.02, "tp_shares": [0.5, 0.5]})
+        client = trader.http.transport.client
+        await trader.set_leverage_async(10)
+        assert trader.http.transport.client is client  # один пул на все вызовы
+        return result
+
+    result = asyncio.run(scenario())
+    legs = result.pop("legs")
+    result.pop("elapsed_ms")
+    assert result == {"ok": True, "entry": 89600.0, "stop": 91600.0, "tps": [88600.0, 88400.0],
+                      "qty_total": 0.02, "leverage": 10}
+    assert [leg["name"] for leg in legs] == ["leverage", "entry", "stop", "tp1", "tp2"]
+    paths = [c.url.path for c in calls]
+    assert paths[:2] == ["/api/mix/v1/account/setLeverage", "/api/mix/v1/order/placeOrder"]
+    assert sorted(paths[2:5]) == ["/api/mix/v1/order/placeOrder", "/api/mix/v1/order/placeOrder",
+                                  "/api/mix/v1/plan/placePlan"]
+    assert all("ACCESS-SIGN" in c.headers for c in calls)
+    tp = next(json.loads(c.content) for c in calls[2:5] if c.url.path.endswith("placeOrder"))
+    assert tp["side"] == "close_long" and tp["reduceOnly"] == "true"
+
+
+def test_transport_rebinds_to_new_event_loop():
+    transport = _mock_transport([])
+
+    async def fetch():
+        r = await transport.request("GET", "/api/mix/v1/market/ticker", params={"symbol": "BTCUSDT_UMCBL"}, timeout=1.0)
+        return r.status_code, transport.client
+
+    status_1, client_1 = asyncio.run(fetch())
+    status_2, client_2 = asyncio.run(fetch())
+    assert status_1 == status_2 == 200 and client_1 is not client_2
+
+
+def test_bitget_client_async_order(monkeypatch, settings):
+    from market.bitget_client import BitgetClient
+    calls = []
+    client = BitgetClient()
+    client.dry_run = False
+    client.transport = _mock_transport(calls)
+
+    result = asyncio.run(client.place_order_async({"symbol": "BTCUSDT_UMCBL", "side": "buy", "size": "0.01"}))
+    assert result["data"]["orderId"] == "1"
+    assert calls[0].method == "POST" and calls[0].headers["ACCESS-SIGN"]
+
+    client.dry_run = True
+    assert asyncio.run(client.cancel_order_async("BTCUSDT_UMCBL", "42"))["data"]["orderId"] == "42"
+    assert len(calls) == 1
+
+
+def test_client_is_closed_with_its_event_loop():
+    from fake_bitget import FakeBitget
+
+    with FakeBitget() as fake:
+        transport = BitgetTransport(fake.url)
+
+        async def ticker():
+            r = await transport.request("GET", "/api/mix/v1/market/ticker", params={"symbol": "BTCUSDT_UMCBL"})
+            return transport.client, r.status_code
+
+        first, status = asyncio.run(ticker())  # healthcheck/скрипт: свой asyncio.run на каждый вызов
+        assert status == 200 and first.is_closed  # пул закрыт до loop.close(), сокеты не висят
+        second, _ = asyncio.run(ticker())
+        assert second is not first and second.is_closed
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from telethon.tl.types import Channel
+
+from core.catch_up import CatchUp, LastSeen, is_stale
+from core.channel_cache import ChannelCache
+
+SCALP = -1000000000111
+
+
+class FakeClient:
+    def __init__(self, ids):
+        self.ids = list(ids)
+        self.calls = []
+
+    async def get_messages(self, peer, limit):
+        return [SimpleNamespace(id=i) for i in sorted(self.ids, reverse=True)[:limit]]
+
+    async def iter_messages(self, peer, min_id, reverse, limit):
+        self.calls.append(min_id)
+        for i in sorted(i for i in self.ids if i > min_id)[:limit]:
+            yield SimpleNamespace(id=i, text=f"msg {i}")
+
+    def is_connected(self):
+        return True
+
+
+def _channels():
+    cache = ChannelCache()
+    cache.add(Channel(id=111, title="Scalp", photo=None, date=None), "SCALPING")
+    return cache
+
+
+def test_is_stale():
+    now = datetime(2025, 1, 1, 12, 0, tzinfo=timezone.utc)
+    assert is_stale(now - timedelta(minutes=31), 30, now)
+    assert not is_stale(now - timedelta(minutes=5), 30, now)
+    assert not is_stale(None, 30, now) and not is_stale(now - timedelta(days=1), 0, now)
+
+
+def test_last_seen_is_monotonic_and_persisted(tmp_path):
+    path = str(tmp_path / "last_seen.json")
+    state = LastSeen(path)
+    state.mark(SCALP, 10)
+    state.mark(SCALP, 7)  # догонялка не откатывает назад
+    assert LastSeen(path).get(SCALP) == 10
+
+
+def test_gap_is_replayed_in_order_before_live_messages(tmp_path):
+    state = LastSeen(str(tmp_path / "last_seen.json"))
+    client = FakeClient([1, 2, 3])
+    queued = []
+
+    async def put(event, key=None):
+        queued.append((key, event.message.id, getattr(event, "catch_up", False)))
+        state.mark(event.chat_id, event.message.id)  # как on_settled конвейера
+
+    async def scenario():
+        catch_up = CatchUp(client, _channels(), put, state)
+        assert await catch_up.run_once() == 0  # первый запуск: только запоминаем последний id
+        assert state.get(SCALP) == 3 and client.calls == []
+
+        client.ids += [4, 5, 6]  # пришли, пока бот лежал
+        live = SimpleNamespace(chat_id=SCALP, message=SimpleNamespace(id=7))
+
+        async def handler(event):  # как хендлер NewMessage
+            await catch_up.ready.wait()
+            await put(event, key=event.chat_id)
+
+        catch_up.ready.clear()
+        live_task = asyncio.create_task(handler(live))
+        await asyncio.sleep(0)
+        assert await catch_up.run_once() == 3
+        await live_task
+        return catch_up.replayed
+
+    replayed = asyncio.run(scenario())
+    assert client.calls == [3] and replayed == 3
+    assert queued == [(SCALP, 4, True), (SCALP, 5, True), (SCALP, 6, True), (SCALP, 7, False)]
+    assert state.get(SCALP) == 7
+
+
+def test_marks_are_flushed_off_the_loop_with_debounce(tmp_path):
+    path = tmp_path / "last_seen.json"
+
+    async def scenario():
+        state = LastSeen(str(path), flush_sec=0.05)
+        for message_id in range(1, 101):
+            state.mark(SCALP, message_id)
+        written_at_once = path.exists()
+        await asyncio.sleep(0.2)
+        flushed = LastSeen(str(path)).get(SCALP)
+        state.mark(SCALP, 101)
+        state.flush()  # остановка: без ожидания таймера
+        return written_at_once, flushed
+
+    assert asyncio.run(scenario()) == (False, 100)
+    assert LastSeen(str(path)).get(SCALP) == 101
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from types import SimpleNamespace
+
+from telethon.tl.types import Channel, Chat, MessageActionChatMigrateTo
+
+from core.channel_cache import ChannelCache
+
+
+def _channel(channel_id, title):
+    return Channel(id=channel_id, title=title, photo=None, date=None)
+
+
+def test_lookup_by_chat_id_without_get_chat():
+    cache = ChannelCache()
+    cache.add(_channel(111, "Scalp"), "SCALPING")
+    cache.add(_channel(222, "Intraday"), "INTRADAY")
+
+    info = cache.get(-1000000000111)  # event.chat_id — «помеченный» id канала
+    assert (info.id, info.title, info.source) == (111, "Scalp", "SCALPING")
+    assert cache.watches(SimpleNamespace(chat_id=-1000000000222))
+    assert not cache.watches(SimpleNamespace(chat_id=-1000000000333)) and cache.get(111) is None
+
+
+def test_title_change_and_migration_refresh_the_entry():
+    cache = ChannelCache()
+    cache.add(_channel(111, "Scalp"), "SCALPING")
+
+    cache.on_chat_action(SimpleNamespace(chat_id=-1000000000111, new_title="Scalp PRO", action_message=None))
+    assert cache.get(-1000000000111).title == "Scalp PRO"
+
+    cache.on_chat_action(SimpleNamespace(chat_id=-1000000000999, new_title="чужой", action_message=None))
+    assert len(cache) == 1
+
+    # обычная группа переехала в супергруппу: запись сохраняет источник под новым peer_id
+    cache.add(Chat(id=555, title="Old group", photo=None, participants_count=1, date=None, version=1), "INTRADAY")
+    event = SimpleNamespace(chat_id=-555, new_title=None,
+                            action_message=SimpleNamespace(action=MessageActionChatMigrateTo(channel_id=777)))
+    cache.on_chat_action(event)
+    migrated = cache.get(-1000000000777)
+    assert (migrated.id, migrated.title, migrated.source) == (777, "Old group", "INTRADAY")
+    assert -555 not in cache and len(cache) == 2
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import asyncio
+from types import SimpleNamespace
+
+from telethon.tl.types import Channel, ChannelForbidden
+
+from core import channel_resolver
+from core.channel_resolver import ChannelResolver
+
+
+def _channel(channel_id, title):
+    return Channel(id=channel_id, title=title, photo=None, date=None, access_hash=channel_id * 10)
+
+
+class FakeClient:
+    """iter_dialogs / GetChannels / get_entity with call counters"""
+
+    def __init__(self, channels, forbidden=()):
+        self.channels = channels
+        self.forbidden = set(forbidden)
+        self.dialogs_seen = 0
+        self.get_channels_calls = 0
+
+    async def iter_dialogs(self):
+        for ch in [_channel(900 + i, f"chat {i}") for i in range(50)] + self.channels:
+            self.dialogs_seen += 1
+            yield SimpleNamespace(entity=ch, name=ch.title)
+
+    async def __call__(self, request):
+        self.get_channels_calls += 1
+        chats = []
+        for inp in request.id:
+            if inp.channel_id in self.forbidden:
+                chats.append(ChannelForbidden(id=inp.channel_id, access_hash=inp.access_hash, title="gone"))
+            else:
+                chats.extend(ch for ch in self.channels if ch.id == inp.channel_id)
+        return SimpleNamespace(chats=chats)
+
+    async def get_entity(self, link):
+        raise ValueError(f"cannot resolve {link}")
+
+
+WANTED = {"SCALPING": (None, "Scalp"), "INTRADAY": ("https://t.me/+invite", "Intraday")}
+
+
+def test_one_dialog_pass_then_cache_validation(tmp_path, monkeypatch):
+    monkeypatch.setattr(channel_resolver, "_SCANNED", {})
+    path = str(tmp_path / "channels.json")
+    client = FakeClient([_channel(1, "Scalp signals"), _channel(2, "Intraday PRO")])
+
+    first = ChannelResolver(client, path)
+    found = asyncio.run(first.resolve_many(WANTED))
+    assert {k: v.id for k, v in found.items()} == {"SCALPING": 1, "INTRADAY": 2}
+    assert first.dialog_scans == 1 and client.get_channels_calls == 0
+
+    # рестарт: процессный кэш пуст, диалоги не перебираются — один GetChannels на оба канала
+    monkeypatch.setattr(channel_resolver, "_SCANNED", {})
+    client.dialogs_seen = 0
+    second = ChannelResolver(client, path)
+    found = asyncio.run(second.resolve_many(WANTED))
+    assert {k: v.title for k, v in found.items()} == {"SCALPING": "Scalp signals", "INTRADAY": "Intraday PRO"}
+    assert second.dialog_scans == 0 and client.dialogs_seen == 0 and client.get_channels_calls == 1
+
+
+def test_invalid_entry_falls_back_to_scan_once_per_boot(tmp_path, monkeypatch):
+    monkeypatch.setattr(channel_resolver, "_SCANNED", {})
+    path = str(tmp_path / "channels.json")
+    client = FakeClient([_channel(1, "Scalp signals"), _channel(2, "Intraday PRO")])
+    asyncio.run(ChannelResolver(client, path).resolve_many(WANTED))
+
+    monkeypatch.setattr(channel_resolver, "_SCANNED", {})
+    client.forbidden = {1}
+    client.channels.append(_channel(3, "Scalp signals v2"))
+    client.channels.remove(client.channels[0])
+    found = asyncio.run(ChannelResolver(client, path).resolve_many(WANTED))
+    assert found["SCALPING"].id == 3 and found["INTRADAY"].id == 2
+
+    # в том же процессе второй резолвер (check_systems) не сканирует снова даже при промахе
+    missing = ChannelResolver(client, None)
+    assert asyncio.run(missing.resolve(None, "scalp")).id == 3
+    assert missing.dialog_scans == 0
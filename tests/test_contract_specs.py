@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import asyncio
+import json
+import time
+
+import pytest
+
+import bitget_integration
+from bitget_integration import BitgetHTTP, BitgetTrader
+from fake_bitget import FakeBitget
+from market.contract_specs import ContractSpecCache
+
+CONTRACTS = "/api/mix/v1/market/contracts"
+
+
+@pytest.fixture
+def fake_bitget():
+    with FakeBitget() as server:
+        yield server
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = ContractSpecCache(str(tmp_path / "contract_specs.json"), ttl_sec=60)
+    monkeypatch.setattr(bitget_integration, "contract_specs", cache)
+    return cache
+
+
+def _trader(fake_bitget):
+    trader = BitgetTrader()
+    trader.http = BitgetHTTP(fake_bitget.url)
+    return trader
+
+
+def test_traders_share_one_download_and_cold_start_uses_disk(fake_bitget, cache, tmp_path):
+    first = _trader(fake_bitget).fetch_contract_specs()
+    second = _trader(fake_bitget).fetch_contract_specs()
+    assert first.price_step == second.price_step == 0.1
+    assert fake_bitget.paths().count(CONTRACTS) == 1
+
+    saved = json.loads((tmp_path / "contract_specs.json").read_text(encoding="utf-8"))
+    assert saved["product_types"]["umcbl"]["rows"][0]["symbol"] == "BTCUSDT_UMCBL"
+
+    restarted = ContractSpecCache(cache.path, ttl_sec=60)  # новый процесс
+    assert restarted.get("BTCUSDT_UMCBL", "UMCBL", lambda pt: pytest.fail("no download on cold start"))
+    assert restarted.fetches == 0
+
+
+def test_stale_entry_is_served_while_refreshing_in_background(cache):
+    cache.put("umcbl", [{"symbol": "BTCUSDT_UMCBL", "pricePlace": "1"}], fetched_at=time.time() - 120)
+    calls = []
+
+    def fetch(product_type):
+        time.sleep(0.05)
+        calls.append(product_type)
+        return [{"symbol": "BTCUSDT_UMCBL", "pricePlace": "2"}]
+
+    started = time.perf_counter()
+    row = cache.get("BTCUSDT_UMCBL", "umcbl", fetch)
+    assert row["pricePlace"] == "1" and time.perf_counter() - started < 0.05
+    deadline = time.time() + 2
+    while cache.peek("BTCUSDT_UMCBL", "umcbl")["pricePlace"] != "2" and time.time() < deadline:
+        time.sleep(0.01)
+    assert calls == ["umcbl"] and cache.age("umcbl") < 5
+
+
+def test_too_old_disk_copy_is_not_used(cache):
+    cache.put("umcbl", [{"symbol": "BTCUSDT_UMCBL", "pricePlace": "1"}], fetched_at=time.time() - 30 * 86400)
+    row = cache.get("BTCUSDT_UMCBL", "umcbl", lambda pt: [{"symbol": "BTCUSDT_UMCBL", "pricePlace": "3"}])
+    assert row["pricePlace"] == "3"
+
+
+def test_concurrent_async_misses_download_once(cache):
+    fake = FakeBitget(latency_sec=0.05).start()
+    try:
+        traders = [_trader(fake) for _ in range(5)]
+
+        async def scenario():
+            return await asyncio.gather(*(t.fetch_contract_specs_async() for t in traders))
+
+        specs = asyncio.run(scenario())
+    finally:
+        fake.stop()
+    assert all(s.price_step == 0.1 for s in specs)
+    assert fake.paths().count(CONTRACTS) == 1 and cache.fetches == 1
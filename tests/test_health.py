@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import asyncio
+import time
+
+from core.health import run_checks
+
+
+def _sleeper(delay, result=True):
+    async def check():
+        await asyncio.sleep(delay)
+        return result
+    return check
+
+
+async def _broken():
+    raise ConnectionError("no route")
+
+
+def test_checks_run_concurrently_with_own_timeouts():
+    started = time.monotonic()
+    results = asyncio.run(run_checks({
+        "bitget": _sleeper(0.2),
+        "telethon": _sleeper(0.2, result=False),
+        "aiogram": _sleeper(5.0),
+        "broken": _broken,
+    }, timeout=0.3, timeouts={"bitget": 1.0}))
+    elapsed = time.monotonic() - started
+
+    assert elapsed < 0.6  # самая медленная проверка (таймаут 0.3 с), а не сумма
+    assert results["bitget"].ok and results["bitget"].error is None
+    assert not results["telethon"].ok and results["telethon"].error is None
+    assert results["aiogram"].error == "timeout after 0.3s"
+    assert "ConnectionError" in results["broken"].error
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# импорт без .env и сети: ни валидации настроек, ни SQLite, ни тяжёлых клиентов
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import main, trader.executor, trader.router, storage.repo, storage.async_repo, market.bitget_client
+elapsed = time.perf_counter() - started
+import config.settings, storage.db, nlp.parser_rules
+print(json.dumps({
+    "elapsed": elapsed,
+    "loaded": [m for m in ("aiogram", "requests", "bot.tg_control", "adapters.user_client") if m in sys.modules],
+    "singletons": [name for module, name in ((config.settings, "_settings"), (storage.db, "_db"),
+                                             (market.bitget_client, "_bitget_client"),
+                                             (nlp.parser_rules, "_parser"), (trader.executor, "_executor"))
+                   if getattr(module, name) is not None] + [n for n in ("position_repo", "order_repo")
+                                                           if n in vars(storage.repo)],
+}))
+"""
+
+
+def test_import_builds_nothing_and_stays_in_budget(tmp_path):
+    env = {k: v for k, v in os.environ.items() if not k.startswith(("BITGET_", "TG_", "API_"))}
+    env["PYTHONPATH"] = ROOT
+    out = subprocess.run([sys.executable, "-c", PROBE], cwd=tmp_path, env=env,
+                         capture_output=True, text=True, check=True).stdout
+    report = json.loads(out.splitlines()[-1])
+
+    assert report["singletons"] == []
+    assert report["loaded"] == []
+    assert list(tmp_path.iterdir()) == []  # БД не создана при импорте
+    assert report["elapsed"] < 3.0  # с запасом для медленных CI: aiogram один стоит секунды
+
+
+def test_lazy_singleton_is_shared(settings_env):
+    from config import settings as settings_module
+    first = settings_module.get_settings()
+    assert settings_module.settings is first and settings_module.get_settings() is first
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from improved_signal_parser import ImprovedSignalParser
+
+parser = ImprovedSignalParser()
+
+
+def test_classify_noise_and_direction():
+    cls = parser.classify("Стрим сегодня в 20:00, лонг обсудим 12345")
+    assert cls.has_noise and cls.has_long and cls.has_numbers
+    assert parser.is_trading_signal("Стрим сегодня в 20:00, лонг обсудим 12345") == (False, "noise")
+
+
+def test_classify_overlapping_keywords():
+    # 'sell' и 'long' перекрываются: оба слова должны быть найдены
+    cls = parser.classify("sellong 88000")
+    assert cls.has_long and cls.has_short
+    assert cls.position_type == 'LONG'
+
+
+def test_classify_rejections():
+    assert parser.is_trading_signal("обычный текст без цифр и слов") == (False, "no keywords")
+    assert parser.is_trading_signal("пробую лонг, цифр нет, но текст длинный") == (False, "no numbers")
+    assert parser.is_trading_signal("лонг 88000") == (False, "too short")
+
+
+def test_parse_signal_uses_compiled_patterns():
+    text = "Пробую шорт 88800-90400 риском 0.5% стоп над 91600 Плечо: х10 Цели: 88600-88400"
+    signal = parser.parse_signal("1", "test", text)
+    assert signal.position_type == 'SHORT'
+    assert signal.entry_price == '88800-90400'
+    assert signal.stop_loss == '91600'
+    assert signal.take_profits == ['88600', '88400']
+    assert signal.risk_percent == '0.5%'
+    assert signal.leverage == 'х10'
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import asyncio
+import time
+
+import httpx
+
+import bitget_integration
+from bitget_integration import BitgetTrader, Spec
+from improved_signal_parser import ImprovedSignalParser
+from market.bitget_transport import BitgetTransport
+from trader.submitter import Leg, LegSubmitter, order_legs
+
+TEXT = "Пробую шорт 88800-90400 риском 0.5% стоп над 91600 Плечо: х10 Цели: 88600-88400"
+
+
+def test_waves_run_in_order_and_fan_out():
+    log = []
+    active = {"now": 0, "peak": 0}
+
+    def leg(name, delay=0.05):
+        async def call():
+            log.append(("start", name))
+            active["now"] += 1
+            active["peak"] = max(active["peak"], active["now"])
+            await asyncio.sleep(delay)
+            active["now"] -= 1
+            log.append(("end", name))
+            return name
+        return call
+
+    legs = order_legs(leg("leverage"), leg("entry"), leg("stop"), [leg(f"tp{i}") for i in range(1, 7)])
+    report = asyncio.run(LegSubmitter(max_concurrency=3, rate_per_sec=None).run(legs))
+
+    assert report.ok and [r.name for r in report.legs][:3] == ["leverage", "entry", "stop"]
+    assert log.index(("end", "leverage")) < log.index(("start", "entry"))
+    assert log.index(("end", "entry")) < min(log.index(("start", n)) for n in ("stop", "tp1", "tp6"))
+    assert active["peak"] == 3
+    # 2 последовательные ноги + 7 параллельных при лимите 3 = 5 "раундов", а не 9
+    assert report.elapsed_ms < 9 * 50
+    assert all(r.elapsed_ms >= 40 for r in report.legs)
+
+
+def test_failed_dependency_skips_dependents():
+    def boom():
+        raise RuntimeError("rejected")
+
+    legs = order_legs(lambda: "lev", boom, lambda: "sl", [lambda: "tp"])
+    report = LegSubmitter(rate_per_sec=None).run_sync(legs)
+    assert report.get("entry").status == "error" and report.get("entry").error == "rejected"
+    assert report.get("stop").status == report.get("tp1").status == "skipped"
+
+    legs = order_legs(boom, lambda: "entry", None, [], leverage_optional=True)
+    report = LegSubmitter(rate_per_sec=None).run_sync(legs)
+    assert report.get("entry").ok and not report.ok
+
+
+def test_rate_limit_spaces_starts_beyond_burst():
+    starts = []
+    legs = [Leg(f"l{i}", lambda: starts.append(time.monotonic())) for i in range(4)]
+    LegSubmitter(max_concurrency=4, rate_per_sec=20, burst=2).run_sync(legs)
+    starts.sort()
+    assert starts[-1] - starts[0] >= 2 / 20 * 0.9  # 2 сразу, ещё 2 — по 50 мс
+
+
+def test_execute_trade_async_fans_out_protection(monkeypatch):
+    monkeypatch.setattr(bitget_integration, "DRY_RUN", False)
+    monkeypatch.setattr(bitget_integration, "BATCH_TAKE_PROFITS", False)  # по одному placeOrder на TP
+    in_flight = {"now": 0, "peak": 0}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        in_flight["now"] += 1
+        in_flight["peak"] = max(in_flight["peak"], in_flight["now"])
+        await asyncio.sleep(0.05)
+        in_flight["now"] -= 1
+        if request.url.path.endswith("placePlan"):
+            return httpx.Response(400, json={"code": "40001", "msg": "bad trigger"})
+        return httpx.Response(200, json={"code": "00000", "data": {}})
+
+    trader = BitgetTrader()
+    trader.spec = Spec(price_step=0.1, size_step=0.001, min_size=0.001)
+    trader.submitter = LegSubmitter(max_concurrency=5, rate_per_sec=None)
+    trader.http.transport = BitgetTransport("https://bitget.test", transport=httpx.MockTransport(handler))
+    signal = ImprovedSignalParser().parse_signal("1", "test", TEXT)
+
+    result = asyncio.run(trader.execute_trade_async(signal, {"qty_total": 0.02, "tp_shares": [0.5, 0.5]}))
+    statuses = {leg["name"]: leg["status"] for leg in result["legs"]}
+    assert statuses == {"leverage": "ok", "entry": "ok", "stop": "error", "tp1": "ok", "tp2": "ok"}
+    assert result["ok"] is False and in_flight["peak"] == 3
+
+
+def test_rejected_leverage_does_not_skip_the_trade(monkeypatch):
+    monkeypatch.setattr(bitget_integration, "DRY_RUN", False)
+    monkeypatch.setattr(bitget_integration, "BATCH_TAKE_PROFITS", False)
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("setLeverage"):
+            return httpx.Response(400, json={"code": "45117", "msg": "leverage locked"})
+        return httpx.Response(200, json={"code": "00000", "data": {}})
+
+    trader = BitgetTrader()
+    trader.spec = Spec(price_step=0.1, size_step=0.001, min_size=0.001)
+    trader.submitter = LegSubmitter(max_concurrency=5, rate_per_sec=None)
+    trader.http.transport = BitgetTransport("https://bitget.test", transport=httpx.MockTransport(handler))
+    signal = ImprovedSignalParser().parse_signal("1", "test", TEXT)
+
+    # как в Executor: плечо необязательно, вход, стоп и TP всё равно ставятся
+    result = asyncio.run(trader.execute_trade_async(signal, {"qty_total": 0.02, "tp_shares": [0.5, 0.5]}))
+    statuses = {leg["name"]: leg["status"] for leg in result["legs"]}
+    assert statuses == {"leverage": "error", "entry": "ok", "stop": "ok", "tp1": "ok", "tp2": "ok"}
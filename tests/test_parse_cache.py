@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import pickle
+
+from improved_signal_parser import ImprovedSignalParser
+from nlp.cache import MISS, ParseCache
+from nlp.parser_rules import SignalParser
+from scripts.bench_parser import load_corpus, load_golden, golden_accuracy
+
+TEXT = "Пробую шорт 88800-90400 риском 0.5% стоп над 91600 Плечо: х10 Цели: 88600-88400"
+
+
+def test_hit_restamps_message_fields():
+    parser = ImprovedSignalParser()
+    first = parser.parse_signal("1", "chan_a", TEXT, "2025-01-01 10:00:00")
+    repost = parser.parse_signal("2", "chan_b", "  " + TEXT + "\n", "2025-01-01 10:05:00")
+    assert parser.cache.stats()['hits'] == 1
+
+    assert (repost.message_id, repost.channel_name, repost.timestamp) == ("2", "chan_b", "2025-01-01 10:05:00")
+    assert repost.raw_text == "  " + TEXT + "\n"
+    assert repost.take_profits == first.take_profits and repost.parsed == first.parsed
+    # списки не разделяются между выдачами
+    repost.parsed.take_profits.append(1.0)
+    assert first.parsed.take_profits == [88600.0, 88400.0]
+
+
+def test_negative_cache_for_filtered_texts():
+    parser = ImprovedSignalParser()
+    noise = "Стрим сегодня в 20:00, лонг обсудим 12345"
+    assert parser.parse_signal("1", "c", noise) is None
+    assert parser.parse_signal("2", "c", noise) is None
+    stats = parser.cache.stats()
+    assert stats['negative_size'] == 1 and stats['negative_hits'] == 1
+
+    expired = ImprovedSignalParser(negative_ttl_sec=-1)
+    expired.parse_signal("1", "c", noise)
+    expired.parse_signal("2", "c", noise)
+    assert expired.cache.stats()['negative_hits'] == 0
+
+
+def test_lru_eviction():
+    cache = ParseCache(maxsize=2)
+    a, b, c = (cache.key(t) for t in ("a", "b", "c"))
+    cache.put(a, 1)
+    cache.put(b, 2)
+    cache.get(a)  # a становится самым свежим
+    cache.put(c, 3)
+    assert cache.get(b) is MISS and cache.get(a) == 1 and cache.get(c) == 3
+    assert cache.stats()['evictions'] == 1
+
+
+def test_rules_parser_cache():
+    parser = SignalParser()
+    assert parser.parse(TEXT) == parser.parse(TEXT) == SignalParser(cache_size=0).parse(TEXT)
+    assert parser.parse("просто текст") is None and parser.parse("просто текст") is None
+    stats = parser.cache.stats()
+    assert stats['hits'] == 1 and stats['negative_hits'] == 1
+
+
+def test_cached_parser_matches_golden_and_pickles_empty():
+    parser = ImprovedSignalParser()
+    corpus, golden = load_corpus(), load_golden()
+    golden_accuracy(parser, corpus, golden)
+    accuracy = golden_accuracy(parser, corpus, golden)  # второй проход — из кэша
+    assert accuracy['recall'] == 1.0 and accuracy['mismatches'] == []
+    assert parser.cache.stats()['hits'] > 0
+
+    clone = pickle.loads(pickle.dumps(parser))
+    assert clone.cache.stats()['size'] == 0 and clone.cache.maxsize == parser.cache.maxsize
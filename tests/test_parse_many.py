@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+from dataclasses import asdict
+
+from improved_signal_parser import ImprovedSignalParser
+from nlp.parser_rules import SignalParser
+
+
+def _messages():
+    with open('extracted_messages.json', 'r', encoding='utf-8') as f:
+        return json.load(f)[:200]
+
+
+def test_improved_parse_many_keeps_order():
+    messages = _messages()
+    parser = ImprovedSignalParser()
+    serial = [parser.parse_signal(*parser._message_args(m, i, "")) for i, m in enumerate(messages)]
+    pooled = list(parser.parse_many(iter(messages), workers=2, chunk_size=16))
+    assert len(pooled) == len(messages)
+    assert [s and asdict(s) for s in pooled] == [s and asdict(s) for s in serial]
+
+
+def test_rules_parse_many_keeps_order():
+    messages = _messages()
+    parser = SignalParser()
+    pooled = list(parser.parse_many(messages, workers=2, chunk_size=16))
+    assert pooled == [parser.parse(m['text']) for m in messages]
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from improved_signal_parser import ImprovedSignalParser
+from nlp import parser_rules
+from trader.executor import Executor
+from trader.router import SignalRouter
+from bitget_integration import BitgetTrader, Spec
+
+TEXT = "Пробую шорт 88800-90400 риском 0.5% стоп над 91600 Плечо: х10 Цели: 88600-88400-878008-87000"
+
+
+def _no_reparse(*args, **kwargs):
+    raise AssertionError("signal must not be parsed twice")
+
+
+def test_normalised_fields():
+    signal = ImprovedSignalParser().parse_signal("1", "test", TEXT)
+    parsed = signal.parsed
+    assert parsed.direction == 'SELL' and parsed.position_type == 'SHORT'
+    assert parsed.entry_zone == [88800.0, 90400.0]
+    assert parsed.stop_loss == 91600.0
+    # склейка 878008 отброшена нормализацией, строковые цели не тронуты
+    assert parsed.take_profits == [88600.0, 88400.0, 87000.0]
+    assert signal.take_profits == ['88600', '88400', '878008', '87000']
+    assert parsed.risk_percent == 0.5 and parsed.leverage == 10
+
+
+def test_consumers_use_parsed_structure(monkeypatch, settings):
+    signal = ImprovedSignalParser().parse_signal("1", "test", TEXT)
+    monkeypatch.setattr(parser_rules.parser, "parse", _no_reparse)
+
+    plan = Executor(None, dry_run=True).plan_from_signal(signal, context={'source': 'INTRADAY'})
+    assert plan.side == 'SELL'
+    assert plan.sl_price == 91600.0
+    assert plan.tp_levels == [88600.0, 88400.0, 87000.0]
+
+    routing = SignalRouter().route_signal(signal, 'SCALPING')
+    assert routing['parsed_signal'] is signal.parsed
+
+    trader = BitgetTrader()
+    trader.spec = Spec(price_step=0.1, size_step=0.001, min_size=0.001)  # без сети
+    result = trader.execute_trade(signal, context={'qty_total': 0.01, 'tp_shares': [0.5, 0.5]})
+    assert result['entry'] == 89600.0 and result['stop'] == 91600.0
+
+
+def test_trader_rejects_zero_stop_or_entry():
+    signal = ImprovedSignalParser().parse_signal("2", "test", "Пробую шорт 88800-90400 Плечо: х10 Цели: 88600-88400")
+    assert signal.parsed.stop_loss == 0.0  # стоп не указан — нормализация дала 0
+
+    trader = BitgetTrader()
+    trader.spec = Spec(price_step=0.1, size_step=0.001, min_size=0.001)
+    with pytest.raises(ValueError):
+        trader._trade_params(signal, {'qty_total': 0.01})
+    assert trader.execute_trade(signal, context={'qty_total': 0.01}) is None  # ничего не выставлено по цене 0
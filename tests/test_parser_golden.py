@@ -0,0 +1,11 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from improved_signal_parser import ImprovedSignalParser
+from scripts.bench_parser import load_corpus, load_golden, golden_accuracy
+
+
+def test_golden_fields_do_not_regress():
+    accuracy = golden_accuracy(ImprovedSignalParser(), load_corpus(), load_golden())
+    assert accuracy['recall'] == 1.0
+    assert accuracy['mismatches'] == []
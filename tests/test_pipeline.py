@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import asyncio
+
+from core.pipeline import Pipeline, Stage, parse_workers, signal_pipeline
+
+
+def test_parse_workers():
+    assert parse_workers("parse=2, execute=4") == {"ingest": 1, "parse": 2, "persist": 1, "execute": 4}
+    assert parse_workers("") == {"ingest": 1, "parse": 1, "persist": 1, "execute": 2}
+
+
+def test_slow_channel_keeps_order_and_does_not_block_others():
+    done = []
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def execute(item):
+            channel, n = item
+            if (channel, n) == ("A", 0):
+                await release.wait()  # медленная отправка ордеров в канале A
+            done.append(item)
+
+        pipeline = signal_pipeline(lambda item: item, lambda item: item, lambda item: item, execute,
+                                   workers="execute=2")
+        for n in range(3):
+            await pipeline.put(("A", n), key="A")
+            await pipeline.put(("B", n), key="B")
+        for _ in range(50):
+            if len(done) == 3:
+                break
+            await asyncio.sleep(0.01)
+        assert done == [("B", 0), ("B", 1), ("B", 2)]  # B прошёл, пока A висит на первом
+        release.set()
+        await pipeline.join()
+        metrics = pipeline.metrics()
+        await pipeline.stop()
+        return metrics
+
+    metrics = asyncio.run(scenario())
+    assert [item for item in done if item[0] == "A"] == [("A", 0), ("A", 1), ("A", 2)]
+    assert metrics["execute"]["processed"] == 6 and metrics["ingest"]["queued"] == 0
+
+
+def test_backpressure_drop_and_failure():
+    seen = []
+
+    async def scenario():
+        gate = asyncio.Event()
+
+        async def slow(item):
+            await gate.wait()
+            return item
+
+        def check(item):
+            if item == "bad":
+                raise ValueError(item)
+            seen.append(item)
+            return item if item != "skip" else None
+
+        pipeline = Pipeline([Stage("slow", slow, workers=1, maxsize=1), Stage("check", check), Stage("sink", seen.append)])
+        await pipeline.put("a")           # воркер взял и ждёт
+        await pipeline.put("bad")         # заняла единственное место в очереди
+        try:
+            await asyncio.wait_for(pipeline.put("skip"), 0.05)
+            blocked = False
+        except asyncio.TimeoutError:
+            blocked = True
+        gate.set()
+        await pipeline.put("skip")
+        await pipeline.put("b")
+        await pipeline.join()
+        stats = pipeline.metrics()
+        await pipeline.stop()
+        return blocked, stats
+
+    blocked, stats = asyncio.run(scenario())
+    assert blocked
+    assert seen == ["a", "a", "skip", "b", "b"]
+    assert stats["check"] == {"queued": 0, "processed": 3, "dropped": 1, "failed": 1}
+
+
+def test_item_settles_once_persisted_or_filtered():
+    settled, executed = [], []
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def execute(item):
+            await release.wait()
+            executed.append(item)
+
+        def parse(item):
+            if item == "bad":
+                raise ValueError(item)
+            return None if item == "noise" else item.upper()
+
+        pipeline = signal_pipeline(lambda item: item, parse, lambda item: item, execute,
+                                   on_settled=lambda key, origin: settled.append(origin))
+        for item in ("sig", "noise", "bad"):
+            await pipeline.put(item, key="A")
+        for _ in range(50):
+            if len(settled) == 2:
+                break
+            await asyncio.sleep(0.01)
+        before_execute = list(settled)
+        release.set()
+        await pipeline.join()
+        await pipeline.stop()
+        return before_execute
+
+    # сохранён (ещё не исполнен) и отфильтрован — отмечены; упавший — нет
+    assert asyncio.run(scenario()) == ["sig", "noise"]
+    assert settled == ["sig", "noise"] and executed == ["SIG"]
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import asyncio
+import time
+
+from fake_bitget_ws import FakeBitgetWS
+from market.price_stream import TickerStream
+from market.watcher import Watcher
+
+
+async def _until(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timeout"
+        await asyncio.sleep(0.005)
+
+
+def _stream(server, **kwargs):
+    return TickerStream(["BTCUSDT"], url=server.url, reconnect_min_sec=0.01, reconnect_max_sec=0.05, **kwargs)
+
+
+def test_parse_ticker_trade_and_service_messages():
+    ticker = TickerStream.parse('{"arg":{"instId":"BTCUSDT"},"data":[{"instId":"BTCUSDT","last":"90100.5","ts":1}]}')
+    assert [(t.symbol, t.price) for t in ticker] == [("BTCUSDT", 90100.5)]
+    trades = TickerStream.parse('{"arg":{"instId":"BTCUSDT"},"data":[["1","90000","0.1","buy"],["2","90001","1","sell"]]}')
+    assert [t.price for t in trades] == [90000.0, 90001.0]
+    assert TickerStream.parse("pong") == [] and TickerStream.parse('{"event":"subscribe"}') == []
+
+
+def test_breakeven_fires_on_tick_without_polling():
+    fired = []
+
+    async def scenario():
+        async with FakeBitgetWS() as server:
+            stream = _stream(server)
+            watcher = Watcher(get_now_price=None, on_breakeven=fired.append, poll_interval_sec=60, stream=stream)
+            watcher.register_plan({"symbol": "BTCUSDT", "side": "LONG", "entry": 90000, "stop": 89000,
+                                   "tps": [90500, 91000, 91500], "breakeven_after_tp": 2})
+            task = asyncio.create_task(watcher.start())
+            await _until(lambda: server.subscribed)
+            assert server.subscriptions == [{"instType": "mc", "channel": "ticker", "instId": "BTCUSDT"}]
+
+            await server.push("BTCUSDT", 90600)
+            await _until(lambda: stream.ticks == 1)
+            assert not fired
+            started = time.monotonic()
+            await server.push("BTCUSDT", 91100)
+            await _until(lambda: fired)
+            assert time.monotonic() - started < 1.0  # на тике, а не через poll_interval_sec=60
+            assert stream.last_price("BTCUSDT") == 91100.0
+
+            watcher.stop()
+            await stream.stop()
+            await asyncio.wait_for(task, 2.0)
+
+    asyncio.run(scenario())
+    assert len(fired) == 1 and fired[0]["side"] == "LONG"
+
+
+def test_reconnects_and_resubscribes_after_drop():
+    async def scenario():
+        async with FakeBitgetWS() as server:
+            stream = _stream(server)
+            prices = []
+            stream.add_listener(lambda tick: prices.append(tick.price))
+            task = asyncio.create_task(stream.run())
+
+            await _until(lambda: server.subscribed)
+            await server.push("BTCUSDT", 90000)
+            await _until(lambda: prices)
+            await server.drop()
+            await _until(lambda: server.connections == 2 and server.subscribed)
+            await server.push("BTCUSDT", 90050)
+            await _until(lambda: len(prices) == 2)
+
+            await stream.stop()
+            await asyncio.wait_for(task, 2.0)
+            return prices, stream.connects, len(server.subscriptions)
+
+    prices, connects, subscriptions = asyncio.run(scenario())
+    assert prices == [90000.0, 90050.0] and connects == 2 and subscriptions == 2
+
+
+def test_heartbeat_and_polling_fallback_while_stream_is_down():
+    polled = []
+
+    async def scenario():
+        async with FakeBitgetWS() as server:
+            stream = _stream(server, ping_interval_sec=0.02)
+            task = asyncio.create_task(stream.run())
+            await _until(lambda: server.pings >= 2)
+            await stream.stop()
+            await asyncio.wait_for(task, 2.0)
+
+        # поток не подключается (сервера нет) — работает запасной опрос
+        down = TickerStream(["BTCUSDT"], url=server.url, reconnect_min_sec=0.01, reconnect_max_sec=0.05)
+        watcher = Watcher(get_now_price=lambda: polled.append(1) or 90000.0, on_breakeven=lambda plan: None,
+                          poll_interval_sec=0.02, stream=down)
+        task = asyncio.create_task(watcher.start())
+        await _until(lambda: len(polled) >= 2)
+        watcher.stop()
+        await asyncio.wait_for(task, 2.0)
+
+    asyncio.run(scenario())
+
+
+def test_live_bot_without_stream_polls_rest_per_symbol(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    import main
+    monkeypatch.setattr(main, "DRY_RUN", False)
+    monkeypatch.setattr(main, "PRICE_STREAM", False)
+    asked = []
+
+    async def rest(symbol):
+        asked.append(symbol)
+        return {"BTCUSDT": 91100.0, "ETHUSDT": 3010.0}[symbol]
+
+    monkeypatch.setattr(main, "fetch_bitget_last_price", rest)
+    fired = []
+    bot = main.ImprovedTradingBot()
+    watcher = bot._make_watcher(dict(on_breakeven=fired.append, poll_interval_sec=60))
+    assert bot.price_stream is None
+    watcher.register_plan({"symbol": "BTCUSDT", "side": "LONG", "entry": 90000, "stop": 89000,
+                           "tps": [90500, 91000, 91500], "breakeven_after_tp": 2})
+    watcher.register_plan({"symbol": "ETHUSDT", "side": "LONG", "entry": 3000, "stop": 2900,
+                           "tps": [3100, 3200], "breakeven_after_tp": 1})
+
+    asyncio.run(watcher._poll())
+    assert sorted(asked) == ["BTCUSDT", "ETHUSDT"]  # REST по символу каждого плана, а не только BTC
+    assert [plan["symbol"] for plan in fired] == ["BTCUSDT"]
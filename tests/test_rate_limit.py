@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from bitget_integration import BitgetHTTP
+from fake_bitget import FakeBitget
+from market.rate_limit import (CircuitOpenError, ClassLimits, RequestLimiter, RetryPolicy, TokenBucket,
+                               endpoint_class)
+
+TICKER = "/api/mix/v1/market/ticker"
+PLACE = "/api/mix/v1/order/placeOrder"
+
+
+@pytest.fixture
+def fake_bitget():
+    with FakeBitget() as server:
+        yield server
+
+
+def _http(fake_bitget, **kwargs):
+    http = BitgetHTTP(fake_bitget.url)
+    http.limiter = RequestLimiter(retry=RetryPolicy(base_delay_sec=0.01, max_delay_sec=0.02), **kwargs)
+    return http
+
+
+def test_endpoint_classes():
+    assert endpoint_class("/api/mix/v1/order/batch-orders") == "order"
+    assert endpoint_class("/api/mix/v1/plan/placePlan") == "plan"
+    assert endpoint_class("/api/mix/v1/market/contracts") == "market"
+    assert endpoint_class("/api/mix/v1/account/setLeverage") == "account"
+
+
+def test_429_is_retried_and_counted(fake_bitget):
+    http = _http(fake_bitget)
+    fake_bitget.throttle_next[PLACE] = 2
+    r = http._request("POST", PLACE, {"price": "1", "size": "1"}, auth=True)
+
+    assert r.status_code == 200 and fake_bitget.paths().count(PLACE) == 3
+    stamps = [req[3]["ACCESS-TIMESTAMP"] for req in fake_bitget.requests]
+    assert len(stamps) == 3  # каждая попытка подписана заново
+    order = http.limiter.metrics()["order"]
+    assert order["requests"] == 1 and order["retries"] == 2 and order["throttled"] == 2
+
+
+def test_post_5xx_is_not_retried_but_get_is(fake_bitget):
+    http = _http(fake_bitget)
+    fake_bitget.fail_next[PLACE] = 1
+    assert http._request("POST", PLACE, {"price": "1"}, auth=True).status_code == 500
+    assert fake_bitget.paths().count(PLACE) == 1  # ордер мог исполниться — не дублируем
+
+    fake_bitget.fail_next[TICKER] = 1
+    assert http._request("GET", TICKER, {"symbol": "BTCUSDT_UMCBL"}).status_code == 200
+    assert fake_bitget.paths().count(TICKER) == 2
+
+
+def test_circuit_breaker_opens_and_probes(fake_bitget):
+    http = _http(fake_bitget, failure_threshold=2, reset_sec=0.1)
+    http.limiter.retry.max_retries = 0
+    fake_bitget.fail_next[TICKER] = 3
+    for _ in range(2):
+        assert http._request("GET", TICKER, {}).status_code == 500
+    with pytest.raises(CircuitOpenError):
+        http._request("GET", TICKER, {})
+    assert fake_bitget.paths().count(TICKER) == 2 and http.limiter.metrics()["market"]["breaker"] == "open"
+
+    time.sleep(0.12)
+    assert http._request("GET", TICKER, {}).status_code == 500  # проба не удалась
+    with pytest.raises(CircuitOpenError):
+        http._request("GET", TICKER, {})
+    time.sleep(0.12)
+    assert http._request("GET", TICKER, {}).status_code == 200
+    assert http.limiter.metrics()["market"]["breaker"] == "closed"
+
+
+def test_cancelled_probe_does_not_jam_the_breaker():
+    limiter = RequestLimiter(failure_threshold=1, reset_sec=0.05)
+    limiter.breakers["market"].record_failure()
+    time.sleep(0.06)
+
+    async def hang():
+        await asyncio.sleep(10)
+
+    async def ok():
+        return SimpleNamespace(status_code=200)
+
+    async def scenario():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(limiter.call_async("GET", TICKER, hang), 0.05)  # проба отменена
+        return await limiter.call_async("GET", TICKER, ok)
+
+    assert asyncio.run(scenario()).status_code == 200  # следующая проба допущена и закрыла предохранитель
+    assert limiter.metrics()["market"]["breaker"] == "closed"
+
+
+def test_bucket_separates_queued_from_wire_time(fake_bitget):
+    http = _http(fake_bitget, limits={"order": ClassLimits(20.0, burst=2), "plan": ClassLimits(10.0),
+                                      "market": ClassLimits(20.0), "account": ClassLimits(10.0)})
+
+    async def burst():
+        return await asyncio.gather(*(http._request_async("POST", PLACE, {"price": str(i)}, auth=True)
+                                      for i in range(6)))
+
+    started = time.perf_counter()
+    responses = asyncio.run(burst())
+    elapsed = time.perf_counter() - started
+    assert all(r.status_code == 200 for r in responses)
+    assert elapsed >= 4 / 20 * 0.9  # 2 сразу, остальные 4 — по 50 мс
+    order = http.limiter.metrics()["order"]
+    assert order["requests"] == 6 and order["max_queued_ms"] >= 120  # ~150 мс минус подлив бакета между резервами
+    assert order["avg_wire_ms"] < order["max_queued_ms"]
+
+
+def test_bitget_client_reports_open_breaker(settings):
+    from market.bitget_client import BitgetClient
+    client = BitgetClient()
+    client.dry_run = False
+    client.limiter = RequestLimiter(failure_threshold=1, reset_sec=60)
+    client.limiter.breakers["market"].record_failure()
+    assert "предохранитель" in client.get_ticker()["error"]
+
+
+def test_token_bucket_burst_then_rate():
+    bucket = TokenBucket(10.0, burst=3)
+    delays = [bucket.reserve() for _ in range(5)]
+    assert delays[:3] == [0.0, 0.0, 0.0]
+    assert delays[3] == pytest.approx(0.1, abs=0.02) and delays[4] == pytest.approx(0.2, abs=0.02)
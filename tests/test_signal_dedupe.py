@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from improved_signal_parser import ImprovedSignalParser
+from storage.dedupe import BloomFilter, SignalIndex, record_key, signal_key
+from storage.journal import SignalJournal
+
+TEXT = "Пробую шорт 88800-90400 риском 0.5% стоп над 91600 Плечо: х10 Цели: 88600-88400"
+
+
+def _record(i, channel_id=100):
+    return {'message_id': str(i), 'channel_id': channel_id, 'channel_name': 'chan', 'raw_text': f'text {i}'}
+
+
+def _history(tmp_path, n):
+    journal = SignalJournal(str(tmp_path / 'signals_history.json'))
+    for i in range(n):
+        journal.append(_record(i))
+    journal.compact()
+    return journal
+
+
+def test_exact_index(tmp_path):
+    index = SignalIndex(_history(tmp_path, 10))
+    assert index.load() == 10
+    assert signal_key(100, 'renamed', 3) in index  # переименование канала не ломает ключ
+    assert signal_key(200, 'chan', 3) not in index
+    # старые записи без channel_id ключуются по названию
+    assert record_key({'channel_name': 'chan', 'message_id': 1}) == ('chan', '1')
+
+
+def test_bloom_cold_start_skips_history(tmp_path, monkeypatch):
+    journal = _history(tmp_path, 200)
+    bloom_path = str(tmp_path / 'signals_history.bloom')
+    warm = SignalIndex(journal, bloom_path=bloom_path)
+    warm.load()
+    warm.save()
+
+    journal.append(_record(200))  # хвост после сохранения фильтра
+    cold = SignalIndex(journal, bloom_path=bloom_path)
+    reads = []
+    original_load = journal.load
+    monkeypatch.setattr(journal, 'load', lambda: reads.append(1) or original_load())
+    cold.load()
+    assert reads == []
+    assert signal_key(100, 'chan', 200) in cold and reads == []  # хвост журнала
+    assert signal_key(100, 'chan', 10_000) not in cold
+
+    # «возможно, было» — один раз достраиваем точное множество
+    assert signal_key(100, 'chan', 5) in cold
+    assert reads == [1]
+
+
+def test_bloom_invalidated_by_snapshot_change(tmp_path):
+    journal = _history(tmp_path, 5)
+    bloom_path = str(tmp_path / 'signals_history.bloom')
+    index = SignalIndex(journal, bloom_path=bloom_path)
+    index.load()
+    index.save()
+    journal.append(_record(5))
+    journal.compact()  # снапшот переписан без сохранения фильтра
+    assert BloomFilter.load(bloom_path, index._snapshot_stat()) is None
+    assert SignalIndex(journal, bloom_path=bloom_path).load() == 6
+
+
+def test_parse_cache_restamps_channel_id():
+    parser = ImprovedSignalParser()
+    first = parser.parse_signal("1", "chan", TEXT, channel_id=100)
+    first.channel_id = 999  # изменение копии не попадает в кэш
+    second = parser.parse_signal("2", "chan", TEXT, channel_id=200)
+    assert second.channel_id == 200
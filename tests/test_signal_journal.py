@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+
+from improved_signal_parser import ImprovedSignalParser
+from storage.journal import SignalJournal, read_history, signal_record
+
+TEXT = "Пробую шорт 88800-90400 риском 0.5% стоп над 91600 Плечо: х10 Цели: 88600-88400"
+
+
+def _record(i):
+    return {'message_id': str(i), 'channel_name': 'chan', 'position_type': 'LONG', 'raw_text': f'text {i}'}
+
+
+def test_append_does_not_touch_snapshot(tmp_path):
+    path = tmp_path / 'signals_history.json'
+    journal = SignalJournal(str(path))
+    journal.append(_record(0))
+    journal.compact()
+    snapshot = path.read_bytes()
+
+    for i in range(1, 50):
+        journal.append(_record(i))
+    assert path.read_bytes() == snapshot
+    assert [r['message_id'] for r in read_history(str(path))] == [str(i) for i in range(50)]
+
+    journal.close()
+    # снапшот — обычный JSON-массив, журнал пуст
+    assert [r['message_id'] for r in json.loads(path.read_text(encoding='utf-8'))] == [str(i) for i in range(50)]
+    assert (tmp_path / 'signals_history.journal.jsonl').read_text(encoding='utf-8') == ''
+
+
+def test_legacy_snapshot_and_torn_journal_tail(tmp_path):
+    path = tmp_path / 'signals_history.json'
+    path.write_text(json.dumps([_record(0), _record(1)], ensure_ascii=False, indent=2), encoding='utf-8')
+    journal = SignalJournal(str(path))
+    journal.append(_record(2))
+    journal.close()
+    with open(journal.journal_path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(_record(3)) + '\n' + '{"message_id": "4", "chan')  # падение на записи
+
+    assert [r['message_id'] for r in SignalJournal(str(path)).load()] == ['0', '1', '2', '3']
+
+
+def test_duplicates_after_interrupted_compaction(tmp_path):
+    path = tmp_path / 'signals_history.json'
+    journal = SignalJournal(str(path))
+    journal.append(_record(0))
+    journal.sync()
+    # снапшот уже содержит запись, а журнал ещё не очищен
+    path.write_text('[\n' + json.dumps(_record(0)) + '\n]\n', encoding='utf-8')
+    assert len(list(journal.load())) == 1
+
+
+def test_journal_is_compacted_while_running(tmp_path):
+    path = tmp_path / 'signals_history.json'
+    journal = SignalJournal(str(path), compact_every=3)
+    for i in range(7):
+        journal.append(_record(i))
+    # две компакции по ходу работы: в журнале только хвост после последней
+    assert [r['message_id'] for r in journal.tail()] == ['6']
+    assert [r['message_id'] for r in journal.load()] == [str(i) for i in range(7)]
+    journal.close()
+
+
+def test_signal_record_from_parser():
+    signal = ImprovedSignalParser().parse_signal("7", "chan", TEXT, "2025-01-01 10:00:00")
+    record = signal_record(signal)
+    assert record['take_profits'] == ['88600', '88400'] and record['raw_text'] == TEXT
+    assert 'parsed' not in record
+    json.dumps(record, ensure_ascii=False)
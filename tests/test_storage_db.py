@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import threading
+
+import pytest
+
+
+def test_persistent_wal_connection(database):
+    assert database.connection is database.connection
+    assert database.fetch_one("PRAGMA journal_mode")['journal_mode'] == 'wal'
+    assert database.fetch_one("PRAGMA synchronous")['synchronous'] == 1  # NORMAL
+
+    other = []
+    thread = threading.Thread(target=lambda: other.append(database.connection))
+    thread.start()
+    thread.join()
+    assert other[0] is not database.connection
+
+
+def test_position_setup_in_one_transaction(database, position_row):
+    from storage.repo import FillRepository, OrderRepository, PositionRepository
+    positions, orders, fills = PositionRepository(database), OrderRepository(database), FillRepository(database)
+
+    with database.transaction():
+        position_id = positions.create(position_row('sig-1'))
+        for price in (88600.0, 88400.0):
+            order_id = orders.create({'position_id': position_id, 'kind': 'TP', 'side': 'BUY',
+                                      'price': price, 'qty': 0.01, 'reduce_only': 1})
+            fills.create({'order_id': order_id, 'position_id': position_id,
+                          'price': price, 'qty': 0.01, 'ts': '2025-01-01T10:00:00'})
+        assert database.connection.in_transaction
+    assert not database.connection.in_transaction
+    assert len(orders.get_by_position_id(position_id)) == 2
+    assert len(fills.get_by_position_id(position_id)) == 2
+
+
+def test_rollback_and_savepoints(database, position_row):
+    from storage.repo import PositionRepository
+    positions = PositionRepository(database)
+
+    with pytest.raises(RuntimeError):
+        with database.transaction():
+            positions.create(position_row('sig-rolled-back'))
+            raise RuntimeError("setup failed")
+    assert positions.get_by_signal_id('sig-rolled-back') is None
+
+    with database.transaction():
+        positions.create(position_row('sig-outer'))
+        with pytest.raises(RuntimeError):
+            with database.transaction():
+                positions.create(position_row('sig-inner'))
+                raise RuntimeError("inner failed")
+    assert positions.get_by_signal_id('sig-outer') is not None
+    assert positions.get_by_signal_id('sig-inner') is None
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import asyncio
+
+import pytest
+
+import bitget_integration
+from bitget_integration import BitgetHTTP, BitgetTrader, product_symbol
+from improved_signal_parser import ImprovedSignalParser
+from market.contract_specs import ContractSpecCache
+from market.price_stream import Tick
+from market.rate_limit import RequestLimiter
+from market.watcher import Watcher
+from nlp.symbols import find_symbol
+from risk.manager import build_order_plan
+
+ETH_TEXT = "ETH шорт 3100-3150 стоп 3200 Плечо: х10 Цели: 3050-3000-2950"
+
+
+def test_alias_table():
+    assert find_symbol("Лонг по эфиру? нет, по ETHUSDT") == "ETHUSDT"
+    assert find_symbol("биток шорт, потом sol") == "BTCUSDT"  # самое левое совпадение
+    assert find_symbol("sol шорт 150-155", prefer=None) == "SOLUSDT"
+    assert find_symbol("ethos soldier") is None                # только целые слова
+    assert product_symbol("ethusdt") == "ETHUSDT_UMCBL" and product_symbol("BTCUSDT_UMCBL") == "BTCUSDT_UMCBL"
+
+
+def test_eth_signal_flows_to_plan(monkeypatch, settings):
+    signal = ImprovedSignalParser().parse_signal("1", "test", ETH_TEXT)
+    assert signal.parsed.symbol == "ETHUSDT"
+
+    with pytest.raises(ValueError):  # по умолчанию разрешён только SYMBOL
+        build_order_plan("INTRADAY", "SELL", [3100, 3150], 3200, [3050, 3000], symbol="ETHUSDT")
+
+    monkeypatch.setattr(settings.bitget, "symbols", ("BTCUSDT", "ETHUSDT"))
+    monkeypatch.setattr(settings.risk, "symbol_budget_pct", {"ETHUSDT": 50.0})
+    full = build_order_plan("INTRADAY", "SELL", [3100, 3150], 3200, [3050, 3000], symbol="BTCUSDT")
+    half = build_order_plan("INTRADAY", "SELL", [3100, 3150], 3200, [3050, 3000], symbol="ETHUSDT")
+    assert half.symbol == "ETHUSDT" and half.meta["symbol_budget_pct"] == 50.0
+    assert half.meta["equity_sub"] == pytest.approx(full.meta["equity_sub"] / 2)
+    assert half.leg1.qty == pytest.approx(full.leg1.qty / 2, rel=0.05)
+
+
+def test_btc_signal_mentioning_eth_stays_on_btc(settings):
+    text = "Eth слабее рынка. BTC шорт 88800-90400 стоп 91600 Плечо: х10 Цели: 88600-88400-87000"
+    signal = ImprovedSignalParser().parse_signal("1", "test", text)
+    assert signal.parsed.symbol == "BTCUSDT"
+    plan = build_order_plan("INTRADAY", "SELL", [88800, 90400], 91600, [88600, 88400], symbol=signal.parsed.symbol)
+    assert plan.symbol == "BTCUSDT"  # ETH не разрешён — раньше здесь был ValueError
+
+
+def test_watcher_routes_ticks_by_symbol():
+    fired = []
+    watcher = Watcher(get_now_price=None, on_breakeven=fired.append)
+    watcher.register_plan({"symbol": "BTCUSDT", "side": "LONG", "entry": 3000, "stop": 2000,
+                           "tps": [3100, 3200, 3300], "plan_id": "btc"})
+    watcher.register_plan({"symbol": "ethusdt", "side": "LONG", "entry": 3000, "stop": 2900,
+                           "tps": [3100, 3200, 3300], "plan_id": "eth"})
+    assert sorted(watcher.symbols) == ["BTCUSDT", "ETHUSDT"]
+
+    asyncio.run(watcher.on_tick(Tick("ETHUSDT", 3250.0, 0.0, 0.0)))
+    assert [p["plan_id"] for p in fired] == ["eth"] and watcher._tp_hit_count["btc"] == 0
+    asyncio.run(watcher.on_tick(Tick("SOLUSDT", 3250.0, 0.0, 0.0)))  # символ без планов
+    asyncio.run(watcher.on_tick(Tick("BTCUSDT", 2500.0, 0.0, 0.0)))  # стоп ETH (2900) не трогает
+    assert {p["plan_id"] for p in watcher.plans} == {"btc", "eth"}
+
+
+def test_trader_for_symbol_sends_product_symbol(monkeypatch):
+    from fake_bitget import FakeBitget
+
+    monkeypatch.setattr(bitget_integration, "DRY_RUN", False)
+    monkeypatch.setattr(bitget_integration, "BATCH_TAKE_PROFITS", False)
+    monkeypatch.setattr(bitget_integration, "contract_specs", ContractSpecCache(None))
+    signal = ImprovedSignalParser().parse_signal("1", "test", ETH_TEXT)
+    with FakeBitget() as fake:
+        trader = BitgetTrader()
+        trader.http = BitgetHTTP(fake.url)
+        trader.http.limiter = RequestLimiter()
+        result = trader.execute_trade(signal, context={"qty_total": 0.5, "tp_shares": [0.5, 0.5]})
+
+    eth = trader.for_symbol("ETHUSDT")
+    assert eth is trader.for_symbol("ETHUSDT_UMCBL") and eth.http is trader.http
+    assert trader.spec is None and eth.spec.size_step == 0.01
+    assert result["ok"] and result["entry"] == 3125.0
+    symbols = {body.get("symbol") for method, path, body, _ in fake.requests if method == "POST"}
+    assert symbols == {"ETHUSDT_UMCBL"}
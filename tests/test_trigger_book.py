@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import asyncio
+
+import pytest
+
+from market.trigger_book import DOWN, UP, TriggerBook, normalize_side
+from market.watcher import Watcher
+
+
+def test_normalize_side():
+    assert normalize_side("buy") == normalize_side("LONG") == "LONG"
+    assert normalize_side("SELL") == normalize_side("short") == "SHORT"
+    with pytest.raises(ValueError):
+        normalize_side("FLAT")
+
+
+def test_book_pops_only_crossed_thresholds():
+    book = TriggerBook()
+    book.set("a", "tp", 100.0, UP)
+    book.set("b", "tp", 110.0, UP)
+    book.set("c", "tp", 90.0, DOWN)
+    book.set("d", "tp", 80.0, DOWN)
+
+    assert book.crossed(95.0) == []
+    assert book.crossed(105.0) == [("a", "tp", 100.0)]
+    assert book.crossed(85.0) == [("c", "tp", 90.0)]
+    assert len(book) == 2
+
+
+def test_reset_and_discard_are_lazy_but_exact():
+    book = TriggerBook()
+    book.set("a", "tp", 100.0, UP)
+    book.set("a", "tp", 120.0, UP)  # переставили порог — старый не срабатывает
+    assert book.crossed(105.0) == []
+    book.discard("a", "tp")
+    book.set("a", "tp", 100.0, UP)  # план заново после удаления
+    assert book.crossed(130.0) == [("a", "tp", 100.0)]
+
+
+def test_watcher_touches_only_triggered_plans():
+    fired = []
+    watcher = Watcher(get_now_price=None, on_breakeven=fired.append)
+    for i in range(500):
+        watcher.register_plan({"symbol": "BTCUSDT", "side": "BUY", "entry": 1000 + i, "stop": 500,
+                               "tps": [1100 + i, 1200 + i], "plan_id": f"long{i}"})
+    watcher.register_plan({"symbol": "BTCUSDT", "side": "SELL", "entry": 1000, "stop": 2000,
+                           "tps": [950, 900, 850], "breakeven_after_tp": 2, "plan_id": "short"})
+
+    asyncio.run(watcher._tick(1100.5))
+    assert watcher._tp_hit_count["long0"] == 1 and watcher._tp_hit_count["long1"] == 0
+    assert not fired
+
+    asyncio.run(watcher._tick(1200.5))  # long0 — второй TP (БУ), long1..long100 — первый
+    assert [p["plan_id"] for p in fired] == ["long0"] and fired[0]["side"] == "LONG"
+    assert sum(1 for n in watcher._tp_hit_count.values() if n == 1) == 100
+
+    asyncio.run(watcher._tick(890))  # шорт: два TP одним тиком
+    assert [p["plan_id"] for p in fired] == ["long0", "short"] and fired[1]["side"] == "SHORT"
+    assert len(watcher.plans) == 500  # long0 закрыт последним TP, шорт после БУ ждёт стоп/TP3
+
+
+def test_stop_loss_and_time_stop_fire_on_stop_callback():
+    now = [1000.0]
+    closed, breakeven = [], []
+
+    def on_breakeven(plan):
+        breakeven.append(plan["plan_id"])
+        plan["stop"] = plan["entry"]  # как main: стоп переезжает в БУ
+
+    watcher = Watcher(get_now_price=None, on_breakeven=on_breakeven, time_stop_min=10, clock=lambda: now[0],
+                      on_stop=lambda plan, reason: closed.append((plan["plan_id"], reason)))
+    watcher.register_plan({"symbol": "BTCUSDT", "side": "BUY", "entry": 100, "stop": 90, "tps": [110, 120, 130],
+                           "plan_id": "long"})
+    watcher.register_plan({"symbol": "BTCUSDT", "side": "SELL", "entry": 100, "stop": 105, "tps": [95],
+                           "breakeven_after_tp": 1, "plan_id": "short"})
+    watcher.register_plan({"symbol": "BTCUSDT", "side": "SELL", "entry": 100, "stop": 150, "tps": [50],
+                           "time_stop_min": 1, "plan_id": "slow"})
+
+    asyncio.run(watcher._tick(106))  # стоп шорта (>= 105)
+    assert closed == [("short", "stop")]
+
+    asyncio.run(watcher._tick(121))  # лонг: TP1+TP2 -> БУ, стоп теперь 100
+    assert breakeven == ["long"]
+    asyncio.run(watcher._tick(101))
+    assert closed == [("short", "stop")]
+    asyncio.run(watcher._tick(100))
+    assert closed[-1] == ("long", "stop")
+
+    now[0] += 59
+    asyncio.run(watcher.check_deadlines())
+    assert len(closed) == 2
+    now[0] += 2  # у slow свой тайм-стоп 1 мин
+    asyncio.run(watcher.check_deadlines())
+    assert closed[-1] == ("slow", "time") and watcher.plans == []
+
+
+def test_close_position_cancels_then_closes(monkeypatch):
+    import bitget_integration
+    from bitget_integration import BitgetHTTP, BitgetTrader, Spec
+    from fake_bitget import FakeBitget
+    from market.rate_limit import RequestLimiter
+
+    monkeypatch.setattr(bitget_integration, "DRY_RUN", False)
+    with FakeBitget() as fake:
+        trader = BitgetTrader()
+        trader.http = BitgetHTTP(fake.url)
+        trader.http.limiter = RequestLimiter()
+        trader.spec = Spec(price_step=0.1, size_step=0.001, min_size=0.001)
+        responses = asyncio.run(trader.close_position_async("LONG", 0.0123))
+
+    assert all(r.status_code == 200 for r in responses)
+    assert sorted(fake.paths()[:2]) == ["/api/mix/v1/order/cancel-symbol-orders", "/api/mix/v1/plan/cancelSymbolPlan"]
+    close = fake.requests[2]
+    assert close[1] == "/api/mix/v1/order/placeOrder"
+    assert close[2]["side"] == "close_long" and close[2]["size"] == "0.012" and close[2]["reduceOnly"] == "true"
+
+
+def test_close_position_keeps_other_symbols_and_reads_live_size(monkeypatch):
+    import bitget_integration
+    from bitget_integration import BitgetHTTP, BitgetTrader, Spec
+    from fake_bitget import FakeBitget
+    from market.rate_limit import RequestLimiter
+
+    monkeypatch.setattr(bitget_integration, "DRY_RUN", False)
+    with FakeBitget() as fake:
+        trader = BitgetTrader(symbol="ETHUSDT_UMCBL")
+        trader.http = BitgetHTTP(fake.url)
+        trader.http.limiter = RequestLimiter()
+        trader.spec = Spec(price_step=0.01, size_step=0.01, min_size=0.01)
+        fake.orders.update({"1": {"symbol": "BTCUSDT_UMCBL"}, "2": {"symbol": "ETHUSDT_UMCBL"}})
+
+        with pytest.raises(RuntimeError):  # позиции нет — защиту не трогаем
+            asyncio.run(trader.close_position_async("SHORT"))
+        assert set(fake.orders) == {"1", "2"}
+
+        fake.positions["ETHUSDT_UMCBL"] = [{"holdSide": "short", "total": "1.37"}]
+        asyncio.run(trader.close_position_async("SHORT"))
+
+    # стоп и TP другого символа на месте, по ETH — только закрывающий ордер
+    assert [(o["symbol"], o.get("side")) for o in fake.orders.values()] == [
+        ("BTCUSDT_UMCBL", None), ("ETHUSDT_UMCBL", "close_short")]
+    close = fake.requests[-1][2]
+    assert close["symbol"] == "ETHUSDT_UMCBL" and close["side"] == "close_short" and close["size"] == "1.37"
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import asyncio
+
+import pytest
+
+from market.watcher import Watcher
+
+
+@pytest.fixture
+def writer(database):
+    from storage.async_repo import DatabaseWriter
+    writer = DatabaseWriter(database)  # как в main: один поток-писатель AsyncStorage на Database
+    writer.start()
+    yield writer
+    writer.stop()
+
+
+@pytest.fixture
+def store(database):
+    from storage.watcher_state import WatcherStore
+    return WatcherStore(database)
+
+
+def _watcher(store, writer, fired, closed=None):
+    def on_breakeven(plan):
+        fired.append(plan["plan_id"])
+        plan["stop"] = plan["entry"]
+
+    return Watcher(get_now_price=None, on_breakeven=on_breakeven, store=store, writer=writer, time_stop_min=60,
+                   on_stop=(lambda plan, reason: closed.append((plan["plan_id"], reason))) if closed is not None
+                   else None)
+
+
+def _tick(watcher, price):
+    async def tick_and_flush():
+        await watcher._tick(price)
+        await watcher.flush()
+    asyncio.run(tick_and_flush())
+
+
+def _plan(plan_id, side="SELL", tps=(88600.0, 88400.0, 88200.0)):
+    return {"plan_id": plan_id, "symbol": "BTCUSDT", "side": side, "entry": 89600.0, "stop": 91600.0,
+            "tps": list(tps), "tp_shares": [0.5, 0.3, 0.2], "breakeven_after_tp": 2, "qty_total": 0.01,
+            "source": "INTRADAY"}
+
+
+def test_restart_restores_plans_hits_and_breakeven(store, writer):
+    fired = []
+    before = _watcher(store, writer, fired)
+    before.register_plan(_plan("a"))
+    before.register_plan(_plan("b"))
+    before.register_plan(_plan("c"))
+    _tick(before, 88500.0)    # TP1 у всех
+    _tick(before, 88300.0)    # TP2 -> БУ у всех, стоп 89600
+    _tick(before, 89700.0)    # стоп в БУ у всех -> закрыты
+    before.register_plan(_plan("d"))
+    _tick(before, 88500.0)    # d: TP1
+    assert fired == ["a", "b", "c"]
+
+    after = _watcher(store, writer, fired)         # «рестарт»
+    assert after.restore() == 1
+    plan = after.plans[0]
+    assert plan["plan_id"] == "d" and plan["side"] == "SHORT" and after._tp_hit_count["d"] == 1
+    assert plan["tp_shares"] == pytest.approx([0.5, 0.3, 0.2]) and plan["opened_at"] > 0
+
+    _tick(after, 88400.0)     # TP2 после рестарта -> БУ, а не TP1 заново
+    assert fired[-1] == "d"
+    state = store.db.fetch_one("SELECT state, stop_price FROM positions WHERE signal_id = 'd'")
+    assert state == {"state": "BREAKEVEN", "stop_price": 89600.0}
+
+
+def test_closed_plans_are_not_restored_and_orders_are_settled(store, writer):
+    closed = []
+    watcher = _watcher(store, writer, [], closed)
+    watcher.register_plan(_plan("stop"))
+    watcher.register_plan(_plan("again"))
+    watcher.register_plan(_plan("again"))  # повторная регистрация не дублирует строки
+    _tick(watcher, 91700.0)
+    assert sorted(closed) == [("again", "stop"), ("stop", "stop")]
+
+    rows = store.db.fetch_all("SELECT o.kind, o.status FROM orders o JOIN positions p ON p.id = o.position_id "
+                              "WHERE p.signal_id = 'stop' ORDER BY o.id")
+    assert [r["status"] for r in rows] == ["CANCELED", "CANCELED", "CANCELED", "FILLED"]
+    assert store.db.fetch_one("SELECT COUNT(*) AS n FROM positions")["n"] == 2
+    assert _watcher(store, writer, []).restore() == 0
+
+
+def test_tick_does_not_wait_for_the_store(writer):
+    import threading
+    import time
+
+    class SlowStore:
+        def __init__(self):
+            self.calls = []
+            self.release = threading.Event()
+
+        def __getattr__(self, method):
+            def write(*args):
+                self.release.wait(1.0)  # медленный диск
+                self.calls.append(method)
+            return write
+
+    slow = SlowStore()
+    watcher = Watcher(get_now_price=None, on_breakeven=lambda plan: None, store=slow, writer=writer)
+
+    async def scenario():
+        watcher.register_plan(_plan("slow"))
+        started = time.monotonic()
+        await watcher._guarded_tick(88500.0)  # TP1 -> record_hits в очереди
+        await watcher._guarded_tick(88300.0)  # TP2 -> БУ
+        elapsed = time.monotonic() - started
+        slow.release.set()
+        await watcher.flush()
+        return elapsed
+
+    assert asyncio.run(scenario()) < 0.5
+    assert slow.calls == ["save_plan", "record_hits", "record_breakeven", "record_hits"]
+
+
+def test_tp_shares_survive_restart_without_qty(store, writer):
+    plan = _plan("no-qty")
+    plan["qty_total"] = 0  # объём не был известен при регистрации
+    _watcher(store, writer, []).register_plan(plan)
+
+    after = _watcher(store, writer, [])
+    assert after.restore() == 1
+    assert after.plans[0]["tp_shares"] == pytest.approx([0.5, 0.3, 0.2])
@@ -3,8 +3,10 @@ from typing import Dict, Any, List, Optional
 from dataclasses import dataclass
 import logging
 from risk.manager import build_order_plan, OrderPlan
-from market.bitget_client import bitget_client
-from nlp.parser_rules import parser, ParsedSignal
+from market.bitget_client import BitgetClient, get_bitget_client
+from market.bitget_batch import BatchOrderError, BatchOutcome, new_client_oid, submit_batches, submit_batches_async
+from trader.submitter import Leg, LegSubmitter, SubmitReport, order_legs
+from nlp.parser_rules import get_parser, ParsedSignal, as_parsed_signal
 import time
 
 logger = logging.getLogger(__name__)
@@ -27,35 +29,48 @@ class Executor:
     def __init__(self, bitget_trader=None, dry_run: bool = True):
         self.bitget_trader = bitget_trader
         self.dry_run = dry_run
-        self.client = bitget_client
+        self._client: Optional[BitgetClient] = None
+        self.submitter = LegSubmitter()
+        self.last_report: Optional[SubmitReport] = None
+
+    @property
+    def client(self) -> BitgetClient:
+        """По умолчанию — общий bitget_client; берётся при первом ордере, а не в __init__"""
+        if self._client is None:
+            self._client = get_bitget_client()
+        return self._client
+
+    @client.setter
+    def client(self, value: BitgetClient) -> None:
+        self._client = value
     
     def plan_from_signal(self, signal, context: Dict[str, Any]) -> OrderPlan:
         """
         Создание плана торговли из сигнала
         
         Args:
-            signal: Объект сигнала
+            signal: TradingSignal с .parsed, ParsedSignal или объект с ценами
             context: Контекст с параметрами (source, equity_sub, etc.)
             
         Returns:
             OrderPlan с детальным планом торговли
         """
         try:
-            # Парсим сигнал если это текст
-            if hasattr(signal, 'raw_text') and signal.raw_text:
-                parsed = parser.parse(signal.raw_text)
+            # Каноническая структура уже построена парсером — повторно не парсим
+            parsed = as_parsed_signal(signal)
+            if parsed is None and getattr(signal, 'raw_text', None):
+                # Старые объекты без .parsed: разбираем текст один раз здесь
+                parsed = get_parser().parse(signal.raw_text)
                 if not parsed:
                     raise ValueError("Не удалось распарсить сигнал")
-                
-                # Используем данные из парсера
+
+            symbol = None  # символ по умолчанию, если сигнал его не знает
+            if parsed is not None:
                 side = parsed.direction
-                entry_zone = [parsed.entry_low, parsed.entry_high]
+                symbol = parsed.symbol
+                entry_zone = parsed.entry_zone
                 stop_loss = parsed.stop_loss
-                tp_levels = []
-                if parsed.take_profit:
-                    tp_levels.append(parsed.take_profit)
-                if parsed.take_profit2:
-                    tp_levels.append(parsed.take_profit2)
+                tp_levels = list(parsed.take_profits)
                 
                 # Если тейк-профиты не указаны, рассчитываем по R:R
                 if not tp_levels:
@@ -99,7 +114,8 @@ class Executor:
                 stop_loss=stop_loss,
                 tp_levels=tp_levels,
                 legs="1/2",  # Пока используем 1/2
-                leverage_hint=context.get('leverage_min', 10)
+                leverage_hint=context.get('leverage_min', 10),
+                symbol=symbol
             )
             
             logger.info(f"План создан: {side} {plan.symbol} @ {entry_zone}")
@@ -113,234 +129,264 @@ class Executor:
         """
         Размещение всех ордеров по плану
         
+        Плечо -> вход -> стоп и пакет тейков параллельно (trader/submitter.py).
+        Статусы и тайминги ног — в self.last_report.
+        
         Args:
             plan: План торговли
             
         Returns:
             Tuple[список размещенных ордеров, план с plan_id]
         """
-        orders = []
-        
         try:
-            # 1. Устанавливаем плечо
-            self._set_leverage(plan.symbol, plan.leg1.leverage)
-            
-            # 2. Размещаем ордера входа (первая нога)
-            entry_order = self._place_entry_order(plan, plan.leg1)
-            if entry_order:
-                orders.append(entry_order)
-            
-            # 3. Размещаем стоп-лосс
-            sl_order = self._place_stop_loss(plan, plan.leg1)
-            if sl_order:
-                orders.append(sl_order)
-            
-            # 4. Размещаем тейк-профиты
-            tp_orders = self._place_take_profits(plan, plan.leg1)
-            orders.extend(tp_orders)
-            
-            # 5. Преобразуем OrderPlan в dict для watcher
-            plan_dict = {
-                'symbol': plan.symbol,
-                'side': plan.side,
-                'entry': plan.entry_price,
-                'stop': plan.sl_price,
-                'tps': plan.tp_levels,
-                'tp_shares': plan.tp_shares,
-                'breakeven_after_tp': plan.move_sl_to_be_after_tp,
-                'plan_id': getattr(plan, 'plan_id', None),
-                'qty_total': plan.leg1.qty + (plan.leg2.qty if plan.leg2 else 0.0)
-            }
-            
-            logger.info(f"Размещено {len(orders)} ордеров")
-            return orders, plan_dict
-            
+            report = self.submitter.run_sync(self._legs(plan, asynchronous=False))
+            return self._placed(plan, report)
         except Exception as e:
             logger.error(f"Ошибка размещения ордеров: {e}")
-            # Возвращаем пустой план в случае ошибки
-            plan_dict = {
-                'symbol': plan.symbol,
-                'side': plan.side,
-                'entry': plan.entry_price,
-                'stop': plan.sl_price,
-                'tps': plan.tp_levels,
-                'tp_shares': plan.tp_shares,
-                'breakeven_after_tp': plan.move_sl_to_be_after_tp,
-                'plan_id': getattr(plan, 'plan_id', None)
-            }
-            return orders, plan_dict
+            return [], self._plan_dict(plan, with_qty=False)
+
+    async def place_all_async(self, plan: OrderPlan) -> tuple[List[ExecutedOrder], dict]:
+        """place_all без блокировки цикла событий (общий async-транспорт клиента)"""
+        try:
+            report = await self.submitter.run(self._legs(plan, asynchronous=True))
+            return self._placed(plan, report)
+        except Exception as e:
+            logger.error(f"Ошибка размещения ордеров: {e}")
+            return [], self._plan_dict(plan, with_qty=False)
+
+    def _legs(self, plan: OrderPlan, asynchronous: bool) -> List[Leg]:
+        leg = plan.leg1
+        submit = self._submit_async if asynchronous else self._submit
+        submit_tps = self._submit_take_profits_async if asynchronous else self._submit_take_profits
+        set_leverage = self._set_leverage_async if asynchronous else self._set_leverage
+        entry, stop = self._entry_order(plan, leg), self._stop_loss_order(plan, leg)
+        tp_orders = self._take_profit_orders(plan, leg)
+        # ошибки плеча только логируются (как раньше) — вход от них не блокируется
+        return order_legs(lambda: set_leverage(plan.symbol, leg.leverage),
+                          lambda: submit(*entry), lambda: submit(*stop),
+                          leverage_optional=True,
+                          take_profit_batch=(lambda: submit_tps(plan.symbol, tp_orders)) if tp_orders else None)
+
+    def _placed(self, plan: OrderPlan, report: SubmitReport) -> tuple[List[ExecutedOrder], dict]:
+        self.last_report = report
+        orders = []
+        for r in report.legs:  # у ноги 'tps' результат — список (и при частичной ошибке тоже)
+            if isinstance(r.result, ExecutedOrder):
+                orders.append(r.result)
+            elif isinstance(r.result, list):
+                orders.extend(r.result)
+        logger.info(f"Размещено {len(orders)} ордеров за {report.elapsed_ms:.0f} мс")
+        return orders, self._plan_dict(plan)
+
+    @staticmethod
+    def _plan_dict(plan: OrderPlan, with_qty: bool = True) -> dict:
+        """OrderPlan -> dict для watcher"""
+        plan_dict = {
+            'symbol': plan.symbol,
+            'side': plan.side,
+            'entry': plan.entry_price,
+            'stop': plan.sl_price,
+            'tps': plan.tp_levels,
+            'tp_shares': plan.tp_shares,
+            'breakeven_after_tp': plan.move_sl_to_be_after_tp,
+            'plan_id': getattr(plan, 'plan_id', None)
+        }
+        if with_qty:
+            plan_dict['qty_total'] = plan.leg1.qty + (plan.leg2.qty if plan.leg2 else 0.0)
+        return plan_dict
     
     def _set_leverage(self, symbol: str, leverage: int):
         """Установка плеча"""
         try:
             if not self.dry_run:
-                result = self.client.set_leverage(symbol, leverage)
-                if result.get('code') == '00000':
-                    logger.info(f"Плечо установлено: {leverage}x")
-                else:
-                    logger.warning(f"Ошибка установки плеча: {result}")
+                self._log_leverage(self.client.set_leverage(symbol, leverage), leverage)
             else:
                 logger.info(f"DRY_RUN: Установка плеча {leverage}x для {symbol}")
         except Exception as e:
             logger.error(f"Ошибка установки плеча: {e}")
-    
-    def _place_entry_order(self, plan: OrderPlan, leg) -> Optional[ExecutedOrder]:
-        """Размещение ордера входа"""
+
+    async def _set_leverage_async(self, symbol: str, leverage: int):
         try:
-            if plan.entry_type == "limit_zone":
-                # Лимитный ордер в зоне
-                price = plan.entry_price
-                order_data = {
-                    'symbol': plan.symbol,
-                    'marginCoin': 'USDT',
-                    'side': plan.side.lower(),
-                    'orderType': 'limit',
-                    'size': str(leg.qty),
-                    'price': str(price),
-                    'timeInForceValue': 'normal',
-                    'reduceOnly': False
-                }
-            else:
-                # Рыночный ордер
-                order_data = {
-                    'symbol': plan.symbol,
-                    'marginCoin': 'USDT',
-                    'side': plan.side.lower(),
-                    'orderType': 'market',
-                    'size': str(leg.qty),
-                    'reduceOnly': False
-                }
-            
             if not self.dry_run:
-                result = self.client.place_order(order_data)
-                if result.get('code') == '00000':
-                    data = result.get('data', {})
-                    return ExecutedOrder(
-                        order_id=data.get('orderId', ''),
-                        symbol=plan.symbol,
-                        side=plan.side,
-                        price=float(data.get('price', 0)),
-                        qty=leg.qty,
-                        status='NEW',
-                        order_type=plan.entry_type,
-                        reduce_only=False
-                    )
+                self._log_leverage(await self.client.set_leverage_async(symbol, leverage), leverage)
             else:
-                logger.info(f"DRY_RUN: Размещение ордера входа {order_data}")
-                return ExecutedOrder(
-                    order_id=f"dry_run_entry_{int(time.time())}",
-                    symbol=plan.symbol,
-                    side=plan.side,
-                    price=plan.entry_price or 0,
-                    qty=leg.qty,
-                    status='NEW',
-                    order_type=plan.entry_type,
-                    reduce_only=False
-                )
-                
+                logger.info(f"DRY_RUN: Установка плеча {leverage}x для {symbol}")
         except Exception as e:
-            logger.error(f"Ошибка размещения ордера входа: {e}")
-            return None
-    
-    def _place_stop_loss(self, plan: OrderPlan, leg) -> Optional[ExecutedOrder]:
-        """Размещение стоп-лосса"""
-        try:
+            logger.error(f"Ошибка установки плеча: {e}")
+
+    @staticmethod
+    def _log_leverage(result: Dict[str, Any], leverage: int):
+        if result.get('code') == '00000':
+            logger.info(f"Плечо установлено: {leverage}x")
+        else:
+            logger.warning(f"Ошибка установки плеча: {result}")
+
+    # Заявка = (order_data, ExecutedOrder-заготовка, метка для логов/dry-run id)
+    def _entry_order(self, plan: OrderPlan, leg) -> tuple:
+        """Ордер входа"""
+        if plan.entry_type == "limit_zone":
+            # Лимитный ордер в зоне
             order_data = {
                 'symbol': plan.symbol,
                 'marginCoin': 'USDT',
-                'side': 'sell' if plan.side == 'BUY' else 'buy',
-                'orderType': 'stop',
+                'side': plan.side.lower(),
+                'orderType': 'limit',
                 'size': str(leg.qty),
-                'triggerPrice': str(plan.sl_price),
-                'reduceOnly': True
+                'price': str(plan.entry_price),
+                'timeInForceValue': 'normal',
+                'reduceOnly': False
             }
-            
-            if not self.dry_run:
-                result = self.client.place_order(order_data)
-                if result.get('code') == '00000':
-                    data = result.get('data', {})
-                    return ExecutedOrder(
-                        order_id=data.get('orderId', ''),
-                        symbol=plan.symbol,
-                        side='SELL' if plan.side == 'BUY' else 'BUY',
-                        price=plan.sl_price,
-                        qty=leg.qty,
-                        status='NEW',
-                        order_type='stop',
-                        reduce_only=True
-                    )
-            else:
-                logger.info(f"DRY_RUN: Размещение стоп-лосса {order_data}")
-                return ExecutedOrder(
-                    order_id=f"dry_run_sl_{int(time.time())}",
-                    symbol=plan.symbol,
-                    side='SELL' if plan.side == 'BUY' else 'BUY',
-                    price=plan.sl_price,
-                    qty=leg.qty,
-                    status='NEW',
-                    order_type='stop',
-                    reduce_only=True
-                )
-                
-        except Exception as e:
-            logger.error(f"Ошибка размещения стоп-лосса: {e}")
-            return None
-    
-    def _place_take_profits(self, plan: OrderPlan, leg) -> List[ExecutedOrder]:
-        """Размещение тейк-профитов"""
+        else:
+            # Рыночный ордер
+            order_data = {
+                'symbol': plan.symbol,
+                'marginCoin': 'USDT',
+                'side': plan.side.lower(),
+                'orderType': 'market',
+                'size': str(leg.qty),
+                'reduceOnly': False
+            }
+        order = ExecutedOrder(
+            order_id='',
+            symbol=plan.symbol,
+            side=plan.side,
+            price=plan.entry_price or 0,
+            qty=leg.qty,
+            status='NEW',
+            order_type=plan.entry_type,
+            reduce_only=False
+        )
+        return order_data, order, 'entry'
+
+    def _stop_loss_order(self, plan: OrderPlan, leg) -> tuple:
+        """Стоп-лосс"""
+        order_data = {
+            'symbol': plan.symbol,
+            'marginCoin': 'USDT',
+            'side': 'sell' if plan.side == 'BUY' else 'buy',
+            'orderType': 'stop',
+            'size': str(leg.qty),
+            'triggerPrice': str(plan.sl_price),
+            'reduceOnly': True
+        }
+        order = ExecutedOrder(
+            order_id='',
+            symbol=plan.symbol,
+            side='SELL' if plan.side == 'BUY' else 'BUY',
+            price=plan.sl_price,
+            qty=leg.qty,
+            status='NEW',
+            order_type='stop',
+            reduce_only=True
+        )
+        return order_data, order, 'sl'
+
+    def _take_profit_orders(self, plan: OrderPlan, leg) -> List[tuple]:
+        """Тейк-профиты (нулевые доли и цены пропускаются)"""
         orders = []
-        
-        try:
-            for i, (tp_price, tp_share) in enumerate(zip(plan.tp_levels, plan.tp_shares)):
-                if tp_share <= 0 or tp_price <= 0:
-                    continue
-                
-                qty = leg.qty * tp_share
-                if qty <= 0:
-                    continue
-                
-                order_data = {
-                    'symbol': plan.symbol,
-                    'marginCoin': 'USDT',
-                    'side': 'sell' if plan.side == 'BUY' else 'buy',
-                    'orderType': 'limit',
-                    'size': str(qty),
-                    'price': str(tp_price),
-                    'timeInForceValue': 'normal',
-                    'reduceOnly': True
-                }
-                
-                if not self.dry_run:
-                    result = self.client.place_order(order_data)
-                    if result.get('code') == '00000':
-                        data = result.get('data', {})
-                        orders.append(ExecutedOrder(
-                            order_id=data.get('orderId', ''),
-                            symbol=plan.symbol,
-                            side='SELL' if plan.side == 'BUY' else 'BUY',
-                            price=tp_price,
-                            qty=qty,
-                            status='NEW',
-                            order_type='limit',
-                            reduce_only=True
-                        ))
-                else:
-                    logger.info(f"DRY_RUN: Размещение TP{i+1} {order_data}")
-                    orders.append(ExecutedOrder(
-                        order_id=f"dry_run_tp{i+1}_{int(time.time())}",
-                        symbol=plan.symbol,
-                        side='SELL' if plan.side == 'BUY' else 'BUY',
-                        price=tp_price,
-                        qty=qty,
-                        status='NEW',
-                        order_type='limit',
-                        reduce_only=True
-                    ))
-                    
-        except Exception as e:
-            logger.error(f"Ошибка размещения тейк-профитов: {e}")
-        
+        for i, (tp_price, tp_share) in enumerate(zip(plan.tp_levels, plan.tp_shares)):
+            if tp_share <= 0 or tp_price <= 0:
+                continue
+            
+            qty = leg.qty * tp_share
+            if qty <= 0:
+                continue
+            
+            order_data = {
+                'symbol': plan.symbol,
+                'marginCoin': 'USDT',
+                'side': 'sell' if plan.side == 'BUY' else 'buy',
+                'orderType': 'limit',
+                'size': str(qty),
+                'price': str(tp_price),
+                'timeInForceValue': 'normal',
+                'reduceOnly': True
+            }
+            order = ExecutedOrder(
+                order_id='',
+                symbol=plan.symbol,
+                side='SELL' if plan.side == 'BUY' else 'BUY',
+                price=tp_price,
+                qty=qty,
+                status='NEW',
+                order_type='limit',
+                reduce_only=True
+            )
+            orders.append((order_data, order, f'tp{i+1}'))
         return orders
 
-# Глобальный экземпляр исполнителя
-executor = Executor()
+    def _submit(self, order_data: Dict[str, Any], order: ExecutedOrder, label: str) -> ExecutedOrder:
+        if self.dry_run:
+            return self._dry_run_order(order_data, order, label)
+        return self._accepted(self.client.place_order(order_data), order, label)
+
+    async def _submit_async(self, order_data: Dict[str, Any], order: ExecutedOrder, label: str) -> ExecutedOrder:
+        if self.dry_run:
+            return self._dry_run_order(order_data, order, label)
+        return self._accepted(await self.client.place_order_async(order_data), order, label)
+
+    @staticmethod
+    def _dry_run_order(order_data: Dict[str, Any], order: ExecutedOrder, label: str) -> ExecutedOrder:
+        logger.info(f"DRY_RUN: Размещение {label} {order_data}")
+        order.order_id = f"dry_run_{label}_{int(time.time())}"
+        return order
+
+    @staticmethod
+    def _accepted(result: Dict[str, Any], order: ExecutedOrder, label: str) -> ExecutedOrder:
+        """Ответ биржи -> ExecutedOrder; отказ — исключение (зависящие ноги не уйдут)"""
+        if result.get('code') != '00000':
+            raise RuntimeError(f"Ошибка размещения {label}: {result.get('msg') or result}")
+        order.order_id = (result.get('data') or {}).get('orderId', '')
+        return order
+
+    def _submit_take_profits(self, symbol: str, tp_orders: List[tuple]) -> List[ExecutedOrder]:
+        """Все TP одним batch-orders; повтор — только отклонённых (market/bitget_batch.py)"""
+        if self.dry_run:
+            return [self._dry_run_order(*o) for o in tp_orders]
+        batch, by_oid = self._take_profit_batch(tp_orders)
+        outcome = submit_batches(lambda chunk: self.client.place_batch_orders(symbol, chunk), batch)
+        return self._batch_accepted(outcome, by_oid)
+
+    async def _submit_take_profits_async(self, symbol: str, tp_orders: List[tuple]) -> List[ExecutedOrder]:
+        if self.dry_run:
+            return [self._dry_run_order(*o) for o in tp_orders]
+        batch, by_oid = self._take_profit_batch(tp_orders)
+        outcome = await submit_batches_async(lambda chunk: self.client.place_batch_orders_async(symbol, chunk), batch)
+        return self._batch_accepted(outcome, by_oid)
+
+    @staticmethod
+    def _take_profit_batch(tp_orders: List[tuple]) -> tuple:
+        batch, by_oid = [], {}
+        for order_data, order, label in tp_orders:
+            client_oid = new_client_oid(label)
+            item = {k: v for k, v in order_data.items() if k not in ('symbol', 'marginCoin')}
+            batch.append({**item, 'clientOid': client_oid})
+            by_oid[client_oid] = order
+        return batch, by_oid
+
+    @staticmethod
+    def _batch_accepted(outcome: BatchOutcome, by_oid: Dict[str, ExecutedOrder]) -> List[ExecutedOrder]:
+        placed = []
+        for client_oid, order in by_oid.items():
+            if client_oid in outcome.placed:
+                order.order_id = outcome.placed[client_oid]
+                placed.append(order)
+        if not outcome.ok:
+            raise BatchOrderError(outcome, result=placed)
+        return placed
+
+# Глобальный экземпляр исполнителя: создаётся при первом обращении
+_executor: Optional[Executor] = None
+
+
+def get_executor() -> Executor:
+    global _executor
+    if _executor is None:
+        _executor = Executor()
+    return _executor
+
+
+def __getattr__(name: str):
+    if name == "executor":
+        return get_executor()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,7 +1,7 @@
 # trader/router.py
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Union
 import logging
-from nlp.parser_rules import parser, ParsedSignal
+from nlp.parser_rules import get_parser, ParsedSignal, as_parsed_signal
 from risk.manager import build_order_plan, OrderPlan
 
 logger = logging.getLogger(__name__)
@@ -13,22 +13,25 @@ class SignalRouter:
         self.scalping_ratio = 0.15  # 15% для скальпинга
         self.intraday_ratio = 0.85  # 85% для интрадей
         
-    def route_signal(self, signal_text: str, source: str) -> Dict[str, Any]:
+    def route_signal(self, signal: Union[str, Any], source: str) -> Dict[str, Any]:
         """
         Маршрутизация сигнала по типу стратегии
         
         Args:
-            signal_text: Текст сигнала
+            signal: TradingSignal с .parsed, ParsedSignal или текст сигнала
             source: Источник сигнала (SCALPING/INTRADAY)
             
         Returns:
             Словарь с параметрами маршрутизации
         """
         try:
-            # Парсим сигнал
-            parsed = parser.parse(signal_text)
+            # Уже распарсенный сигнал используем как есть; текст парсим сами
+            if isinstance(signal, str):
+                parsed = get_parser().parse(signal)
+            else:
+                parsed = as_parsed_signal(signal)
             if not parsed:
-                logger.warning(f"Не удалось распарсить сигнал: {signal_text[:100]}...")
+                logger.warning(f"Не удалось распарсить сигнал: {str(getattr(signal, 'raw_text', signal))[:100]}...")
                 return self._default_routing(source)
             
             # Определяем тип стратегии
@@ -170,9 +173,10 @@ class SignalRouter:
                 side=parsed.direction,
                 entry_zone=[parsed.entry_low, parsed.entry_high],
                 stop_loss=parsed.stop_loss,
-                tp_levels=[parsed.take_profit] if parsed.take_profit else [],
+                tp_levels=list(parsed.take_profits),
                 legs="1/2",
-                leverage_hint=exec_params['leverage_min']
+                leverage_hint=exec_params['leverage_min'],
+                symbol=parsed.symbol
             )
             
             # Добавляем метаданные маршрутизации
@@ -0,0 +1,212 @@
+# trader/submitter.py
+"""Параллельная отправка ног ордера с учётом зависимостей.
+
+Плечо -> вход -> (стоп и все TP одновременно). Ноги разбиваются на волны
+по зависимостям; внутри волны запросы идут параллельно, но не больше
+max_concurrency одновременно, а старты ограничены токен-бакетом
+(rate_per_sec, всплеск до burst запросов).
+Если обязательная зависимость упала, зависящие ноги не отправляются
+(skipped). Для каждой ноги фиксируются результат, ожидание в очереди и
+время на проводе.
+"""
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from market.rate_limit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Leg:
+    """Одна заявка: call() — корутина (run) или обычная функция (run_sync)"""
+    name: str
+    call: Callable[[], Any]
+    after: Tuple[str, ...] = ()
+    optional: bool = False  # ошибка не блокирует зависящие ноги (например, плечо уже стоит)
+
+
+@dataclass
+class LegResult:
+    name: str
+    status: str                  # ok | error | skipped
+    result: Any = None
+    error: Optional[str] = None  # при ошибке result — частичный итог (атрибут result исключения)
+    queued_ms: float = 0.0       # от старта отправки до выхода на провод
+    elapsed_ms: float = 0.0      # время самого запроса
+
+    @property
+    def ok(self) -> bool:
+        return self.status == 'ok'
+
+
+@dataclass
+class SubmitReport:
+    legs: List[LegResult] = field(default_factory=list)
+    elapsed_ms: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return all(leg.ok for leg in self.legs)
+
+    def get(self, name: str) -> Optional[LegResult]:
+        return next((leg for leg in self.legs if leg.name == name), None)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Для логов/JSON: без самих ответов биржи"""
+        return {
+            'ok': self.ok,
+            'elapsed_ms': round(self.elapsed_ms, 2),
+            'legs': [
+                {'name': leg.name, 'status': leg.status, 'error': leg.error,
+                 'queued_ms': round(leg.queued_ms, 2), 'elapsed_ms': round(leg.elapsed_ms, 2)}
+                for leg in self.legs
+            ],
+        }
+
+
+def dependency_waves(legs: Sequence[Leg]) -> List[List[Leg]]:
+    """Волны: нога попадает в волну на 1 глубже самой глубокой зависимости"""
+    by_name = {leg.name: leg for leg in legs}
+    depth: Dict[str, int] = {}
+
+    def visit(leg: Leg, path: Tuple[str, ...] = ()) -> int:
+        if leg.name in depth:
+            return depth[leg.name]
+        if leg.name in path:
+            raise ValueError(f"Циклическая зависимость ног: {' -> '.join(path + (leg.name,))}")
+        deps = [by_name[d] for d in leg.after if d in by_name]
+        depth[leg.name] = 1 + max((visit(d, path + (leg.name,)) for d in deps), default=-1)
+        return depth[leg.name]
+
+    for leg in legs:
+        visit(leg)
+    waves: List[List[Leg]] = [[] for _ in range(max(depth.values(), default=-1) + 1)]
+    for leg in legs:
+        waves[depth[leg.name]].append(leg)
+    return waves
+
+
+class LegSubmitter:
+    """Отправка ног волнами с ограничением параллелизма и частоты"""
+
+    def __init__(self, max_concurrency: int = 5, rate_per_sec: Optional[float] = 10.0,
+                 burst: Optional[int] = None):
+        self.max_concurrency = max(1, max_concurrency)
+        self.rate_per_sec = rate_per_sec
+        self.bucket = TokenBucket(rate_per_sec, burst) if rate_per_sec else None
+
+    def _reserve_start(self) -> float:
+        """Взять токен; вернуть, сколько подождать, если бакет в долгу"""
+        return self.bucket.reserve() if self.bucket else 0.0
+
+    @staticmethod
+    def _blocked(leg: Leg, done: Dict[str, LegResult], legs_by_name: Dict[str, Leg]) -> Optional[str]:
+        for dep in leg.after:
+            res = done.get(dep)
+            if res is not None and not res.ok and not legs_by_name[dep].optional:
+                return dep
+        return None
+
+    async def run(self, legs: Sequence[Leg]) -> SubmitReport:
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        t0 = time.perf_counter()
+        done: Dict[str, LegResult] = {}
+        legs_by_name = {leg.name: leg for leg in legs}
+
+        async def send(leg: Leg) -> LegResult:
+            async with semaphore:
+                delay = self._reserve_start()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                started = time.perf_counter()
+                try:
+                    result = await leg.call()
+                    return LegResult(leg.name, 'ok', result=result, queued_ms=(started - t0) * 1000,
+                                     elapsed_ms=(time.perf_counter() - started) * 1000)
+                except Exception as e:
+                    return LegResult(leg.name, 'error', result=getattr(e, 'result', None), error=str(e), queued_ms=(started - t0) * 1000,
+                                     elapsed_ms=(time.perf_counter() - started) * 1000)
+
+        for wave in dependency_waves(legs):
+            runnable = []
+            for leg in wave:
+                blocker = self._blocked(leg, done, legs_by_name)
+                if blocker:
+                    done[leg.name] = LegResult(leg.name, 'skipped', error=f"{blocker} failed")
+                else:
+                    runnable.append(leg)
+            for res in await asyncio.gather(*(send(leg) for leg in runnable)):
+                done[res.name] = res
+
+        return self._report(legs, done, t0)
+
+    def run_sync(self, legs: Sequence[Leg]) -> SubmitReport:
+        """То же для синхронных вызовов: волна уходит в пул потоков"""
+        t0 = time.perf_counter()
+        done: Dict[str, LegResult] = {}
+        legs_by_name = {leg.name: leg for leg in legs}
+
+        def send(leg: Leg) -> LegResult:
+            delay = self._reserve_start()
+            if delay > 0:
+                time.sleep(delay)
+            started = time.perf_counter()
+            try:
+                result = leg.call()
+                return LegResult(leg.name, 'ok', result=result, queued_ms=(started - t0) * 1000,
+                                 elapsed_ms=(time.perf_counter() - started) * 1000)
+            except Exception as e:
+                return LegResult(leg.name, 'error', result=getattr(e, 'result', None), error=str(e), queued_ms=(started - t0) * 1000,
+                                 elapsed_ms=(time.perf_counter() - started) * 1000)
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix='leg') as pool:
+            for wave in dependency_waves(legs):
+                runnable = []
+                for leg in wave:
+                    blocker = self._blocked(leg, done, legs_by_name)
+                    if blocker:
+                        done[leg.name] = LegResult(leg.name, 'skipped', error=f"{blocker} failed")
+                    else:
+                        runnable.append(leg)
+                if len(runnable) == 1:
+                    res = send(runnable[0])  # одиночную ногу — без переключения потоков
+                    done[res.name] = res
+                    continue
+                for res in pool.map(send, runnable):
+                    done[res.name] = res
+
+        return self._report(legs, done, t0)
+
+    @staticmethod
+    def _report(legs: Sequence[Leg], done: Dict[str, LegResult], t0: float) -> SubmitReport:
+        report = SubmitReport(legs=[done[leg.name] for leg in legs],
+                              elapsed_ms=(time.perf_counter() - t0) * 1000)
+        for leg in report.legs:
+            if leg.status != 'ok':
+                logger.warning(f"Нога {leg.name}: {leg.status} {leg.error or ''}".rstrip())
+        return report
+
+
+def order_legs(leverage: Optional[Callable[[], Any]], entry: Callable[[], Any],
+               stop: Optional[Callable[[], Any]], take_profits: Sequence[Callable[[], Any]] = (),
+               leverage_optional: bool = False,
+               take_profit_batch: Optional[Callable[[], Any]] = None) -> List[Leg]:
+    """Стандартный граф: плечо -> вход -> стоп + TP1..TPn (или одна нога 'tps' пакетом)"""
+    legs: List[Leg] = []
+    entry_after: Tuple[str, ...] = ()
+    if leverage is not None:
+        legs.append(Leg('leverage', leverage, optional=leverage_optional))
+        entry_after = ('leverage',)
+    legs.append(Leg('entry', entry, after=entry_after))
+    if stop is not None:
+        legs.append(Leg('stop', stop, after=('entry',)))
+    for i, tp in enumerate(take_profits, 1):
+        legs.append(Leg(f'tp{i}', tp, after=('entry',)))
+    if take_profit_batch is not None:
+        legs.append(Leg('tps', take_profit_batch, after=('entry',)))
+    return legs